@@ -1,4 +1,4 @@
-"""
+r"""
 ENDPOINTS PARA AGREGAR AL BACKEND FASTAPI
 ==========================================
 
@@ -9,15 +9,43 @@ UBICACIÓN: C:\Users\elkin\OneDrive\Desktop\app de prueba\main.py (o el archivo
 BASE DE DATOS: C:\Users\elkin\OneDrive\Desktop\app de prueba\logistics.db
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, ValidationError
+from typing import Optional, List, Dict, Any
 from datetime import datetime
+import os
+import math
+import json
+import hashlib
 import jwt
 import sqlite3
 from passlib.context import CryptContext
 
+from vlx_db_pool import SQLitePool, connect
+from vlx_hashing import PasswordHasher, HasherOverloadedError
+from vlx_token_cache import TokenCache
+from vlx_repository import AsyncDatabase, BookingRepository, UserRepository, BOOKING_COLUMNS
+from vlx_group_commit import GroupCommitWriter
+from vlx_user_cache import UserCache
+from vlx_export import iter_bookings_export, EXPORT_FORMATS
+from vlx_events import BookingChangeFeed, BookingEventBus
+from vlx_slow_queries import SlowQueryLog, SLOW_QUERY_MS
+from vlx_metrics import Metrics, MetricsMiddleware, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from vlx_pricing import quote_trips, tariff_prices, service_multiplier, vehicle_tier, TIERS
+from vlx_quote_matrix import iter_matrix_ndjson
+from vlx_zones import zone_keys
+from vlx_distance_cache import (
+    DistanceCache, DistanceNotFoundError, DistanceProviderError,
+    FakeDistanceProvider, GoogleDistanceProvider, response_fields,
+)
+from vlx_tolls import FakeTollProvider, TollGuruProvider, TollProviderError, TollRequest, TollService, unavailable
+from vlx_toll_table import TollModel
+from vlx_drivers import DRIVER_RADIUS_MAX_MILES, DRIVER_RADIUS_MILES, DriverIndex
+from vlx_migrations import apply_migrations
+from vlx_pagination import check_page, decode_cursor, next_page
+
 # ==============================================================================
 # CONFIGURACIÓN
 # ==============================================================================
@@ -25,10 +53,104 @@ from passlib.context import CryptContext
 SECRET_KEY = "tu_clave_secreta_jwt"  # Cambiar por la clave que uses
 ALGORITHM = "HS256"
 DATABASE_PATH = "logistics.db"  # Ajustar según la ubicación
+DB_POOL_SIZE = int(os.getenv("VLX_DB_POOL_SIZE", "8"))
+ADMIN_ROLES = ("admin", "ceo", "manager")
+DRIVER_APP = "vanelux_driver"  # AppConfig.driverAppIdentifier de la app
+BATCH_MAX_BOOKINGS = int(os.getenv("VLX_BATCH_MAX_BOOKINGS", "200"))
+GROUP_COMMIT_MS = float(os.getenv("VLX_GROUP_COMMIT_MS", "0"))  # 0 = desactivado
+BOOKING_FEED_SECONDS = float(os.getenv("VLX_BOOKING_FEED_SECONDS", "2"))  # 0 = desactivado
+METRICS_TOKEN = os.getenv("VLX_METRICS_TOKEN")  # si se define, /metrics exige Bearer <token>
+QUOTE_MAX_TRIPS = int(os.getenv("VLX_QUOTE_MAX_TRIPS", "1000"))
+MATRIX_MAX_POINTS = int(os.getenv("VLX_MATRIX_MAX_POINTS", "10000"))  # por lado: hasta 10k x 10k pares
+GOOGLE_MAPS_API_KEY = os.getenv("VLX_GOOGLE_MAPS_API_KEY")
+DISTANCE_PROVIDER = os.getenv("VLX_DISTANCE_PROVIDER", "google")  # google | fake (pruebas)
+TOLLGURU_API_KEY = os.getenv("TOLLGURU_API_KEY")  # misma variable que netlify/functions/tolls.js
+TOLL_PROVIDER = os.getenv("VLX_TOLL_PROVIDER", "tollguru")  # tollguru | fake (pruebas)
+TOLL_TABLE = os.getenv("VLX_TOLL_TABLE", "1") == "1"  # tabla local de cruces antes de TollGuru
+DRIVER_MAX_K = int(os.getenv("VLX_DRIVER_MAX_K", "50"))
+# Si está activo, el precio de cada reserva nunca queda por debajo de la tarifa del servidor
+REPRICE_BOOKINGS = os.getenv("VLX_REPRICE_BOOKINGS", "0") == "1"
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Serialización rápida de listados con orjson (pip install orjson); si no está
+# instalado se usa el encoder JSON estándar
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:
+    FastJSONResponse = JSONResponse
 security = HTTPBearer()
 
+# Histogramas de latencia por ruta, SQL, bcrypt y JWT (ver vlx_metrics.py)
+metrics = Metrics()
+
+# Sentencias por encima de VLX_SLOW_QUERY_MS (100 ms por defecto, 0 = desactivado)
+# van con su EXPLAIN QUERY PLAN a slow_queries.log (ver vlx_slow_queries.py)
+slow_query_log = SlowQueryLog() if SLOW_QUERY_MS > 0 else None
+
+# Conexiones reutilizadas entre requests (ver vlx_db_pool.py)
+db_pool = SQLitePool(
+    DATABASE_PATH,
+    size=DB_POOL_SIZE,
+    factory=slow_query_log.connection_factory if slow_query_log else sqlite3.Connection,
+)
+
+# bcrypt fuera del event loop (ver vlx_hashing.py; VLX_HASH_EXECUTOR=thread|process)
+password_hasher = PasswordHasher(metrics=metrics)
+
+# Payloads JWT ya verificados (ver vlx_token_cache.py)
+token_cache = TokenCache()
+
+# Estado de la cola de hashing y del cache de tokens, leído en cada scrape de /metrics
+metrics.gauge("vlx_hash_queue_depth", "Operaciones bcrypt esperando en cola", lambda: password_hasher.queued)
+metrics.gauge("vlx_hash_inflight", "Operaciones bcrypt ejecutándose", lambda: password_hasher.in_flight)
+metrics.counter("vlx_hash_rejected_total", "Operaciones bcrypt rechazadas con 503 por cola llena",
+                lambda: password_hasher.rejected)
+metrics.counter("vlx_token_cache_hits_total", "Tokens JWT servidos desde el cache", lambda: token_cache.hits)
+metrics.counter("vlx_token_cache_misses_total", "Tokens JWT que hubo que decodificar", lambda: token_cache.misses)
+metrics.counter("vlx_token_cache_evictions_total", "Tokens sacados del cache por tamaño",
+                lambda: token_cache.evictions)
+metrics.counter("vlx_token_cache_expirations_total", "Tokens sacados del cache por vencidos",
+                lambda: token_cache.expirations)
+metrics.gauge("vlx_token_cache_size", "Tokens en el cache", lambda: len(token_cache))
+
+# SQL fuera del event loop: los handlers hacen await sobre los repositorios
+async_db = AsyncDatabase(db_pool, metrics=metrics)
+# Cambios de reservas hacia GET /api/vlx/bookings/stream (ver vlx_events.py)
+booking_events = BookingEventBus()
+# Cambios hechos por el panel admin, scripts u otros workers hacia el mismo bus
+booking_feed = BookingChangeFeed(booking_events, DATABASE_PATH, interval=BOOKING_FEED_SECONDS) if BOOKING_FEED_SECONDS > 0 else None
+
+user_cache = UserCache()
+user_repo = UserRepository(async_db, cache=user_cache)
+# Con VLX_GROUP_COMMIT_MS > 0 las reservas concurrentes comparten transacción
+booking_writer = GroupCommitWriter(DATABASE_PATH, window_ms=GROUP_COMMIT_MS, metrics=metrics) if GROUP_COMMIT_MS > 0 else None
+booking_repo = BookingRepository(async_db, writer=booking_writer)
+
+# Distancias de Google con cache en memoria + SQLite (ver vlx_distance_cache.py)
+if DISTANCE_PROVIDER == "fake":
+    distance_provider = FakeDistanceProvider()
+elif GOOGLE_MAPS_API_KEY:
+    distance_provider = GoogleDistanceProvider(GOOGLE_MAPS_API_KEY)
+else:
+    distance_provider = None
+distance_cache = DistanceCache(distance_provider, db=async_db)
+
+# Peajes de TollGuru con cache, single-flight y stale-while-revalidate (ver vlx_tolls.py)
+if TOLL_PROVIDER == "fake":
+    toll_provider = FakeTollProvider()
+elif TOLLGURU_API_KEY:
+    toll_provider = TollGuruProvider(TOLLGURU_API_KEY)
+else:
+    toll_provider = None
+toll_service = TollService(toll_provider)
+# Los cruces conocidos se tarifan con la tabla local (ver vlx_toll_table.py)
+toll_model = TollModel() if TOLL_TABLE else None
+
+# Última posición de cada conductor en línea, en memoria (ver vlx_drivers.py)
+driver_index = DriverIndex()
+
 # ==============================================================================
 # MODELOS PYDANTIC
 # ==============================================================================
@@ -60,6 +182,52 @@ class BookingCreate(BaseModel):
     service_type: Optional[str] = "standard"
     is_scheduled: bool = True
 
+class BookingBatchCreate(BaseModel):
+    # Cada elemento se valida por separado contra BookingCreate para poder
+    # reportar errores por índice en lugar de rechazar todo el lote
+    bookings: List[Dict[str, Any]]
+    allow_partial: bool = False
+
+class QuoteTrip(BaseModel):
+    pickup_lat: float
+    pickup_lng: float
+    destination_lat: float
+    destination_lng: float
+    distance_miles: float
+    service_type: Optional[str] = None
+    is_return_trip: bool = False
+    toll_cost: float = 0.0
+    vehicle_name: Optional[str] = None
+
+class QuoteRequest(BaseModel):
+    trips: List[QuoteTrip]
+
+class MatrixQuoteRequest(BaseModel):
+    # Pares [lat, lng]; se cotiza cada recogida contra cada destino
+    pickups: List[List[float]]
+    destinations: List[List[float]]
+    service_type: Optional[str] = None
+    is_return_trip: bool = False
+    road_factor: float = 1.0
+    tiers: Optional[List[str]] = None
+
+class DriverLocationPing(BaseModel):
+    lat: float
+    lng: float
+    # Tier por nombre (TIERS) o deducido del vehículo; sin ninguno se conserva el anterior
+    tier: Optional[str] = None
+    vehicle_name: Optional[str] = None
+    is_available: Optional[bool] = None
+
+class BookingStatusUpdate(BaseModel):
+    status: str
+
+class UserCacheInvalidation(BaseModel):
+    # Sin campos = vaciar todo el cache
+    user_id: Optional[int] = None
+    email: Optional[str] = None
+    username: Optional[str] = None
+
 class BookingResponse(BaseModel):
     id: int
     user_id: int
@@ -87,24 +255,65 @@ class BookingResponse(BaseModel):
 # ==============================================================================
 
 def get_db_connection():
-    """Crea conexión a la base de datos SQLite"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Crea conexión suelta a la base de datos SQLite (fuera del pool, con los mismos PRAGMAs)"""
+    return connect(DATABASE_PATH)
+
+def bookings_etag(user_id: int, version: tuple, *query_parts) -> str:
+    """ETag débil del listado: versión de las reservas del usuario + parámetros de la consulta"""
+    raw = json.dumps([user_id, list(version), list(query_parts)], separators=(",", ":"))
+    return 'W/"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara If-None-Match con el ETag actual (comparación débil, acepta listas y *)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    weak = etag[2:] if etag.startswith("W/") else etag
+    return "*" in candidates or any(
+        (tag[2:] if tag.startswith("W/") else tag) == weak for tag in candidates
+    )
+
+def get_db():
+    """Dependencia FastAPI: presta una conexión del pool durante el request"""
+    conn = db_pool.acquire()
+    try:
+        yield conn
+    finally:
+        db_pool.release(conn)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifica contraseña hasheada"""
+    """Verifica contraseña hasheada (bloqueante: no usar dentro de un endpoint async)"""
     return pwd_context.verify(plain_password, hashed_password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verifica contraseña en el executor de hashing, sin bloquear el event loop
+    (password_hasher registra la espera en cola y el tiempo de bcrypt por separado)
+    """
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except HasherOverloadedError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, try again",
+            headers={"Retry-After": "1"},
+        )
+
 def create_access_token(data: dict) -> str:
     """Crea token JWT"""
     to_encode = data.copy()
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    with metrics.time("vlx_jwt_duration_seconds", "encode"):
+        return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def decode_token(token: str) -> dict:
-    """Decodifica token JWT"""
+    """Decodifica token JWT (los tokens ya validados se sirven desde token_cache)"""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with metrics.time("vlx_jwt_duration_seconds", "decode"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        token_cache.put(token, payload)
         return payload
     except jwt.PyJWTError:
         raise HTTPException(
@@ -125,12 +334,48 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         )
     return user_id
 
+async def get_current_admin(user_id: int = Depends(get_current_user)):
+    """Exige un usuario activo con rol admin/ceo/manager (consulta servida desde user_cache)"""
+    user = await user_repo.get_by_id(user_id)
+    if user is None or not user.is_active or not user.has_any_role(ADMIN_ROLES):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return user
+
+async def get_current_driver(user_id: int = Depends(get_current_user)):
+    """Exige un usuario activo con acceso a la app de conductores"""
+    user = await user_repo.get_by_id(user_id)
+    if user is None or not user.is_active or DRIVER_APP not in user.allowed_app_set:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Driver app access required",
+        )
+    return user
+
 # ==============================================================================
 # ROUTER (Agregar al app principal)
 # ==============================================================================
 
 router = APIRouter(prefix="/api", tags=["VaneLux"])
 
+def apply_db_migrations():
+    """Crea los índices que usan los endpoints (idempotente, corre al arrancar)"""
+    with db_pool.connection() as conn:
+        apply_migrations(conn)
+
+router.add_event_handler("startup", apply_db_migrations)
+router.add_event_handler("startup", distance_cache.purge_expired)
+if booking_feed is not None:
+    router.add_event_handler("startup", booking_feed.start)
+    router.add_event_handler("shutdown", booking_feed.close)
+if booking_writer is not None:
+    router.add_event_handler("shutdown", booking_writer.close)
+router.add_event_handler("shutdown", async_db.close)
+router.add_event_handler("shutdown", db_pool.close)
+router.add_event_handler("shutdown", password_hasher.shutdown)
+
 # ==============================================================================
 # ENDPOINT 1: LOGIN
 # ==============================================================================
@@ -147,18 +392,8 @@ async def login(credentials: LoginRequest):
       -d '{"username":"chilaelkin4@gmail.com","password":"chila123","app":"vanelux"}'
     ```
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     # Buscar usuario por email o username
-    cursor.execute("""
-        SELECT id, username, email, password_hash, roles, allowed_apps, status 
-        FROM users 
-        WHERE (email = ? OR username = ?) AND status = 'active'
-    """, (credentials.username, credentials.username))
-    
-    user = cursor.fetchone()
-    conn.close()
+    user = await user_repo.get_active_by_login(credentials.username)
     
     if not user:
         raise HTTPException(
@@ -167,16 +402,15 @@ async def login(credentials: LoginRequest):
         )
     
     # Verificar contraseña
-    if not verify_password(credentials.password, user["password_hash"]):
+    if not await verify_password_async(credentials.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password"
         )
     
     # Verificar que el usuario tiene acceso a la app solicitada
-    import json
-    allowed_apps = json.loads(user["allowed_apps"]) if user["allowed_apps"] else []
-    if credentials.app not in allowed_apps:
+    # (roles y apps ya vienen parseados desde user_cache)
+    if credentials.app not in user.allowed_app_set:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"User does not have access to {credentials.app}"
@@ -184,19 +418,19 @@ async def login(credentials: LoginRequest):
     
     # Crear token JWT
     token_data = {
-        "user_id": user["id"],
-        "email": user["email"],
-        "username": user["username"]
+        "user_id": user.id,
+        "email": user.email,
+        "username": user.username
     }
     access_token = create_access_token(token_data)
     
     # Preparar respuesta
     user_data = {
-        "id": user["id"],
-        "username": user["username"],
-        "email": user["email"],
-        "roles": json.loads(user["roles"]) if user["roles"] else [],
-        "allowed_apps": allowed_apps
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "roles": list(user.roles),
+        "allowed_apps": list(user.allowed_apps)
     }
     
     return LoginResponse(
@@ -204,12 +438,25 @@ async def login(credentials: LoginRequest):
         user=user_data
     )
 
+def apply_tariff(bookings: List[BookingCreate]):
+    """
+    Sube el precio de cada reserva a la tarifa del servidor si el cliente
+    mandó menos. Un precio mayor se respeta: BookingCreate no trae peajes ni
+    ida y vuelta, que la app sí suma.
+    """
+    for booking, tariff in zip(bookings, tariff_prices(bookings)):
+        if tariff is not None and booking.price < tariff:
+            booking.price = tariff
+
 # ==============================================================================
 # ENDPOINT 2: CREAR RESERVA
 # ==============================================================================
 
 @router.post("/vlx/bookings")
-async def create_booking(booking: BookingCreate, user_id: int = Depends(get_current_user)):
+async def create_booking(
+    booking: BookingCreate,
+    user_id: int = Depends(get_current_user)
+):
     """
     Crea una nueva reserva para el usuario autenticado.
     
@@ -234,71 +481,19 @@ async def create_booking(booking: BookingCreate, user_id: int = Depends(get_curr
       }'
     ```
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+    if REPRICE_BOOKINGS:
+        apply_tariff([booking])
     try:
-        # Insertar reserva
-        cursor.execute("""
-            INSERT INTO vlx_bookings (
-                user_id, 
-                pickup_address, 
-                pickup_lat, 
-                pickup_lng,
-                destination_address, 
-                destination_lat, 
-                destination_lng,
-                pickup_time, 
-                vehicle_name,
-                passengers, 
-                price,
-                distance_miles,
-                distance_text,
-                duration_text,
-                service_type,
-                is_scheduled,
-                status,
-                created_at,
-                updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending', datetime('now'), datetime('now'))
-        """, (
-            user_id,
-            booking.pickup_address,
-            booking.pickup_lat,
-            booking.pickup_lng,
-            booking.destination_address,
-            booking.destination_lat,
-            booking.destination_lng,
-            booking.pickup_time,
-            booking.vehicle_name,
-            booking.passengers,
-            booking.price,
-            booking.distance_miles,
-            booking.distance_text,
-            booking.duration_text,
-            booking.service_type,
-            1 if booking.is_scheduled else 0
-        ))
-        
-        conn.commit()
-        booking_id = cursor.lastrowid
-        
-        # Obtener la reserva creada
-        cursor.execute("SELECT * FROM vlx_bookings WHERE id = ?", (booking_id,))
-        created_booking = cursor.fetchone()
-        conn.close()
-        
-        # Convertir a diccionario
-        booking_dict = dict(created_booking)
-        
-        return {"booking": booking_dict}
+        booking_dict = await booking_repo.create(user_id, booking)
     
     except Exception as e:
-        conn.close()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating booking: {str(e)}"
         )
+    
+    booking_events.publish_booking(booking_dict, "booking.created")
+    return {"booking": booking_dict}
 
 # ==============================================================================
 # ENDPOINT 3: LISTAR RESERVAS
@@ -306,62 +501,711 @@ async def create_booking(booking: BookingCreate, user_id: int = Depends(get_curr
 
 @router.get("/vlx/bookings")
 async def get_bookings(
+    request: Request,
+    response: Response,
     user_id: int = Depends(get_current_user),
     status: Optional[str] = None,
     page: int = 1,
-    page_size: int = 50
+    page_size: int = 50,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    validate: bool = False
 ):
     """
     Obtiene todas las reservas del usuario autenticado.
     
+    Campos:
+    - `fields`: lista separada por comas de las columnas a devolver; el SELECT
+      solo lee esas columnas. Ej. para el historial:
+      `fields=id,pickup_address,destination_address,pickup_time,price,status`
+    - `validate=true`: ruta lenta que valida cada fila contra BookingResponse
+      (siempre con todas las columnas). Por defecto las filas se serializan
+      directo con orjson.
+    
+    Caché HTTP: la respuesta trae un `ETag` derivado de la cantidad de reservas
+    del usuario y su último `updated_at`. Si el cliente lo reenvía en
+    `If-None-Match` y nada cambió, se responde `304 Not Modified` sin leer
+    ninguna reserva.
+    
+    Paginación:
+    - `page` / `page_size`: modo clásico con OFFSET (se mantiene por
+      compatibilidad). `page` >= 1 y `page_size` entre 1 y VLX_PAGE_SIZE_MAX
+      (500); fuera de rango responde 400.
+    - `cursor`: modo keyset; enviar el `next_cursor` de la respuesta anterior.
+      Cada página cuesta lo mismo sin importar qué tan profundo se navegue.
+    
+    `next_cursor` viene en ambos modos (null si no hay más reservas), así que
+    un cliente puede pedir la primera página sin cursor y seguir con él.
+    
     **Uso:**
     ```bash
     curl http://192.168.1.43:3000/api/vlx/bookings \
       -H "Authorization: Bearer <TOKEN>"
+    
+    curl "http://192.168.1.43:3000/api/vlx/bookings?status=pending&cursor=<NEXT_CURSOR>" \
+      -H "Authorization: Bearer <TOKEN>"
+    ```
+    """
+    try:
+        check_page(page, page_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Versión barata (índice cubriente) antes de tocar las filas
+    version = await booking_repo.version_for_user(user_id)
+    etag = bookings_etag(user_id, version, status, page, page_size, cursor, fields, validate)
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers)
+    
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    requested = None
+    columns = None
+    if fields:
+        if validate:
+            raise HTTPException(status_code=400, detail="fields and validate cannot be combined")
+        requested = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+        unknown = [field for field in requested if field not in BOOKING_COLUMNS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        # id y created_at siempre se leen: forman el next_cursor
+        columns = list(dict.fromkeys(requested + ["id", "created_at"]))
+    
+    # Se pide una fila extra para saber si existe una página siguiente
+    bookings_list = await booking_repo.list_for_user(
+        user_id,
+        status=status,
+        limit=page_size + 1,
+        offset=0 if after else (page - 1) * page_size,
+        after=after,
+        columns=columns,
+    )
+    
+    bookings_list, next_cursor = next_page(bookings_list, page_size)
+    
+    if validate:
+        # Ruta lenta: FastAPI serializa los modelos validados
+        response.headers.update(cache_headers)
+        return {
+            "bookings": [BookingResponse(**booking) for booking in bookings_list],
+            "next_cursor": next_cursor,
+        }
+    
+    if requested is not None and len(columns) > len(requested):
+        bookings_list = [{field: booking[field] for field in requested} for booking in bookings_list]
+    
+    return FastJSONResponse({"bookings": bookings_list, "next_cursor": next_cursor}, headers=cache_headers)
+
+# ==============================================================================
+# ENDPOINT 4: CREAR RESERVAS EN LOTE
+# ==============================================================================
+
+@router.post("/vlx/bookings:batch")
+async def create_bookings_batch(batch: BookingBatchCreate, user_id: int = Depends(get_current_user)):
+    """
+    Crea varias reservas (clientes corporativos / eventos) en una sola transacción.
+    
+    Todas las reservas se validan primero. Si alguna es inválida:
+    - `allow_partial: false` (default): no se inserta nada y se responde 422
+      con los errores de cada índice.
+    - `allow_partial: true`: se insertan las válidas y los errores vienen
+      en `errors`.
+    
+    **Uso:**
+    ```bash
+    curl -X POST http://192.168.1.43:3000/api/vlx/bookings:batch \
+      -H "Authorization: Bearer <TOKEN>" \
+      -H "Content-Type: application/json" \
+      -d '{
+        "allow_partial": true,
+        "bookings": [
+          {"pickup_address": "JFK Terminal 4", "destination_address": "Hilton Midtown",
+           "pickup_time": "2025-11-28T14:00:00Z", "price": 150.0},
+          {"pickup_address": "LGA Terminal B", "destination_address": "Hilton Midtown",
+           "pickup_time": "2025-11-28T15:30:00Z", "price": 120.0}
+        ]
+      }'
+    ```
+    """
+    if len(batch.bookings) > BATCH_MAX_BOOKINGS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch can contain at most {BATCH_MAX_BOOKINGS} bookings"
+        )
+    
+    valid = []
+    errors = []
+    for index, item in enumerate(batch.bookings):
+        try:
+            valid.append(BookingCreate(**item))
+        except ValidationError as e:
+            errors.append({"index": index, "errors": json.loads(e.json())})
+    
+    if errors and not batch.allow_partial:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": "Invalid bookings in batch", "errors": errors}
+        )
+    
+    if REPRICE_BOOKINGS:
+        apply_tariff(valid)
+    try:
+        created = await booking_repo.create_many(user_id, valid)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating bookings: {str(e)}"
+        )
+    
+    for booking_dict in created:
+        booking_events.publish_booking(booking_dict, "booking.created")
+    return {"bookings": created, "errors": errors}
+
+# ==============================================================================
+# ENDPOINT 5: INVALIDAR CACHE DE USUARIOS (ADMIN)
+# ==============================================================================
+
+@router.post("/vlx/admin/users/cache/invalidate")
+async def invalidate_user_cache(body: UserCacheInvalidation, admin = Depends(get_current_admin)):
+    """
+    Saca usuarios del cache en memoria después de modificarlos por fuera del
+    backend (scripts crear_usuario_*.py, cambios manuales en logistics.db).
+    
+    **Uso:**
+    ```bash
+    curl -X POST http://192.168.1.43:3000/api/vlx/admin/users/cache/invalidate \
+      -H "Authorization: Bearer <TOKEN_ADMIN>" \
+      -H "Content-Type: application/json" \
+      -d '{"email": "tumama@gmail.com"}'
+    ```
+    """
+    if body.user_id is None and not body.email and not body.username:
+        user_cache.clear()
+        return {"invalidated": "all"}
+    
+    removed = user_cache.invalidate(user_id=body.user_id, email=body.email, username=body.username)
+    return {"invalidated": removed}
+
+# ==============================================================================
+# ENDPOINT 6: EXPORTAR RESERVAS (ADMIN)
+# ==============================================================================
+
+@router.get("/vlx/admin/bookings/export")
+async def export_bookings(
+    format: str = "ndjson",
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    status: Optional[str] = None,
+    admin = Depends(get_current_admin)
+):
+    """
+    Exporta reservas (con el email del usuario) en streaming, NDJSON o CSV.
+    
+    - `date_from` / `date_to`: rango [desde, hasta) sobre created_at
+    - `status`: pending, confirmed, in_progress, completed, cancelled...
+    
+    La memoria del worker no crece con el tamaño de la tabla (ver vlx_export.py).
+    
+    **Uso:**
+    ```bash
+    curl "http://192.168.1.43:3000/api/vlx/admin/bookings/export?format=csv&date_from=2025-11-01&date_to=2025-12-01" \
+      -H "Authorization: Bearer <TOKEN_ADMIN>" -o reservas_noviembre.csv
+    ```
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    filename = f"vlx_bookings_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(
+        iter_bookings_export(DATABASE_PATH, format, date_from=date_from, date_to=date_to, status=status),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# ==============================================================================
+# ENDPOINT 7: STREAM DE CAMBIOS DE RESERVAS (SSE)
+# ==============================================================================
+
+@router.get("/vlx/bookings/stream")
+async def stream_bookings(
+    request: Request,
+    user_id: int = Depends(get_current_user),
+    last_event_id: Optional[int] = None
+):
+    """
+    Server-Sent Events con los cambios de reservas del usuario autenticado
+    (`booking.created`, `booking.updated`), en lugar de hacer polling del listado.
+    
+    - Publican las rutas de escritura (ENDPOINT 2, 4 y 14) y, para cambios
+      hechos por fuera de este proceso, `booking_feed` (VLX_BOOKING_FEED_SECONDS).
+    
+    - Heartbeat (`: heartbeat`) cada 15 s para mantener la conexión abierta.
+    - Reanudación: el header `Last-Event-ID` (o `?last_event_id=`) entrega
+      los eventos que el cliente se perdió mientras estuvo desconectado.
+    
+    **Uso:**
+    ```bash
+    curl -N http://192.168.1.43:3000/api/vlx/bookings/stream \
+      -H "Authorization: Bearer <TOKEN>"
+    ```
+    """
+    header = request.headers.get("last-event-id")
+    if header:
+        try:
+            last_event_id = int(header)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    
+    return StreamingResponse(
+        booking_events.stream(user_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# ==============================================================================
+# ENDPOINT 8: MÉTRICAS PROMETHEUS
+# ==============================================================================
+
+# Sin prefijo /api: Prometheus busca /metrics por defecto
+metrics_router = APIRouter(tags=["VaneLux"])
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    """
+    Histogramas en formato de texto de Prometheus: latencia por ruta y código
+    de estado, tiempo de SQL, de bcrypt (y su espera en cola) y de JWT.
+    p95/p99 por ruta con `histogram_quantile` (ver vlx_metrics.py). Además,
+    gauges de la cola de hashing (`vlx_hash_queue_depth`, `vlx_hash_inflight`)
+    y contadores del cache de tokens (`vlx_token_cache_hits_total`, ...).
+    
+    **Uso:**
+    ```bash
+    curl http://192.168.1.43:3000/metrics
+    ```
+    """
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+# ==============================================================================
+# ENDPOINT 9: CONSULTAS LENTAS (ADMIN)
+# ==============================================================================
+
+@router.get("/debug/slow-queries")
+async def slow_queries(limit: int = 20, admin = Depends(get_current_admin)):
+    """
+    Consultas que superaron VLX_SLOW_QUERY_MS: las más recientes y un resumen
+    por SQL normalizado (ordenado por tiempo total), cada una con su plan.
+    `full_scan: true` indica un `SCAN` sin índice: candidata a migración.
+    
+    **Uso:**
+    ```bash
+    curl "http://192.168.1.43:3000/api/debug/slow-queries?limit=10" \
+      -H "Authorization: Bearer <TOKEN_ADMIN>"
+    ```
+    """
+    if slow_query_log is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Slow query log disabled (VLX_SLOW_QUERY_MS=0)",
+        )
+    limit = max(1, min(limit, 200))
+    return {
+        "stats": slow_query_log.stats(),
+        "top": slow_query_log.top(limit),
+        "recent": list(slow_query_log.recent)[-limit:][::-1],
+    }
+
+# ==============================================================================
+# ENDPOINT 10: COTIZACIONES
+# ==============================================================================
+
+@router.post("/vlx/quotes")
+async def quote(request: QuoteRequest):
+    """
+    Cotiza uno o muchos viajes con las mismas reglas que PricingService de la
+    app: tipo de ruta y precio de los cinco tiers por viaje (vlx_pricing.py).
+    Con `vehicle_name` agrega `total_price` del tier de ese vehículo.
+    `pickup_zone` / `destination_zone` son la zona de cada punto (borough,
+    aeropuerto, Westchester, hub de NJ; ver vlx_zones.py) o null.
+    
+    **Uso:**
+    ```bash
+    curl -X POST http://192.168.1.43:3000/api/vlx/quotes \
+      -H "Content-Type: application/json" \
+      -d '{
+        "trips": [
+          {"pickup_lat": 40.758, "pickup_lng": -73.9855,
+           "destination_lat": 40.6413, "destination_lng": -73.7781,
+           "distance_miles": 15.2, "toll_cost": 6.94,
+           "vehicle_name": "Cadillac Escalade"}
+        ]
+      }'
+    ```
+    """
+    if len(request.trips) > QUOTE_MAX_TRIPS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A quote request can contain at most {QUOTE_MAX_TRIPS} trips"
+        )
+    trips = [dict(trip) for trip in request.trips]
+    quotes = quote_trips(trips)
+    pickup_zones = zone_keys([t["pickup_lat"] for t in trips], [t["pickup_lng"] for t in trips])
+    destination_zones = zone_keys([t["destination_lat"] for t in trips], [t["destination_lng"] for t in trips])
+    for quote, pickup_zone, destination_zone in zip(quotes, pickup_zones, destination_zones):
+        quote["pickup_zone"] = pickup_zone
+        quote["destination_zone"] = destination_zone
+    return FastJSONResponse(content={"quotes": quotes})
+
+@router.post("/vlx/quotes/matrix")
+async def quote_matrix(request: MatrixQuoteRequest, user_id: int = Depends(get_current_user)):
+    """
+    Cotiza todas las combinaciones recogida x destino (agenda de shuttles de
+    un evento, tarifario corporativo). Responde NDJSON en streaming: una
+    línea de encabezado y una línea por recogida con distancia, tipo de ruta
+    y precio por tier para cada destino (formato en vlx_quote_matrix.py).
+    
+    La distancia es en línea recta (haversine) x `road_factor`; para la
+    distancia real por calle se cotiza el viaje con /vlx/quotes.
+    
+    **Uso:**
+    ```bash
+    curl -X POST http://192.168.1.43:3000/api/vlx/quotes/matrix \
+      -H "Authorization: Bearer <TOKEN>" \
+      -H "Content-Type: application/json" \
+      -d '{
+        "pickups": [[40.758, -73.9855], [40.7527, -73.9772]],
+        "destinations": [[40.6413, -73.7781], [40.7769, -73.8740]],
+        "road_factor": 1.25,
+        "tiers": ["sedan", "escalade"]
+      }'
+    ```
+    """
+    sizes = (len(request.pickups), len(request.destinations))
+    if max(sizes) > MATRIX_MAX_POINTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MATRIX_MAX_POINTS} pickups and {MATRIX_MAX_POINTS} destinations per request"
+        )
+    if not math.isfinite(request.road_factor) or request.road_factor < 1.0:
+        raise HTTPException(status_code=400, detail="road_factor must be >= 1.0")
+    
+    # Se valida todo antes de responder: un error dentro del stream llegaría
+    # con un 200 ya enviado y la respuesta cortada
+    try:
+        lines = iter_matrix_ndjson(
+            request.pickups,
+            request.destinations,
+            multiplier=service_multiplier(request.service_type),
+            is_return_trip=request.is_return_trip,
+            road_factor=request.road_factor,
+            tiers=request.tiers,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+    )
+
+# ==============================================================================
+# ENDPOINT 11: DISTANCIA (PROXY CACHEADO DE GOOGLE DISTANCE MATRIX)
+# ==============================================================================
+
+@router.get("/vlx/distance")
+async def distance(origin: str, destination: str, departure_time: Optional[int] = None):
+    """
+    Distancia y duración entre dos puntos, con el mismo formato que
+    `getDistanceMatrix` de la app, pero detrás del cache de dos niveles
+    (memoria + SQLite) de vlx_distance_cache.py. `origin` / `destination`
+    como "lat,lng" (clave por geohash) o dirección de texto; `departure_time`
+    en segundos epoch para duración con tráfico.
+    
+    `source` indica de dónde salió: memory, sqlite o el proveedor.
+    
+    **Uso:**
+    ```bash
+    curl "http://192.168.1.43:3000/api/vlx/distance?origin=40.6413,-73.7781&destination=40.758,-73.9855"
+    ```
+    """
+    if distance_cache.provider is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Distance provider not configured (VLX_GOOGLE_MAPS_API_KEY)",
+        )
+    try:
+        value, source = await distance_cache.get(origin, destination, departure_time)
+    except DistanceNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No route found: {e}")
+    except DistanceProviderError as e:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+    return {**response_fields(value), "source": source}
+
+@router.get("/debug/distance-cache")
+async def distance_cache_stats(admin = Depends(get_current_admin)):
+    """
+    Aciertos por nivel, llamadas al proveedor (elementos pagados) y hit ratio
+    del cache de distancias.
+    
+    **Uso:**
+    ```bash
+    curl http://192.168.1.43:3000/api/debug/distance-cache \
+      -H "Authorization: Bearer <TOKEN_ADMIN>"
+    ```
+    """
+    return distance_cache.stats()
+
+# ==============================================================================
+# ENDPOINT 12: PEAJES (REEMPLAZO CACHEADO DE netlify/functions/tolls.js)
+# ==============================================================================
+
+@router.post("/tolls")
+async def tolls(request: Request):
+    """
+    Mismo contrato que la función de Netlify (`/api/tolls` en maps_proxy.js):
+    origin/destination (o from/to de TollGuru), serviceProvider,
+    vehicle.type, departureTime, waypoints y, opcional, la polyline de la
+    ruta. Si la tabla local de cruces (vlx_toll_table.py) puede tarifar la
+    ruta, responde sin llamar a TollGuru con `cache: "table"` y el detalle
+    en `crossings`. Si no, la respuesta sale del cache de vlx_tolls.py;
+    `cache` indica fresh, stale, revalidated, coalesced o miss, y
+    `stale: true` marca un valor vencido servido mientras TollGuru responde.
+    
+    **Uso:**
+    ```bash
+    curl -X POST http://192.168.1.43:3000/api/tolls \
+      -H "Content-Type: application/json" \
+      -d '{
+        "origin": "40.758,-73.9855",
+        "destination": "Newark Liberty International Airport",
+        "vehicle": {"type": "2AxlesAuto"},
+        "departureTime": "2025-11-28T14:00:00Z"
+      }'
+    ```
+    """
+    try:
+        body = await request.json()
+    except ValueError:
+        body = None
+    if not isinstance(body, dict):
+        return JSONResponse(status_code=400, content=unavailable("Invalid JSON body"))
+    try:
+        toll_request = TollRequest.from_payload(body)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content=unavailable(str(e)))
+    
+    if toll_model is not None:
+        estimate = toll_model.estimate(toll_request)
+        if estimate is not None:
+            return {**estimate, "cache": "table"}
+    
+    try:
+        result, cache_state = await toll_service.get(toll_request)
+    except TollProviderError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content=unavailable(str(e), status_code=e.status_code, error_code=e.error_code),
+        )
+    return {**result, "cache": cache_state}
+
+@router.get("/debug/tolls")
+async def toll_stats(admin = Depends(get_current_admin)):
+    """
+    Llamadas a TollGuru, llamadas evitadas (acierto o single-flight),
+    respuestas stale del cache de peajes y, en `table`, las rutas resueltas
+    por la tabla local de cruces.
+    
+    **Uso:**
+    ```bash
+    curl http://192.168.1.43:3000/api/debug/tolls \
+      -H "Authorization: Bearer <TOKEN_ADMIN>"
+    ```
+    """
+    stats = toll_service.stats()
+    if toll_model is not None:
+        stats["table"] = toll_model.stats()
+    return stats
+
+# ==============================================================================
+# ENDPOINT 13: UBICACIÓN DE CONDUCTORES Y CONDUCTORES CERCANOS
+# ==============================================================================
+
+def driver_location_fields(location, miles: Optional[float] = None) -> dict:
+    """DriverLocation -> JSON (segundos desde el último ping en vez del reloj interno)"""
+    fields = {
+        "driver_id": location.driver_id,
+        "lat": location.lat,
+        "lng": location.lng,
+        "tier": TIERS[location.tier],
+        "is_available": location.available,
+        "last_ping_seconds": round(driver_index.age(location), 1),
+    }
+    if miles is not None:
+        fields["distance_miles"] = round(miles, 2)
+    return fields
+
+@router.post("/vlx/drivers/location")
+async def driver_location(ping: DriverLocationPing, driver = Depends(get_current_driver)):
+    """
+    Ping de ubicación de la app de conductores (cada pocos segundos mientras
+    está en línea). El conductor es el usuario del token. Sin pings durante
+    VLX_DRIVER_TTL segundos deja de aparecer en /vlx/drivers/nearest.
+    
+    **Uso:**
+    ```bash
+    curl -X POST http://192.168.1.43:3000/api/vlx/drivers/location \
+      -H "Authorization: Bearer <TOKEN_CONDUCTOR>" \
+      -H "Content-Type: application/json" \
+      -d '{"lat": 40.7580, "lng": -73.9855, "vehicle_name": "Cadillac Escalade", "is_available": true}'
     ```
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    if ping.tier is not None and ping.tier not in TIERS:
+        raise HTTPException(status_code=400, detail=f"tier must be one of: {', '.join(TIERS)}")
+    if ping.tier is not None:
+        tier = TIERS.index(ping.tier)
+    elif ping.vehicle_name:
+        tier = vehicle_tier(ping.vehicle_name)
+    else:
+        tier = None
+    try:
+        location = driver_index.update(driver.id, ping.lat, ping.lng, tier=tier, available=ping.is_available)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return driver_location_fields(location)
+
+@router.delete("/vlx/drivers/location")
+async def driver_offline(driver = Depends(get_current_driver)):
+    """
+    El conductor se desconecta (fin de turno): sale del índice sin esperar
+    a que venza su último ping.
     
-    # Construir query con filtros
-    query = "SELECT * FROM vlx_bookings WHERE user_id = ?"
-    params = [user_id]
+    **Uso:**
+    ```bash
+    curl -X DELETE http://192.168.1.43:3000/api/vlx/drivers/location \
+      -H "Authorization: Bearer <TOKEN_CONDUCTOR>"
+    ```
+    """
+    return {"removed": driver_index.remove(driver.id)}
+
+@router.get("/vlx/drivers/nearest")
+async def nearest_drivers(
+    lat: float,
+    lng: float,
+    k: int = 5,
+    tier: Optional[str] = None,
+    radius_miles: Optional[float] = None,
+    include_unavailable: bool = False,
+    admin = Depends(get_current_admin)
+):
+    """
+    Los `k` conductores en línea más cercanos al punto (distancia en línea
+    recta), filtrados por tier y, salvo `include_unavailable`, solo los
+    disponibles. Sale del índice en memoria de vlx_drivers.py: no recorre
+    la lista de conductores.
     
-    if status:
-        query += " AND status = ?"
-        params.append(status)
+    **Uso:**
+    ```bash
+    curl "http://192.168.1.43:3000/api/vlx/drivers/nearest?lat=40.6413&lng=-73.7781&k=3&tier=escalade" \
+      -H "Authorization: Bearer <TOKEN_ADMIN>"
+    ```
+    """
+    if not 1 <= k <= DRIVER_MAX_K:
+        raise HTTPException(status_code=400, detail=f"k must be between 1 and {DRIVER_MAX_K}")
+    if tier is not None and tier not in TIERS:
+        raise HTTPException(status_code=400, detail=f"tier must be one of: {', '.join(TIERS)}")
+    # FastAPI acepta "nan" e "inf" como float: se rechazan antes del índice
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        raise HTTPException(status_code=400, detail="lat/lng must be finite coordinates in range")
+    if radius_miles is not None and not 0 < radius_miles <= DRIVER_RADIUS_MAX_MILES:
+        raise HTTPException(
+            status_code=400, detail=f"radius_miles must be > 0 and <= {DRIVER_RADIUS_MAX_MILES:g}"
+        )
     
-    query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
-    params.extend([page_size, (page - 1) * page_size])
+    try:
+        found = driver_index.nearest(
+            lat,
+            lng,
+            k=k,
+            tier=TIERS.index(tier) if tier is not None else None,
+            radius_miles=radius_miles or DRIVER_RADIUS_MILES,
+            available_only=not include_unavailable,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"drivers": [driver_location_fields(location, miles) for location, miles in found]}
+
+@router.get("/debug/drivers")
+async def driver_index_stats(admin = Depends(get_current_admin)):
+    """
+    Conductores en el índice, en línea y disponibles, celdas ocupadas y
+    celdas visitadas en promedio por consulta.
     
-    cursor.execute(query, params)
-    bookings = cursor.fetchall()
-    conn.close()
+    **Uso:**
+    ```bash
+    curl http://192.168.1.43:3000/api/debug/drivers \
+      -H "Authorization: Bearer <TOKEN_ADMIN>"
+    ```
+    """
+    return driver_index.stats()
+
+# ==============================================================================
+# ENDPOINT 14: CAMBIAR ESTADO DE RESERVA (ADMIN)
+# ==============================================================================
+
+@router.patch("/vlx/admin/bookings/{booking_id}/status")
+async def update_booking_status(booking_id: int, body: BookingStatusUpdate, admin = Depends(get_current_admin)):
+    """
+    Cambia el estado de una reserva (pending, confirmed, assigned,
+    in_progress, completed, cancelled) y publica `booking.updated` en el
+    stream del pasajero.
     
-    # Convertir a lista de diccionarios
-    bookings_list = [dict(booking) for booking in bookings]
+    **Uso:**
+    ```bash
+    curl -X PATCH http://192.168.1.43:3000/api/vlx/admin/bookings/42/status \
+      -H "Authorization: Bearer <TOKEN_ADMIN>" \
+      -H "Content-Type: application/json" \
+      -d '{"status": "confirmed"}'
+    ```
+    """
+    try:
+        booking_dict = await booking_repo.update_status(booking_id, body.status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if booking_dict is None:
+        raise HTTPException(status_code=404, detail="Booking not found")
     
-    return {"bookings": bookings_list}
+    booking_events.publish_booking(booking_dict, "booking.updated")
+    return {"booking": booking_dict}
 
 # ==============================================================================
 # INSTRUCCIONES DE INSTALACIÓN
 # ==============================================================================
 
-"""
+r"""
 CÓMO AGREGAR ESTOS ENDPOINTS AL BACKEND:
 
 1. Abrir el archivo principal del backend (main.py o app.py):
    📁 C:\Users\elkin\OneDrive\Desktop\app de prueba\main.py
 
 2. Instalar dependencias necesarias (si no están):
-   pip install python-jose[cryptography] passlib[bcrypt] python-multipart
+   pip install python-jose[cryptography] passlib[bcrypt] python-multipart numpy
 
-3. Copiar el código de este archivo al main.py
+3. Copiar el código de este archivo al main.py, y los módulos vlx_*.py
+   a la misma carpeta (pool de conexiones, migraciones y paginación)
 
 4. Registrar el router en la app principal:
    
    app = FastAPI()
    app.include_router(router)
+   app.include_router(metrics_router)
+   app.add_middleware(MetricsMiddleware, metrics=metrics)
 
 5. Reiniciar el servidor:
    cd "C:\Users\elkin\OneDrive\Desktop\app de prueba"
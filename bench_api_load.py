@@ -0,0 +1,305 @@
+"""
+PRUEBA DE CARGA REPRODUCIBLE DE LA API DE RESERVAS
+==================================================
+
+test_backend_completo.py hace una verificación funcional contra la IP de la
+LAN. Este script mide carga, sin red ni datos reales:
+
+1. Crea una base SQLite temporal (esquema + migraciones) con `--users`
+   usuarios y `--bookings-per-user` reservas cada uno.
+2. Levanta el router de BACKEND_ENDPOINTS_IMPLEMENTACION.py en uvicorn, en
+   otro proceso y con la base temporal como directorio de trabajo, así el
+   generador de carga no compite por el mismo event loop.
+3. Cada usuario virtual hace login y luego ejecuta la mezcla de operaciones
+   (`--mix login=1,create=3,list=6`) a su parte de `--rps`. La latencia se
+   mide desde el instante programado (lazo abierto): si el servidor se
+   atrasa, el atraso aparece en los percentiles en vez de bajar la carga.
+4. Reporta throughput, tasa de error y p50/p90/p95/p99 por operación, como
+   tabla y opcionalmente como JSON (`--json resultado.json`) para comparar
+   versiones en la misma máquina.
+
+Requiere uvicorn y httpx (pip install uvicorn httpx).
+
+Uso:
+    python bench_api_load.py --users 50 --rps 200 --duration 30
+    python bench_api_load.py --mix login=0,create=1,list=9 --json carga.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from passlib.context import CryptContext
+
+from vlx_migrations import create_schema
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+PASSWORD = "carga123"
+OPERATIONS = ("login", "create", "list")
+
+BOOKING = {
+    "pickup_address": "JFK Terminal 4",
+    "pickup_lat": 40.6413,
+    "pickup_lng": -73.7781,
+    "destination_address": "Times Square, New York",
+    "destination_lat": 40.758,
+    "destination_lng": -73.9855,
+    "pickup_time": "2025-11-28T14:00:00Z",
+    "vehicle_name": "Mercedes-Benz S-Class",
+    "passengers": 2,
+    "price": 150.5,
+    "distance_miles": 15.2,
+    "distance_text": "15.2 mi",
+    "duration_text": "45 min",
+    "service_type": "luxury",
+    "is_scheduled": True,
+}
+
+
+def create_app():
+    """App FastAPI para uvicorn --factory (se importa en el proceso servidor)"""
+    from fastapi import FastAPI
+    from BACKEND_ENDPOINTS_IMPLEMENTACION import router, metrics_router, metrics
+    from vlx_metrics import MetricsMiddleware
+
+    app = FastAPI()
+    app.include_router(router)
+    app.include_router(metrics_router)
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+    return app
+
+
+# ==============================================================================
+# BASE TEMPORAL
+# ==============================================================================
+
+def seed_database(path, users, bookings_per_user, bcrypt_rounds):
+    """Usuarios carga_N@vanelux.com con la misma contraseña y reservas previas"""
+    # Un solo hash para todos: generar uno por usuario tardaría minutos
+    hashed = CryptContext(schemes=["bcrypt"], bcrypt__rounds=bcrypt_rounds).hash(PASSWORD)
+    conn = sqlite3.connect(path)
+    create_schema(conn)
+    conn.executemany(
+        "INSERT INTO users (username, email, password_hash, roles, allowed_apps, status) "
+        "VALUES (?, ?, ?, '[\"client\"]', '[\"vanelux\"]', 'active')",
+        [(f"carga_{i}", f"carga_{i}@vanelux.com", hashed) for i in range(1, users + 1)],
+    )
+    columns = list(BOOKING)
+    conn.executemany(
+        f"INSERT INTO vlx_bookings (user_id, {', '.join(columns)}) "
+        f"VALUES (?, {', '.join('?' * len(columns))})",
+        [
+            [user_id] + [BOOKING[column] for column in columns]
+            for user_id in range(1, users + 1)
+            for _ in range(bookings_per_user)
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workdir, port, workers):
+    env = dict(os.environ, PYTHONPATH=REPO_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "bench_api_load:create_app", "--factory",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=workdir,  # DATABASE_PATH = "logistics.db" relativo: queda la base temporal
+        env=env,
+    )
+
+
+async def wait_ready(base_url, process, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError("uvicorn terminó antes de aceptar conexiones")
+            try:
+                if (await client.get(base_url + "/metrics")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"uvicorn no respondió en {timeout}s")
+
+
+# ==============================================================================
+# USUARIOS VIRTUALES
+# ==============================================================================
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def login(client, user_number):
+    response = await client.post(
+        "/api/auth/login",
+        json={"username": f"carga_{user_number}@vanelux.com", "password": PASSWORD, "app": "vanelux"},
+    )
+    return response
+
+
+async def virtual_user(client, user_number, rate, mix, stop_at, samples, seed):
+    rng = random.Random(seed * 100003 + user_number)
+    response = await login(client, user_number)
+    response.raise_for_status()
+    headers = {"Authorization": "Bearer " + response.json()["access_token"]}
+
+    operations = [op for op, weight in mix.items() if weight > 0]
+    weights = [mix[op] for op in operations]
+    interval = 1.0 / rate
+    # Arranque escalonado para no disparar todos los usuarios en el mismo instante
+    scheduled = time.perf_counter() + rng.random() * interval
+
+    while scheduled < stop_at:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        op = rng.choices(operations, weights)[0]
+        try:
+            if op == "login":
+                response = await login(client, user_number)
+            elif op == "create":
+                response = await client.post("/api/vlx/bookings", json=BOOKING, headers=headers)
+            else:
+                response = await client.get("/api/vlx/bookings", params={"page_size": 20}, headers=headers)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        samples[op].append(((time.perf_counter() - scheduled) * 1000, ok))
+        scheduled += interval
+
+
+def summarize(samples, elapsed):
+    report = {}
+    every = []
+    for op in OPERATIONS:
+        values = samples[op]
+        if not values:
+            continue
+        every.extend(values)
+        report[op] = _summary(values, elapsed)
+    report["total"] = _summary(every, elapsed)
+    return report
+
+
+def _summary(values, elapsed):
+    latencies = [latency for latency, _ in values]
+    errors = sum(1 for _, ok in values if not ok)
+    return {
+        "requests": len(values),
+        "rps": len(values) / elapsed,
+        "error_rate": errors / len(values),
+        "p50_ms": percentile(latencies, 50),
+        "p90_ms": percentile(latencies, 90),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies),
+    }
+
+
+async def run_load(base_url, users, rps, duration, mix, seed):
+    samples = {op: [] for op in OPERATIONS}
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        stop_at = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            virtual_user(client, number, rps / users, mix, stop_at, samples, seed)
+            for number in range(1, users + 1)
+        ])
+        elapsed = time.perf_counter() - started
+    return summarize(samples, elapsed)
+
+
+def parse_mix(text):
+    mix = {op: 0.0 for op in OPERATIONS}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in mix:
+            raise argparse.ArgumentTypeError(f"operación desconocida: {name}")
+        mix[name.strip()] = float(weight)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("la mezcla no tiene operaciones")
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga offline de la API de reservas")
+    parser.add_argument("--users", type=int, default=50, help="usuarios virtuales")
+    parser.add_argument("--rps", type=float, default=100.0, help="requests/s objetivo (total)")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("login=1,create=3,list=6"))
+    parser.add_argument("--bookings-per-user", type=int, default=50)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="costo del hash sembrado")
+    parser.add_argument("--workers", type=int, default=1, help="workers de uvicorn")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="ARCHIVO", help="guardar el resultado en JSON ('-' = stdout)")
+    parser.add_argument("--keep", action="store_true", help="no borrar la base temporal")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="vlx_load_")
+    seed_database(os.path.join(workdir, "logistics.db"), args.users, args.bookings_per_user, args.bcrypt_rounds)
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(workdir, port, args.workers)
+    try:
+        asyncio.run(wait_ready(base_url, server))
+        report = asyncio.run(run_load(base_url, args.users, args.rps, args.duration, args.mix, args.seed))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        "config": {
+            "users": args.users, "rps": args.rps, "duration": args.duration,
+            "mix": args.mix, "workers": args.workers, "seed": args.seed,
+            "bookings_per_user": args.bookings_per_user, "bcrypt_rounds": args.bcrypt_rounds,
+        },
+        "results": report,
+    }
+
+    print(f"{args.users} usuarios, objetivo {args.rps:.0f} req/s, {args.duration:.0f}s\n")
+    print(f"{'operación':>10} {'req':>7} {'req/s':>8} {'error %':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    print("-" * 72)
+    for op, row in report.items():
+        print(
+            f"{op:>10} {row['requests']:>7} {row['rps']:>8.1f} {row['error_rate'] * 100:>8.2f} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}"
+        )
+
+    if args.json == "-":
+        print(json.dumps(result, indent=2))
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nResultado guardado en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+BENCHMARK: THROUGHPUT DE CONSULTAS CON CLIENTES CONCURRENTES
+============================================================
+
+Compara dos formas de ejecutar el listado de reservas desde handlers async:
+- blocking:   sqlite3 directo en el event loop (comportamiento anterior)
+- repository: BookingRepository sobre AsyncDatabase (hilos + pool)
+
+Con "blocking" el throughput queda fijo en lo que da un solo hilo, sin
+importar cuántos clientes haya; con "repository" las lecturas corren en
+paralelo (WAL + GIL liberado por sqlite3) y escala con la concurrencia.
+
+Se usa una base temporal con datos sintéticos; no toca logistics.db.
+
+Uso:
+    python bench_db_concurrency.py --clients 1,4,16,64 --duration 3
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from vlx_db_pool import SQLitePool, connect
+from vlx_migrations import create_schema
+from vlx_repository import AsyncDatabase, BookingRepository
+
+USERS = 200
+BOOKINGS_PER_USER = 500
+
+
+def seed(path):
+    conn = sqlite3.connect(path)
+    create_schema(conn)
+    conn.executemany(
+        "INSERT INTO users (username, email, password_hash, roles, allowed_apps) VALUES (?, ?, 'x', '[]', '[\"vanelux\"]')",
+        [(f"user{i}", f"user{i}@vanelux.com") for i in range(USERS)],
+    )
+    rng = random.Random(7)
+    statuses = ["pending", "confirmed", "assigned", "completed", "cancelled"]
+    rows = []
+    for user_id in range(1, USERS + 1):
+        for n in range(BOOKINGS_PER_USER):
+            created = f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{n % 60:02d}:00"
+            rows.append((user_id, "JFK Terminal 4", "Times Square", created, 95.0, rng.choice(statuses), created, created))
+    conn.executemany(
+        """INSERT INTO vlx_bookings (user_id, pickup_address, destination_address, pickup_time, price, status, created_at, updated_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+
+
+def list_blocking(conn, user_id, offset):
+    rows = conn.execute(
+        "SELECT * FROM vlx_bookings WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT 50 OFFSET ?",
+        (user_id, offset),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+async def client(mode, conn, repo, stop, counter, rng):
+    while not stop.is_set():
+        user_id = rng.randint(1, USERS)
+        offset = rng.randint(0, BOOKINGS_PER_USER - 50)
+        if mode == "blocking":
+            list_blocking(conn, user_id, offset)
+            await asyncio.sleep(0)
+        else:
+            await repo.list_for_user(user_id, limit=50, offset=offset)
+        counter[0] += 1
+
+
+async def run(mode, clients, duration, path, pool_size):
+    pool = SQLitePool(path, size=pool_size)
+    db = AsyncDatabase(pool)
+    repo = BookingRepository(db)
+    conn = connect(path)
+    stop = asyncio.Event()
+    counter = [0]
+
+    tasks = [
+        asyncio.create_task(client(mode, conn, repo, stop, counter, random.Random(i)))
+        for i in range(clients)
+    ]
+    started = time.perf_counter()
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    conn.close()
+    db.close()
+    pool.close()
+    return counter[0] / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput con clientes concurrentes")
+    parser.add_argument("--clients", default="1,4,16,64")
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--pool-size", type=int, default=8)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="vlx_bench_")
+    path = os.path.join(tmpdir, "bench.db")
+    print(f"🔧 Generando {USERS * BOOKINGS_PER_USER:,} reservas en {path}...")
+    seed(path)
+
+    print(f"\n{'clientes':>9} {'blocking req/s':>16} {'repository req/s':>18}")
+    print("-" * 46)
+    for clients in [int(c) for c in args.clients.split(",")]:
+        blocking = asyncio.run(run("blocking", clients, args.duration, path, args.pool_size))
+        repository = asyncio.run(run("repository", clients, args.duration, path, args.pool_size))
+        print(f"{clients:>9} {blocking:>16,.0f} {repository:>18,.0f}")
+
+
+if __name__ == "__main__":
+    main()
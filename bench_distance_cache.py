@@ -0,0 +1,146 @@
+"""
+BENCHMARK: HIT RATIO DEL CACHE DE DISTANCIAS
+============================================
+
+Simula el tráfico de cotizaciones contra vlx_distance_cache con
+FakeDistanceProvider (latencia de Google simulada, 200-600 ms por defecto):
+
+- `--places` lugares (aeropuertos, hoteles de Midtown, direcciones
+  sueltas) con popularidad Zipf: unos pocos trayectos se repiten miles de
+  veces, como JFK -> Midtown.
+- Cada request mueve origen y destino unos metros (ruido de GPS / pin del
+  mapa), así que solo acierta si cae en la misma celda geohash.
+- La mitad de las cotizaciones trae hora de salida (bucket horario).
+
+Por cada precisión de geohash reporta elementos pagados, hit ratio y
+latencia; luego "reinicia" el proceso (cache en memoria vacío, misma tabla
+SQLite) y repite el tráfico para medir el segundo nivel.
+
+Uso:
+    python bench_distance_cache.py --requests 5000 --concurrency 50
+    python bench_distance_cache.py --precision 6,7,8 --latency 0,0
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from vlx_db_pool import SQLitePool
+from vlx_distance_cache import DistanceCache, FakeDistanceProvider
+from vlx_migrations import create_schema
+from vlx_repository import AsyncDatabase
+
+HOTSPOTS = [
+    (40.6413, -73.7781),  # JFK
+    (40.7769, -73.8740),  # LGA
+    (40.6895, -74.1745),  # EWR
+    (40.7580, -73.9855),  # Times Square
+    (40.7527, -73.9772),  # Grand Central
+    (40.7614, -73.9776),  # MoMA / hoteles de Midtown
+    (40.7128, -74.0060),  # Lower Manhattan
+]
+
+
+def make_places(count, rng):
+    places = list(HOTSPOTS)
+    while len(places) < count:
+        base = rng.choice(HOTSPOTS[3:])
+        places.append((base[0] + rng.uniform(-0.08, 0.08), base[1] + rng.uniform(-0.08, 0.08)))
+    return places
+
+
+def make_requests(count, places, rng, jitter_m):
+    weights = [1 / (rank + 1) for rank in range(len(places))]
+    day = 1_767_225_600  # 2026-01-01 00:00 UTC
+    jitter_deg = jitter_m / 111_000
+    requests = []
+    for _ in range(count):
+        a, b = rng.choices(places, weights, k=2)
+        if a == b:
+            continue
+        origin = f"{a[0] + rng.uniform(-jitter_deg, jitter_deg):.6f},{a[1] + rng.uniform(-jitter_deg, jitter_deg):.6f}"
+        destination = f"{b[0] + rng.uniform(-jitter_deg, jitter_deg):.6f},{b[1] + rng.uniform(-jitter_deg, jitter_deg):.6f}"
+        departure = day + rng.randrange(24 * 3600) if rng.random() < 0.5 else None
+        requests.append((origin, destination, departure))
+    return requests
+
+
+async def replay(cache, requests, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(origin, destination, departure):
+        async with semaphore:
+            started = time.perf_counter()
+            await cache.get(origin, destination, departure)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(*request) for request in requests])
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[int(len(latencies) * 0.95)],
+        "elapsed": elapsed,
+    }
+
+
+async def run_precision(precision, requests, args):
+    workdir = tempfile.mkdtemp(prefix="vlx_distance_")
+    path = os.path.join(workdir, "logistics.db")
+    conn = sqlite3.connect(path)
+    create_schema(conn)
+    conn.close()
+    pool = SQLitePool(path, size=4)
+    db = AsyncDatabase(pool)
+    try:
+        rows = []
+        for phase in ("frío", "reinicio"):
+            provider = FakeDistanceProvider(latency=args.latency)
+            cache = DistanceCache(provider, db=db, precision=precision)
+            timing = await replay(cache, requests, args.concurrency)
+            stats = cache.stats()
+            rows.append((phase, stats, timing))
+        return rows
+    finally:
+        db.close()
+        pool.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hit ratio del cache de distancias con un proveedor simulado")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--places", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--jitter", type=float, default=25.0, help="metros de ruido por punto")
+    parser.add_argument("--precision", default="6,7,8", help="precisiones de geohash a comparar")
+    parser.add_argument("--latency", default="0.2,0.6", help="latencia simulada del proveedor (s): min,max")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    args.latency = tuple(float(value) for value in args.latency.split(","))
+
+    rng = random.Random(args.seed)
+    requests = make_requests(args.requests, make_places(args.places, rng), rng, args.jitter)
+    print(f"{len(requests):,} cotizaciones, {args.places} lugares, ruido ±{args.jitter:.0f} m, "
+          f"latencia {args.latency[0] * 1000:.0f}-{args.latency[1] * 1000:.0f} ms\n")
+    print(f"{'geohash':>7} {'fase':>9} {'pagados':>8} {'memoria':>8} {'sqlite':>7} {'unidos':>7} "
+          f"{'hit %':>6} {'p50 ms':>8} {'p95 ms':>8}")
+    print("-" * 80)
+    for precision in [int(value) for value in args.precision.split(",")]:
+        for phase, stats, timing in asyncio.run(run_precision(precision, requests, args)):
+            print(
+                f"{precision:>7} {phase:>9} {stats['provider_calls']:>8} {stats['memory_hits']:>8} "
+                f"{stats['sqlite_hits']:>7} {stats['coalesced']:>7} {stats['hit_ratio'] * 100:>6.1f} "
+                f"{timing['p50']:>8.2f} {timing['p95']:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
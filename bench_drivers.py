@@ -0,0 +1,124 @@
+"""
+BENCHMARK: CONDUCTORES MÁS CERCANOS CON vlx_drivers
+===================================================
+
+Carga `--drivers` conductores en línea (concentrados en Manhattan y los
+aeropuertos, como en un turno real, con tiers y disponibilidad al azar),
+los mueve con pings y mide `DriverIndex.nearest` contra un recorrido
+completo de todos los conductores (lo que costaría asignar con la lista de
+getAvailableDrivers):
+
+- pings/s: actualizaciones de posición por segundo.
+- µs por consulta (p50 / p95) sin filtro de tier y con un tier al azar.
+- celdas visitadas por consulta y diferencias con el recorrido completo
+  (deben ser 0: mismo conjunto de k conductores).
+
+Uso:
+    python bench_drivers.py --drivers 1000,5000,20000 --queries 2000 --k 5
+"""
+
+import argparse
+import random
+import time
+
+from vlx_drivers import DriverIndex, distance_miles
+from vlx_pricing import TIERS
+
+HOTSPOTS = [
+    (40.7580, -73.9855, 0.030, 5),  # Midtown
+    (40.7128, -74.0060, 0.020, 2),  # Lower Manhattan
+    (40.6413, -73.7781, 0.015, 2),  # JFK
+    (40.7769, -73.8740, 0.010, 1),  # LGA
+    (40.6895, -74.1745, 0.012, 1),  # EWR
+    (40.7000, -73.9000, 0.150, 3),  # resto de la ciudad
+]
+TIER_WEIGHTS = (5, 3, 2, 1, 0.3)
+
+
+def random_point(rng):
+    lat, lng, spread, _ = rng.choices(HOTSPOTS, [spot[3] for spot in HOTSPOTS])[0]
+    return lat + rng.gauss(0, spread), lng + rng.gauss(0, spread)
+
+
+def brute_force(index, lat, lng, k, tier, radius):
+    """Recorre todos los conductores (mismos filtros que nearest)"""
+    candidates = []
+    for location in list(index._drivers.values()):
+        if not location.available or (tier is not None and location.tier != tier):
+            continue
+        miles = distance_miles(lat, lng, location.lat, location.lng)
+        if miles <= radius:
+            candidates.append((miles, location.driver_id))
+    candidates.sort()
+    return [driver_id for _, driver_id in candidates[:k]]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(count, args, rng):
+    index = DriverIndex()
+    for driver_id in range(count):
+        lat, lng = random_point(rng)
+        tier = rng.choices(range(len(TIERS)), TIER_WEIGHTS)[0]
+        index.update(driver_id, lat, lng, tier=tier, available=rng.random() < 0.7)
+
+    # Pings: cada conductor se mueve unos metros
+    moves = [(rng.randrange(count), rng.gauss(0, 0.002), rng.gauss(0, 0.002)) for _ in range(args.pings)]
+    started = time.perf_counter()
+    for driver_id, d_lat, d_lng in moves:
+        location = index.get(driver_id)
+        index.update(driver_id, location.lat + d_lat, location.lng + d_lng)
+    pings_per_second = len(moves) / (time.perf_counter() - started)
+
+    rows = []
+    for label, pick_tier in (("todos", False), ("por tier", True)):
+        grid_us, brute_us, mismatches = [], [], 0
+        visited_before, queries_before = index.cells_visited, index.queries
+        for _ in range(args.queries):
+            lat, lng = random_point(rng)
+            tier = rng.randrange(len(TIERS)) if pick_tier else None
+
+            started = time.perf_counter()
+            found = index.nearest(lat, lng, k=args.k, tier=tier, radius_miles=args.radius)
+            grid_us.append((time.perf_counter() - started) * 1e6)
+
+            started = time.perf_counter()
+            expected = brute_force(index, lat, lng, args.k, tier, args.radius)
+            brute_us.append((time.perf_counter() - started) * 1e6)
+
+            if sorted(location.driver_id for location, _ in found) != sorted(expected):
+                mismatches += 1
+        cells = (index.cells_visited - visited_before) / (index.queries - queries_before)
+        rows.append((label, grid_us, brute_us, cells, mismatches))
+    return pings_per_second, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas de conductores cercanos: grilla vs recorrido completo")
+    parser.add_argument("--drivers", default="1000,5000,20000", help="cantidades de conductores a comparar")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--pings", type=int, default=50000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--radius", type=float, default=15.0, help="radio de búsqueda en millas")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"k={args.k}, radio {args.radius:.0f} mi, {args.queries} consultas por fila\n")
+    print(f"{'conductores':>11} {'pings/s':>9} {'filtro':>9} {'p50 µs':>8} {'p95 µs':>8} "
+          f"{'celdas':>7} {'scan p50 µs':>12} {'difs':>5}")
+    print("-" * 78)
+    for count in [int(value) for value in args.drivers.split(",")]:
+        pings_per_second, rows = run(count, args, rng)
+        for label, grid_us, brute_us, cells, mismatches in rows:
+            print(
+                f"{count:>11,} {pings_per_second:>9,.0f} {label:>9} {percentile(grid_us, 0.5):>8.1f} "
+                f"{percentile(grid_us, 0.95):>8.1f} {cells:>7.1f} {percentile(brute_us, 0.5):>12.1f} {mismatches:>5}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+BENCHMARK: INSERTS/SEGUNDO CON Y SIN GROUP COMMIT
+=================================================
+
+N clientes concurrentes crean reservas sin parar durante `--duration`:
+- single: una transacción por reserva (BookingRepository sobre AsyncDatabase)
+- group:  GroupCommitWriter, reservas que llegan juntas comparten COMMIT
+
+Con `--synchronous FULL` cada COMMIT hace fsync y la diferencia crece.
+Se usa una base temporal; no toca logistics.db.
+
+Uso:
+    python bench_group_commit.py --clients 1,8,32 --duration 3 --window-ms 2
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+from types import SimpleNamespace
+
+from vlx_db_pool import DEFAULT_PRAGMAS, SQLitePool
+from vlx_group_commit import GroupCommitWriter
+from vlx_migrations import create_schema
+from vlx_repository import AsyncDatabase, BookingRepository
+
+BOOKING = SimpleNamespace(
+    pickup_address="JFK Terminal 4",
+    pickup_lat=40.6413,
+    pickup_lng=-73.7781,
+    destination_address="Times Square, New York",
+    destination_lat=40.758,
+    destination_lng=-73.9855,
+    pickup_time="2025-11-28T14:00:00Z",
+    vehicle_name="Mercedes-Benz S-Class",
+    passengers=2,
+    price=150.5,
+    distance_miles=15.2,
+    distance_text="15.2 mi",
+    duration_text="45 min",
+    service_type="luxury",
+    is_scheduled=True,
+)
+
+
+async def client(repo, stop, counter):
+    while not stop.is_set():
+        await repo.create(1, BOOKING)
+        counter[0] += 1
+
+
+async def run(mode, clients, duration, path, window_ms, pragmas):
+    pool = SQLitePool(path, size=8, pragmas=pragmas)
+    db = AsyncDatabase(pool)
+    writer = GroupCommitWriter(path, window_ms=window_ms, pragmas=pragmas) if mode == "group" else None
+    repo = BookingRepository(db, writer=writer)
+    stop = asyncio.Event()
+    counter = [0]
+
+    tasks = [asyncio.create_task(client(repo, stop, counter)) for _ in range(clients)]
+    started = time.perf_counter()
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    stats = writer.stats() if writer else None
+    if writer:
+        writer.close()
+    db.close()
+    pool.close()
+    return counter[0] / elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inserts/s con y sin group commit")
+    parser.add_argument("--clients", default="1,8,32")
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--synchronous", default="NORMAL", choices=["OFF", "NORMAL", "FULL"])
+    args = parser.parse_args()
+
+    pragmas = tuple(
+        (name, args.synchronous if name == "synchronous" else value)
+        for name, value in DEFAULT_PRAGMAS
+    )
+
+    tmpdir = tempfile.mkdtemp(prefix="vlx_bench_")
+    print(f"synchronous={args.synchronous}, ventana={args.window_ms} ms\n")
+    print(f"{'clientes':>9} {'single ins/s':>14} {'group ins/s':>13} {'lote prom.':>11}")
+    print("-" * 50)
+    for clients in [int(c) for c in args.clients.split(",")]:
+        results = {}
+        for mode in ("single", "group"):
+            path = os.path.join(tmpdir, f"{mode}_{clients}.db")
+            conn = sqlite3.connect(path)
+            create_schema(conn)
+            conn.execute("INSERT INTO users (username, email, password_hash) VALUES ('bench', 'bench@vanelux.com', 'x')")
+            conn.commit()
+            conn.close()
+            results[mode] = asyncio.run(run(mode, clients, args.duration, path, args.window_ms, pragmas))
+        single, _ = results["single"]
+        group, stats = results["group"]
+        print(f"{clients:>9} {single:>14,.0f} {group:>13,.0f} {stats['avg_batch']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
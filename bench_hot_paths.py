@@ -0,0 +1,201 @@
+"""
+MICRO-BENCHMARKS DE LAS FUNCIONES CALIENTES DEL BACKEND
+=======================================================
+
+Mide con el mismo método (calibración de loops + repeticiones, estilo
+timeit) las funciones que corren en cada request de
+BACKEND_ENDPOINTS_IMPLEMENTACION.py:
+
+- create_access_token / decode_token (acierto y fallo de token_cache)
+- verify_password (bcrypt con el costo por defecto de passlib)
+- dict(row) y rows_to_dicts sobre una página de 50 reservas
+- JSON de una página de 50 reservas: json.dumps, orjson y FastJSONResponse
+
+Los resultados se guardan como baseline JSON y `--compare` marca como
+regresión todo caso cuya mediana empeore más de `--threshold` %, con código
+de salida 1 (para correrlo antes de mergear un cambio de rendimiento).
+
+Se ejecuta en el entorno del backend (fastapi, passlib, PyJWT).
+
+Uso:
+    python bench_hot_paths.py --save baseline.json
+    python bench_hot_paths.py --compare baseline.json --threshold 10
+    python bench_hot_paths.py --only token,json
+"""
+
+import argparse
+import json
+import platform
+import sqlite3
+import statistics
+import sys
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+import BACKEND_ENDPOINTS_IMPLEMENTACION as backend
+from vlx_migrations import create_schema
+from vlx_repository import rows_to_dicts
+
+PAGE_SIZE = 50
+PASSWORD = "chila123"
+
+
+# ==============================================================================
+# CASOS
+# ==============================================================================
+
+def booking_page_rows(size=PAGE_SIZE):
+    """Página de reservas tal como la devuelve sqlite3 (filas sqlite3.Row)"""
+    conn = sqlite3.connect(":memory:")
+    create_schema(conn)
+    conn.executemany(
+        """
+        INSERT INTO vlx_bookings (
+            user_id, pickup_address, pickup_lat, pickup_lng, destination_address,
+            destination_lat, destination_lng, pickup_time, vehicle_name, passengers,
+            price, distance_miles, distance_text, duration_text, service_type, is_scheduled
+        ) VALUES (1, ?, 40.6413, -73.7781, ?, 40.758, -73.9855, '2025-11-28T14:00:00Z',
+                  'Mercedes-Benz S-Class', 2, ?, 15.2, '15.2 mi', '45 min', 'luxury', 1)
+        """,
+        [(f"JFK Terminal {i % 8 + 1}, Queens, NY 11430", f"{100 + i} W 57th St, New York, NY 10019", 150.5 + i)
+         for i in range(size)],
+    )
+    conn.row_factory = sqlite3.Row
+    cursor = conn.execute("SELECT * FROM vlx_bookings ORDER BY created_at DESC, id DESC")
+    rows = cursor.fetchall()
+    return conn, cursor, rows
+
+
+def build_cases():
+    """nombre -> función sin argumentos; el setup se hace una sola vez aquí"""
+    token = backend.create_access_token({"user_id": 1, "email": "chilaelkin4@gmail.com", "username": "chila"})
+    hashed = backend.pwd_context.hash(PASSWORD)
+    _conn, cursor, rows = booking_page_rows()
+    page = {"bookings": [dict(row) for row in rows], "next_cursor": "eyJpZCI6MX0"}
+
+    def decode_token_miss():
+        backend.token_cache.clear()
+        return backend.decode_token(token)
+
+    backend.decode_token(token)  # deja el token en cache para el caso "hit"
+
+    cases = {
+        "token.create_access_token": lambda: backend.create_access_token(
+            {"user_id": 1, "email": "chilaelkin4@gmail.com", "username": "chila"}
+        ),
+        "token.decode_token_hit": lambda: backend.decode_token(token),
+        "token.decode_token_miss": decode_token_miss,
+        "password.verify_password": lambda: backend.verify_password(PASSWORD, hashed),
+        "rows.dict_row_page": lambda: [dict(row) for row in rows],
+        "rows.rows_to_dicts_page": lambda: rows_to_dicts(cursor, rows),
+        "json.stdlib_page": lambda: json.dumps(page).encode("utf-8"),
+        "json.response_page": lambda: backend.FastJSONResponse(content=page).body,
+    }
+    if orjson is not None:
+        cases["json.orjson_page"] = lambda: orjson.dumps(page)
+    return cases
+
+
+# ==============================================================================
+# MEDICIÓN
+# ==============================================================================
+
+def measure(fn, repeats, target):
+    """Microsegundos por llamada: mediana y mínimo de `repeats` tandas de ~`target` s"""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= target / 5 or loops >= 1_000_000:
+            break
+        loops *= 10
+    loops = max(1, int(loops * target / max(elapsed, 1e-9)))
+
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        timings.append((time.perf_counter() - started) / loops * 1e6)
+    return {
+        "median_us": statistics.median(timings),
+        "min_us": min(timings),
+        "loops": loops,
+        "repeats": repeats,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Imprime la comparación y devuelve los casos que empeoraron más de `threshold` %"""
+    regressions = []
+    print(f"\n{'caso':32} {'base µs':>12} {'actual µs':>12} {'cambio':>9}")
+    print("-" * 68)
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:32} {'-':>12} {current['median_us']:>12.2f} {'nuevo':>9}")
+            continue
+        change = (current["median_us"] / previous["median_us"] - 1) * 100
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  ❌ regresión"
+        print(f"{name:32} {previous['median_us']:>12.2f} {current['median_us']:>12.2f} {change:>+8.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de las funciones calientes del backend")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--target", type=float, default=0.2, help="segundos por tanda")
+    parser.add_argument("--only", help="prefijos de casos separados por coma (token,password,rows,json)")
+    parser.add_argument("--save", metavar="ARCHIVO", help="guardar resultados como baseline JSON")
+    parser.add_argument("--compare", metavar="ARCHIVO", help="comparar contra un baseline guardado")
+    parser.add_argument("--threshold", type=float, default=10.0, help="%% de empeoramiento que cuenta como regresión")
+    args = parser.parse_args()
+
+    cases = build_cases()
+    if args.only:
+        prefixes = tuple(prefix.strip() for prefix in args.only.split(","))
+        cases = {name: fn for name, fn in cases.items() if name.startswith(prefixes)}
+
+    results = {}
+    print(f"{'caso':32} {'mediana µs':>12} {'mín µs':>12} {'loops':>9}")
+    print("-" * 68)
+    for name, fn in cases.items():
+        results[name] = measure(fn, args.repeats, args.target)
+        row = results[name]
+        print(f"{name:32} {row['median_us']:>12.2f} {row['min_us']:>12.2f} {row['loops']:>9}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "sqlite": sqlite3.sqlite_version,
+                    "orjson": orjson is not None,
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"\nBaseline guardado en {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regresión(es) por encima de {args.threshold:.0f}%")
+            sys.exit(1)
+        print(f"\n✅ Sin regresiones por encima de {args.threshold:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
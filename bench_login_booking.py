@@ -0,0 +1,127 @@
+"""
+BENCHMARK: LATENCIA DE RESERVAS MIENTRAS HAY LOGINS EN PARALELO
+===============================================================
+
+Simula un worker de uvicorn: un flujo constante de "reservas" (handlers async
+cortos) comparte el event loop con N clientes haciendo login sin parar.
+Se mide la latencia de cada reserva desde el momento en que debía empezar,
+así que cualquier bloqueo del loop aparece directamente en el p99.
+
+Modos:
+- baseline: solo reservas, sin logins
+- inline:   pwd_context.verify() directo en el loop (comportamiento anterior)
+- thread:   PasswordHasher con pool de hilos
+- process:  PasswordHasher con pool de procesos
+
+Uso:
+    python bench_login_booking.py --logins 8 --duration 5 --rate 200
+    python bench_login_booking.py --json
+"""
+
+import argparse
+import asyncio
+import json
+
+from passlib.context import CryptContext
+
+from vlx_hashing import PasswordHasher
+
+PASSWORD = "chila123"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def booking_stream(latencies, stop, rate):
+    """Reservas a ritmo fijo (lazo abierto): la latencia incluye la espera del loop"""
+    loop = asyncio.get_running_loop()
+    interval = 1.0 / rate
+    scheduled = loop.time()
+    while not stop.is_set():
+        scheduled += interval
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # Trabajo típico de un handler de reserva: armar el dict y ceder el loop
+        booking = {"pickup_address": "JFK Terminal 4", "price": 150.5, "passengers": 2}
+        await asyncio.sleep(0)
+        booking["status"] = "pending"
+        latencies.append((loop.time() - scheduled) * 1000)
+
+
+async def login_client(mode, hasher, pwd_context, hashed, stop, counter):
+    while not stop.is_set():
+        if mode == "inline":
+            pwd_context.verify(PASSWORD, hashed)
+            await asyncio.sleep(0)
+        else:
+            await hasher.verify(PASSWORD, hashed)
+        counter[0] += 1
+
+
+async def run_mode(mode, logins, duration, rate, pwd_context, hashed):
+    stop = asyncio.Event()
+    latencies = []
+    counter = [0]
+    hasher = PasswordHasher(kind=mode, workers=logins, max_pending=logins * 4) if mode in ("thread", "process") else None
+
+    tasks = [asyncio.create_task(booking_stream(latencies, stop, rate))]
+    if mode != "baseline":
+        tasks += [
+            asyncio.create_task(login_client(mode, hasher, pwd_context, hashed, stop, counter))
+            for _ in range(logins)
+        ]
+
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*tasks)
+    if hasher is not None:
+        hasher.shutdown()
+
+    return {
+        "mode": mode,
+        "bookings": len(latencies),
+        "logins_per_s": counter[0] / duration,
+        "booking_p50_ms": percentile(latencies, 50),
+        "booking_p99_ms": percentile(latencies, 99),
+        "booking_max_ms": max(latencies) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de reservas con logins concurrentes")
+    parser.add_argument("--logins", type=int, default=8, help="clientes haciendo login en paralelo")
+    parser.add_argument("--duration", type=float, default=5.0, help="segundos por modo")
+    parser.add_argument("--rate", type=float, default=200.0, help="reservas por segundo")
+    parser.add_argument("--modes", default="baseline,inline,thread,process")
+    parser.add_argument("--json", action="store_true", help="imprimir resultados como JSON")
+    args = parser.parse_args()
+
+    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    hashed = pwd_context.hash(PASSWORD)
+
+    results = [
+        asyncio.run(run_mode(mode, args.logins, args.duration, args.rate, pwd_context, hashed))
+        for mode in args.modes.split(",")
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'modo':10} {'reservas':>9} {'logins/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    print("-" * 60)
+    for r in results:
+        print(
+            f"{r['mode']:10} {r['bookings']:>9} {r['logins_per_s']:>9.1f} "
+            f"{r['booking_p50_ms']:>9.2f} {r['booking_p99_ms']:>9.2f} {r['booking_max_ms']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
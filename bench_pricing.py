@@ -0,0 +1,246 @@
+"""
+BENCHMARK: COTIZACIONES POR SEGUNDO (vlx_pricing vs port escalar)
+=================================================================
+
+1. Verifica que vlx_pricing da exactamente los mismos precios y tipos de ruta
+   que un port línea por línea de PricingService.calculatePrice (Dart) sobre
+   viajes aleatorios alrededor de NYC, incluidos bordes de cajas y radios.
+2. Mide cotizaciones/s (viajes x 5 tiers) del port escalar y del motor
+   vectorizado para distintos tamaños de lote, y la latencia del camino
+   escalar de vlx_pricing (el costo de re-tarifar una reserva en create_booking).
+3. Con `--matrix N`, verifica vlx_quote_matrix contra vlx_pricing par por par
+   y mide pares/s de una matriz N x N, en bloques y como NDJSON.
+4. Con `--zones N`, verifica el índice de vlx_zones contra el test exacto de
+   todos los polígonos para N puntos al azar y mide búsquedas/s.
+
+Uso:
+    python bench_pricing.py --trips 100000 --batches 1,100,10000
+    python bench_pricing.py --matrix 2000
+    python bench_pricing.py --zones 1000000
+"""
+
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+
+import vlx_pricing as pricing
+import vlx_quote_matrix as quote_matrix
+import vlx_zones as zones
+
+# ==============================================================================
+# PORT ESCALAR DE pricing_service.dart (referencia)
+# ==============================================================================
+
+def _distance_between(lat1, lng1, lat2, lng2):
+    earth_radius_miles = 3958.8
+    d_lat = _to_rad(lat2 - lat1)
+    d_lng = _to_rad(lng2 - lng1)
+    a = (math.sin(d_lat / 2) * math.sin(d_lat / 2)
+         + math.cos(_to_rad(lat1)) * math.cos(_to_rad(lat2)) * math.sin(d_lng / 2) * math.sin(d_lng / 2))
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return earth_radius_miles * c
+
+
+def _to_rad(deg):
+    return deg * math.pi / 180
+
+
+def _in_box(lat, lng, box):
+    return box[0] <= lat <= box[1] and box[2] <= lng <= box[3]
+
+
+def detect_route_type(plat, plng, dlat, dlng):
+    pickup_manhattan = _in_box(plat, plng, pricing.MANHATTAN_BOX)
+    dropoff_manhattan = _in_box(dlat, dlng, pricing.MANHATTAN_BOX)
+    for route, airport in ((pricing.ROUTE_JFK, pricing.JFK), (pricing.ROUTE_LGA, pricing.LGA), (pricing.ROUTE_EWR, pricing.EWR)):
+        pickup_near = _distance_between(plat, plng, *airport) <= pricing.AIRPORT_RADIUS_MILES
+        dropoff_near = _distance_between(dlat, dlng, *airport) <= pricing.AIRPORT_RADIUS_MILES
+        if (pickup_manhattan and dropoff_near) or (pickup_near and dropoff_manhattan):
+            return route
+    if _in_box(plat, plng, pricing.NYC_BOX) and _in_box(dlat, dlng, pricing.NYC_BOX):
+        return pricing.ROUTE_LOCAL
+    return pricing.ROUTE_OUTSIDE
+
+
+def calculate_price(plat, plng, dlat, dlng, miles, tier, multiplier, is_return, tolls):
+    route = detect_route_type(plat, plng, dlat, dlng)
+    effective_miles = miles * (2 if is_return else 1)
+    effective_tolls = tolls * (2 if is_return else 1)
+    if route <= pricing.ROUTE_EWR:
+        total_flat = float(pricing.AIRPORT_FLAT_RATES[route][tier]) * (2 if is_return else 1)
+        return route, total_flat * multiplier + effective_tolls
+    if route == pricing.ROUTE_LOCAL:
+        base = float(pricing.LOCAL_BASE_RATE[tier])
+        extra_rate = float(pricing.LOCAL_EXTRA_MILE_RATE[tier])
+        extra_miles = effective_miles - 5.0 if effective_miles > 5.0 else 0.0
+        return route, (base + extra_miles * extra_rate) * multiplier + effective_tolls
+    base_fare = float(pricing.OUTSIDE_CITY_BASE_FARE[tier])
+    rate = float(pricing.OUTSIDE_CITY_RATE[tier])
+    return route, (base_fare + effective_miles * rate) * multiplier + effective_tolls
+
+
+def scalar_quotes(trips):
+    return [
+        [calculate_price(*trip[:5], tier, *trip[5:]) for tier in range(len(pricing.TIERS))]
+        for trip in trips
+    ]
+
+
+# ==============================================================================
+# DATOS
+# ==============================================================================
+
+def random_trips(count, seed):
+    rng = random.Random(seed)
+    anchors = [pricing.JFK, pricing.LGA, pricing.EWR, (40.758, -73.9855), (40.69, -73.94), (41.05, -73.54)]
+    multipliers = sorted(set(pricing.SERVICE_MULTIPLIERS.values()))
+    trips = []
+    for _ in range(count):
+        (alat, alng), (blat, blng) = rng.choice(anchors), rng.choice(anchors)
+        # Dispersión ~ 3 mi: muchos puntos caen cerca del radio de aeropuerto
+        trips.append((
+            alat + rng.gauss(0, 0.04), alng + rng.gauss(0, 0.05),
+            blat + rng.gauss(0, 0.04), blng + rng.gauss(0, 0.05),
+            rng.uniform(0.5, 80.0),
+            rng.choice(multipliers),
+            rng.random() < 0.2,
+            rng.choice((0.0, 0.0, 6.94, 17.63)),
+        ))
+    return trips
+
+
+def vector_quotes(columns):
+    return pricing.quote_arrays(*columns)
+
+
+def small_batch_quotes(trips):
+    """Camino escalar de vlx_pricing (el que usa create_booking)"""
+    routes = [pricing.classify_route(*trip[:4]) for trip in trips]
+    return routes, [pricing.price_route(route, *trip[4:]) for route, trip in zip(routes, trips)]
+
+
+def random_points(count, seed):
+    return [trip[:2] for trip in random_trips(count, seed)]
+
+
+def bench_matrix(size, seed):
+    # Verificación: cada bloque contra quote_arrays sobre los pares aplanados
+    pickups, destinations = np.array(random_points(300, seed)), np.array(random_points(200, seed + 1))
+    mismatches = 0
+    for start, distances, routes, prices in quote_matrix.iter_matrix_blocks(pickups, destinations, chunk_pairs=7000):
+        rows = len(routes)
+        origin = np.repeat(pickups[start:start + rows], len(destinations), axis=0)
+        target = np.tile(destinations, (rows, 1))
+        ref_routes, ref_prices = pricing.quote_arrays(
+            origin[:, 0], origin[:, 1], target[:, 0], target[:, 1], distances.ravel()
+        )
+        mismatches += int((ref_routes != routes.ravel()).sum()) + int((ref_prices != prices.reshape(rows * len(destinations), -1)).sum())
+    if mismatches:
+        print(f"\n❌ La matriz difiere de vlx_pricing en {mismatches} valores")
+    else:
+        print(f"\n✅ Matriz {len(pickups)}x{len(destinations)} idéntica a vlx_pricing par por par")
+
+    pickups, destinations = random_points(size, seed), random_points(size, seed + 1)
+    pairs = size * size
+    started = time.perf_counter()
+    for _ in quote_matrix.iter_matrix_blocks(pickups, destinations):
+        pass
+    blocks_elapsed = time.perf_counter() - started
+    started = time.perf_counter()
+    sent = sum(len(chunk) for chunk in quote_matrix.iter_matrix_ndjson(pickups, destinations))
+    ndjson_elapsed = time.perf_counter() - started
+    print(f"Matriz {size}x{size} ({pairs:,} pares, bloques de {quote_matrix.MATRIX_CHUNK_PAIRS:,}):")
+    print(f"  cálculo: {pairs / blocks_elapsed:,.0f} pares/s")
+    print(f"  NDJSON:  {pairs / ndjson_elapsed:,.0f} pares/s, {sent / 1e6:,.1f} MB")
+
+
+def bench_zones(count, seed):
+    started = time.perf_counter()
+    index = zones.ZoneIndex()
+    build_ms = (time.perf_counter() - started) * 1000
+    stats = index.stats()
+    print(f"\nÍndice de zonas: {stats['cells']:,} celdas, {stats['edge_cell_ratio']:.1%} de borde, {build_ms:.0f} ms")
+
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(40.45, 41.40, count)
+    lng = rng.uniform(-74.30, -73.45, count)
+    started = time.perf_counter()
+    found = index.lookup_many(lat, lng)
+    elapsed = time.perf_counter() - started
+
+    # Referencia: todos los polígonos, de menor a mayor prioridad
+    started = time.perf_counter()
+    reference = np.full(count, zones.NO_ZONE, dtype=np.int16)
+    for i, zone in reversed(list(enumerate(index.zones))):
+        reference[zones.points_in_rings(lat, lng, zone.rings)] = i
+    scan_elapsed = time.perf_counter() - started
+    mismatches = int((reference != found).sum())
+    print(("❌" if mismatches else "✅") + f" {count:,} puntos, {mismatches} distintos al test exacto")
+    print(f"  índice: {count / elapsed:,.0f} puntos/s   recorrido de polígonos: {count / scan_elapsed:,.0f} puntos/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cotizaciones/s: port escalar vs vlx_pricing")
+    parser.add_argument("--trips", type=int, default=50000)
+    parser.add_argument("--batches", default="1,100,10000")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--matrix", type=int, default=0, help="lado de la matriz N x N (0 = no medir)")
+    parser.add_argument("--zones", type=int, default=0, help="puntos para el índice de zonas (0 = no medir)")
+    args = parser.parse_args()
+
+    trips = random_trips(args.trips, args.seed)
+    columns = [np.array(column) for column in zip(*trips)]
+
+    # 1. Equivalencia exacta
+    routes, prices = vector_quotes(columns)
+    reference = scalar_quotes(trips)
+    ref_routes = np.array([row[0][0] for row in reference])
+    ref_prices = np.array([[price for _, price in row] for row in reference])
+    mismatched_routes = int((routes != ref_routes).sum())
+    mismatched_prices = int((prices != ref_prices).sum())
+    small_routes, small_prices = small_batch_quotes(trips)
+    mismatched_routes += int((np.array(small_routes) != ref_routes).sum())
+    mismatched_prices += int((np.array(small_prices) != ref_prices).sum())
+    counts = np.bincount(routes, minlength=len(pricing.ROUTE_TYPES))
+    print("Rutas: " + ", ".join(f"{name}={count}" for name, count in zip(pricing.ROUTE_TYPES, counts)))
+    if mismatched_routes or mismatched_prices:
+        print(f"❌ Difieren {mismatched_routes} rutas y {mismatched_prices} precios")
+    else:
+        print(f"✅ {len(trips):,} viajes x {len(pricing.TIERS)} tiers idénticos al port de Dart (vectorizado y escalar)")
+
+    # 2. Throughput
+    sample = trips[:min(len(trips), 5000)]
+    started = time.perf_counter()
+    scalar_quotes(sample)
+    scalar_rate = len(sample) / (time.perf_counter() - started)
+
+    sample = trips[:min(len(trips), 20000)]
+    started = time.perf_counter()
+    small_batch_quotes(sample)
+    small_us = (time.perf_counter() - started) / len(sample) * 1e6
+    print(f"\nUna reserva (camino escalar de vlx_pricing): {small_us:.1f} µs, {1e6 / small_us:,.0f} cot/s")
+
+    print(f"\n{'lote':>8} {'escalar cot/s':>15} {'numpy cot/s':>15} {'µs/lote':>10}")
+    print("-" * 52)
+    for batch in [int(b) for b in args.batches.split(",")]:
+        batch = min(batch, len(trips))
+        chunks = [[column[i:i + batch] for column in columns] for i in range(0, len(trips) - batch + 1, batch)]
+        chunks = chunks[:max(1, 20000 // batch)] if batch == 1 else chunks
+        started = time.perf_counter()
+        for chunk in chunks:
+            vector_quotes(chunk)
+        elapsed = time.perf_counter() - started
+        quoted = batch * len(chunks)
+        print(f"{batch:>8} {scalar_rate:>15,.0f} {quoted / elapsed:>15,.0f} {elapsed / len(chunks) * 1e6:>10.1f}")
+
+    if args.matrix:
+        bench_matrix(args.matrix, args.seed)
+    if args.zones:
+        bench_zones(args.zones, args.seed)
+
+
+if __name__ == "__main__":
+    main()
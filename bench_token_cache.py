@@ -0,0 +1,85 @@
+"""
+BENCHMARK: COSTO DE AUTENTICACIÓN POR REQUEST CON Y SIN CACHE DE TOKENS
+=======================================================================
+
+Compara `jwt.decode` directo contra `TokenCache` + `jwt.decode` en fallo,
+con un conjunto de sesiones activas que reutilizan su token (como hace
+ApiService._request en la app). También verifica que un token alterado
+sigue siendo rechazado aunque el original esté en cache.
+
+Uso:
+    python bench_token_cache.py --sessions 500 --requests 200000
+"""
+
+import argparse
+import random
+import time
+
+import jwt
+
+from vlx_token_cache import TokenCache
+
+SECRET_KEY = "bench_secret"
+ALGORITHM = "HS256"
+
+
+def decode_uncached(token):
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+
+def make_decode_cached(cache):
+    def decode_cached(token):
+        payload = cache.get(token)
+        if payload is None:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            cache.put(token, payload)
+        return payload
+    return decode_cached
+
+
+def run(decode, tokens, requests):
+    started = time.perf_counter()
+    for token in tokens[:requests]:
+        decode(token)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Autenticación cacheada vs sin cache")
+    parser.add_argument("--sessions", type=int, default=500, help="tokens distintos activos")
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--cache-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    exp = int(time.time()) + 3600
+    session_tokens = [
+        jwt.encode({"user_id": i, "email": f"user{i}@vanelux.com", "username": f"user{i}", "exp": exp},
+                   SECRET_KEY, algorithm=ALGORITHM)
+        for i in range(args.sessions)
+    ]
+    rng = random.Random(42)
+    stream = [rng.choice(session_tokens) for _ in range(args.requests)]
+
+    cache = TokenCache(maxsize=args.cache_size)
+    uncached_us = run(decode_uncached, stream, args.requests)
+    cached_us = run(make_decode_cached(cache), stream, args.requests)
+
+    print(f"{'modo':12} {'µs/request':>12}")
+    print("-" * 26)
+    print(f"{'sin cache':12} {uncached_us:>12.2f}")
+    print(f"{'con cache':12} {cached_us:>12.2f}")
+    print(f"\nAceleración: {uncached_us / cached_us:.1f}x")
+    print(f"Cache: {cache.stats()}")
+
+    # Un token alterado no debe validarse gracias al cache del original
+    header, payload, signature = session_tokens[0].split(".")
+    tampered = ".".join([header, payload, signature[:-2] + ("AA" if signature[-2:] != "AA" else "BB")])
+    try:
+        make_decode_cached(cache)(tampered)
+        print("❌ El token alterado fue aceptado")
+    except jwt.PyJWTError:
+        print("✅ Token alterado rechazado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+BENCHMARK: PEAJES DESDE LA TABLA LOCAL DE CRUCES
+================================================
+
+Mide cuántas cotizaciones resuelve vlx_toll_table sin llamar a TollGuru y
+cuánto tarda cada una:
+
+1. zonas: cotizaciones con origen y destino en coordenadas, sorteados en
+   las zonas de vlx_zones con un peso parecido al del tráfico real
+   (Manhattan y aeropuertos primero). Reporta el porcentaje resuelto por la
+   tabla y los µs por cotización, contra `--latency` de TollGuru para el resto.
+2. polyline: para cada cruce de la tabla y cada sentido, una ruta recta que
+   atraviesa las dos geocercas; verifica que se detecte ese cruce (y solo
+   ese) y mide los µs por ruta.
+
+Uso:
+    python bench_toll_table.py --quotes 20000 --latency 0.4
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from vlx_tolls import TollRequest
+from vlx_toll_table import FACILITIES, TollModel
+from vlx_zones import default_index
+
+ZONE_WEIGHTS = {
+    "manhattan": 6, "jfk": 3, "lga": 2, "ewr": 2, "brooklyn": 2, "queens": 2, "bronx": 1,
+    "staten_island": 0.5, "jersey_city_hoboken": 1, "newark": 0.5, "westchester": 0.5,
+}
+
+
+def sample_point(zone, index, rng):
+    """Punto al azar dentro de la zona (rechazo sobre su caja envolvente)"""
+    vertices = np.array([vertex for ring in zone.rings for vertex in ring])
+    low, high = vertices.min(axis=0), vertices.max(axis=0)
+    while True:
+        lat, lng = rng.uniform(low[0], high[0]), rng.uniform(low[1], high[1])
+        found = index.lookup(lat, lng)
+        if found is not None and found.key == zone.key:
+            return lat, lng
+
+
+def make_requests(quotes, rng):
+    index = default_index()
+    zones = [zone for zone in index.zones if zone.key in ZONE_WEIGHTS]
+    weights = [ZONE_WEIGHTS[zone.key] for zone in zones]
+    requests = []
+    for _ in range(quotes):
+        a, b = rng.choices(zones, weights, k=2)
+        origin, destination = sample_point(a, index, rng), sample_point(b, index, rng)
+        requests.append(TollRequest.from_payload({
+            "origin": f"{origin[0]:.6f},{origin[1]:.6f}",
+            "destination": f"{destination[0]:.6f},{destination[1]:.6f}",
+            "vehicle": {"type": "2AxlesAuto"},
+            "departureTime": f"2026-03-0{rng.randint(2, 8)}T{rng.randint(0, 23):02d}:10:00Z",
+        }))
+    return requests
+
+
+def bench_zones(model, args, rng):
+    requests = make_requests(args.quotes, rng)
+    timings, matched = [], 0
+    for request in requests:
+        started = time.perf_counter()
+        result = model.estimate(request)
+        timings.append((time.perf_counter() - started) * 1e6)
+        matched += result is not None
+    timings.sort()
+    provider_ms = (len(requests) - matched) * args.latency * 1000 / len(requests)
+    print(f"{'fase':>9} {'rutas':>7} {'tabla':>7} {'tabla %':>8} {'p50 µs':>8} {'p95 µs':>8} {'ms prom. c/TollGuru':>20}")
+    print("-" * 74)
+    print(
+        f"{'zonas':>9} {len(requests):>7} {matched:>7} {matched / len(requests) * 100:>8.1f} "
+        f"{timings[len(timings) // 2]:>8.1f} {timings[int(len(timings) * 0.95)]:>8.1f} {provider_ms:>20.1f}"
+    )
+
+
+def bench_polylines(model, args):
+    cases = []
+    for facility in FACILITIES:
+        for entry, entry_ring in facility.approaches:
+            for exit, exit_ring in facility.approaches:
+                if entry == exit:
+                    continue
+                a, b = np.mean(entry_ring, axis=0), np.mean(exit_ring, axis=0)
+                # Entra 500 m antes de la geocerca de entrada y sale 500 m después de la de salida
+                direction = (b - a) / np.linalg.norm(b - a) * 0.0045
+                polyline = [tuple(a - direction), tuple(a), tuple(b), tuple(b + direction)]
+                expected = [{"facilities": [facility.key], "from": entry, "to": exit,
+                             "toll": facility.toll(entry, exit, "auto", False)}]
+                cases.append((facility.key, polyline, expected))
+
+    mismatches, timings = 0, []
+    for _ in range(args.repeat):
+        for key, polyline, expected in cases:
+            request = TollRequest.from_payload({
+                "origin": "a", "destination": "b", "polyline": [list(point) for point in polyline],
+                "departureTime": "2026-03-03T04:00:00Z",  # valle
+            })
+            started = time.perf_counter()
+            result = model.estimate(request)
+            timings.append((time.perf_counter() - started) * 1e6)
+            if result is None or result["crossings"] != expected:
+                mismatches += 1
+                if mismatches <= 5:
+                    print(f"  no coincide: {key} -> {result and result['crossings']}")
+    timings.sort()
+    print(
+        f"{'polyline':>9} {len(timings):>7} {len(timings) - mismatches:>7} "
+        f"{(len(timings) - mismatches) / len(timings) * 100:>8.1f} "
+        f"{timings[len(timings) // 2]:>8.1f} {timings[int(len(timings) * 0.95)]:>8.1f} {'-':>20}"
+    )
+    print(f"\n{len(cases)} sentidos de cruce, {mismatches} detecciones incorrectas")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peajes resueltos por la tabla local de cruces")
+    parser.add_argument("--quotes", type=int, default=20000)
+    parser.add_argument("--latency", type=float, default=0.4, help="latencia de TollGuru para las rutas sin tabla (s)")
+    parser.add_argument("--repeat", type=int, default=20, help="repeticiones de cada ruta con polyline")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    model = TollModel()
+    bench_zones(model, args, rng)
+    bench_polylines(model, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+BENCHMARK: LLAMADAS A TOLLGURU EVITADAS POR vlx_tolls
+=====================================================
+
+Simula ráfagas de cotizaciones (muchas simultáneas sobre pocas rutas, como
+cuando varias personas cotizan JFK -> Midtown a la vez) contra TollService
+con FakeTollProvider, en tres fases:
+
+1. frío: cache vacío; el single-flight une las llamadas simultáneas.
+2. caliente: todo sale del cache.
+3. lento: el TTL venció y el proveedor tarda `--slow` s; con
+   stale-while-revalidate se responde el valor anterior en ~VLX_TOLL_STALE_WAIT_MS.
+
+Sin cache, cada cotización sería una llamada: la columna "sin cache" es la
+referencia.
+
+Uso:
+    python bench_tolls.py --routes 50 --quotes 2000 --latency 0.4 --slow 3
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from vlx_tolls import FakeTollProvider, TollRequest, TollService
+
+
+def make_requests(routes, quotes, rng):
+    places = [f"{40.70 + rng.random() * 0.1:.5f},{-74.00 + rng.random() * 0.1:.5f}" for _ in range(routes)]
+    weights = [1 / (rank + 1) for rank in range(routes)]
+    airports = ("JFK Airport", "LaGuardia Airport", "Newark Liberty International Airport")
+    bodies = [
+        {
+            "origin": rng.choices(places, weights)[0],
+            "destination": rng.choice(airports),
+            "vehicle": {"type": "2AxlesAuto"},
+            "departureTime": "2026-03-02T13:10:00Z",
+        }
+        for _ in range(quotes)
+    ]
+    return [TollRequest.from_payload(body) for body in bodies]
+
+
+async def burst(service, requests, rate):
+    """Lanza las cotizaciones a `rate` por segundo y devuelve latencias en ms"""
+    latencies = []
+
+    async def one(request, delay):
+        await asyncio.sleep(delay)
+        started = time.perf_counter()
+        await service.get(request)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*[one(request, i / rate) for i, request in enumerate(requests)])
+    latencies.sort()
+    return latencies
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    requests = make_requests(args.routes, args.quotes, rng)
+    clock = [0.0]
+    provider = FakeTollProvider(latency=args.latency)
+    service = TollService(provider, clock=lambda: clock[0])
+
+    print(f"{len(requests):,} cotizaciones por fase sobre {args.routes} rutas, {args.rate:.0f}/s, "
+          f"proveedor {args.latency * 1000:.0f} ms\n")
+    print(f"{'fase':>10} {'sin cache':>10} {'llamadas':>9} {'evitadas':>9} {'stale':>6} {'p50 ms':>8} {'p95 ms':>8}")
+    print("-" * 66)
+    previous = service.stats()
+    for phase in ("frío", "caliente", "lento"):
+        if phase == "lento":
+            clock[0] += service.ttl + 1
+            provider.latency = args.slow
+        latencies = await burst(service, requests, args.rate)
+        stats = service.stats()
+        calls = stats["upstream_calls"] - previous["upstream_calls"]
+        avoided = stats["upstream_calls_avoided"] - previous["upstream_calls_avoided"]
+        stale = stats["stale_served"] - previous["stale_served"]
+        print(
+            f"{phase:>10} {len(requests):>10} {calls:>9} {avoided:>9} {stale:>6} "
+            f"{latencies[len(latencies) // 2]:>8.1f} {latencies[int(len(latencies) * 0.95)]:>8.1f}"
+        )
+        previous = stats
+    # Deja terminar las revalidaciones en segundo plano
+    await asyncio.sleep(args.slow + 0.1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Llamadas a TollGuru evitadas por el cache de peajes")
+    parser.add_argument("--routes", type=int, default=50)
+    parser.add_argument("--quotes", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=1000.0, help="cotizaciones por segundo")
+    parser.add_argument("--latency", type=float, default=0.4, help="latencia normal del proveedor (s)")
+    parser.add_argument("--slow", type=float, default=3.0, help="latencia del proveedor en la fase lenta (s)")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,16 @@
 import sqlite3
 import json
 
+from vlx_slow_queries import SlowQueryLog
+
 db_path = r'C:\Users\elkin\OneDrive\Desktop\app de prueba\logistics.db'
 
 print("🔍 Buscando usuario 'Edgar' en la base de datos...\n")
 
 try:
-    conn = sqlite3.connect(db_path)
+    # Umbral 0: registra el plan de cada consulta para detectar full scans
+    slow_log = SlowQueryLog(threshold_ms=0, logfile=None)
+    conn = sqlite3.connect(db_path, factory=slow_log.connection_factory)
     cursor = conn.cursor()
     
     # Buscar en tabla 'users' (backend)
@@ -66,6 +70,15 @@ try:
     print(f"📈 Total de usuarios en tabla 'users': {total_users}")
     
     conn.close()
+    
+    full_scans = [query for query in slow_log.top() if query["full_scan"]]
+    if full_scans:
+        print("\n🐢 Consultas que recorren la tabla completa (sin índice):")
+        for query in full_scans:
+            print(f"  {query['max_ms']:.1f} ms  {query['sql']}")
+            for line in query["plan"]:
+                print(f"      {line}")
+    
     print("\n✅ Consulta completada")
     
 except Exception as e:
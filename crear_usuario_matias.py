@@ -5,6 +5,7 @@ import os
 from supabase import create_client
 from passlib.context import CryptContext
 import json
+from vlx_user_cache import notify_user_changed
 
 # Configuración de Supabase
 SUPABASE_URL = "https://nbbhavrhuqzhluxmuwdo.supabase.co"
@@ -60,6 +61,11 @@ try:
             }).eq('email', nuevo_usuario['email']).execute()
             
             print("✅ Contraseña actualizada exitosamente")
+            # El backend cachea usuarios: que vea el cambio ya, no al vencer el TTL
+            if notify_user_changed(email=nuevo_usuario['email']):
+                print("🧹 Cache de usuarios del backend invalidado")
+            else:
+                print("⚠️  No se pudo invalidar el cache del backend (falta VLX_ADMIN_TOKEN o está apagado)")
         else:
             print("❌ Operación cancelada")
     else:
@@ -86,6 +92,11 @@ try:
         
         if result.data and len(result.data) > 0:
             user_created = result.data[0]
+            # El backend cachea usuarios: que vea el cambio ya, no al vencer el TTL
+            if notify_user_changed(email=nuevo_usuario['email']):
+                print("🧹 Cache de usuarios del backend invalidado")
+            else:
+                print("⚠️  No se pudo invalidar el cache del backend (falta VLX_ADMIN_TOKEN o está apagado)")
             print()
             print("=" * 80)
             print("✅ USUARIO CREADO EXITOSAMENTE")
@@ -4,6 +4,7 @@ Usando el backend local en lugar de Supabase directamente
 """
 import requests
 import json
+from vlx_user_cache import notify_user_changed
 
 # Configuración
 BACKEND_URL = "http://192.168.1.43:3000"
@@ -119,6 +120,11 @@ try:
             
             conn.commit()
             print("✅ Usuario actualizado exitosamente")
+            # El backend cachea usuarios: que vea el cambio ya, no al vencer el TTL
+            if notify_user_changed(email=nuevo_usuario['email']):
+                print("🧹 Cache de usuarios del backend invalidado")
+            else:
+                print("⚠️  No se pudo invalidar el cache del backend (falta VLX_ADMIN_TOKEN o está apagado)")
             print()
             print("=" * 80)
             print("🎯 CREDENCIALES ACTUALIZADAS")
@@ -166,6 +172,11 @@ try:
         
         conn.commit()
         user_id = cursor.lastrowid
+        # El backend cachea usuarios: que vea el cambio ya, no al vencer el TTL
+        if notify_user_changed(email=nuevo_usuario['email']):
+            print("🧹 Cache de usuarios del backend invalidado")
+        else:
+            print("⚠️  No se pudo invalidar el cache del backend (falta VLX_ADMIN_TOKEN o está apagado)")
         
         print()
         print("=" * 80)
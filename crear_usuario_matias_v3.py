@@ -6,6 +6,7 @@ import sqlite3
 import bcrypt
 import json
 import os
+from vlx_user_cache import notify_user_changed
 
 # Datos del nuevo usuario
 nuevo_usuario = {
@@ -91,6 +92,11 @@ try:
             
             conn.commit()
             print("✅ Usuario actualizado exitosamente")
+            # El backend cachea usuarios: que vea el cambio ya, no al vencer el TTL
+            if notify_user_changed(email=nuevo_usuario['email']):
+                print("🧹 Cache de usuarios del backend invalidado")
+            else:
+                print("⚠️  No se pudo invalidar el cache del backend (falta VLX_ADMIN_TOKEN o está apagado)")
             print()
             print("=" * 80)
             print("🎯 CREDENCIALES ACTUALIZADAS")
@@ -135,6 +141,11 @@ try:
         
         conn.commit()
         user_id = cursor.lastrowid
+        # El backend cachea usuarios: que vea el cambio ya, no al vencer el TTL
+        if notify_user_changed(email=nuevo_usuario['email']):
+            print("🧹 Cache de usuarios del backend invalidado")
+        else:
+            print("⚠️  No se pudo invalidar el cache del backend (falta VLX_ADMIN_TOKEN o está apagado)")
         
         print()
         print("=" * 80)
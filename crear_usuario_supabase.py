@@ -4,6 +4,7 @@ Script para crear usuario directamente en Supabase usando la API REST
 import requests
 import bcrypt
 import json
+from vlx_user_cache import notify_user_changed
 
 # Configuración de Supabase
 SUPABASE_URL = "https://nbbhavrhuqzhluxmuwdo.supabase.co"
@@ -82,6 +83,11 @@ try:
             
             if update_response.status_code in [200, 204]:
                 print("✅ Usuario actualizado exitosamente en Supabase")
+                # El backend cachea usuarios: que vea el cambio ya, no al vencer el TTL
+                if notify_user_changed(email=nuevo_usuario['email']):
+                    print("🧹 Cache de usuarios del backend invalidado")
+                else:
+                    print("⚠️  No se pudo invalidar el cache del backend (falta VLX_ADMIN_TOKEN o está apagado)")
             else:
                 print(f"❌ Error al actualizar: {update_response.status_code}")
                 print(f"Respuesta: {update_response.text}")
@@ -114,6 +120,11 @@ try:
             print(f"Status: {insert_response.status_code}")
             
             if insert_response.status_code in [200, 201]:
+                # El backend cachea usuarios: que vea el cambio ya, no al vencer el TTL
+                if notify_user_changed(email=nuevo_usuario['email']):
+                    print("🧹 Cache de usuarios del backend invalidado")
+                else:
+                    print("⚠️  No se pudo invalidar el cache del backend (falta VLX_ADMIN_TOKEN o está apagado)")
                 created = insert_response.json()
                 if created and len(created) > 0:
                     user = created[0]
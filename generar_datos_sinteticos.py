@@ -0,0 +1,377 @@
+"""
+GENERADOR DE DATOS SINTÉTICOS PARA logistics.db
+===============================================
+
+crear_reserva_prueba.py inserta una sola reserva escrita a mano. Para pruebas
+de capacidad este script crea N usuarios y millones de reservas realistas:
+
+- Usuarios con mezclas de `roles` / `allowed_apps` como las de producción
+  (pasajeros de vanelux, clientes de conexaship, conductores, admins).
+- Recogidas alrededor de JFK, LGA, EWR y Manhattan (más algo de resto de
+  NYC y afueras), destinos coherentes (aeropuerto <-> Manhattan), distancia
+  por haversine con factor de ruta y precio con las tarifas de la app.
+- `created_at` repartido en los últimos `--dias` días; el estado depende de
+  si la recogida ya pasó (completed/cancelled) o no (pending/confirmed/assigned).
+
+Rendimiento:
+- Las reservas se generan por bloques de `--bloque` filas con semilla propia
+  (seed, número de bloque): el resultado es el mismo con 1 o con 8 procesos.
+- Con `--procesos N` cada proceso escribe sus bloques en un archivo SQLite
+  temporal (journal off, synchronous off) y el proceso principal los pasa a
+  la base con `INSERT INTO ... SELECT` vía ATTACH, que corre en C.
+- En una base nueva los índices de vlx_migrations se crean al final, sobre
+  la tabla ya cargada, en lugar de mantenerlos fila por fila.
+
+NO apuntar a la base de producción: por defecto escribe logistics_sintetico.db.
+
+Uso:
+    python generar_datos_sinteticos.py --usuarios 50000 --reservas 10000000 --procesos 8
+    python generar_datos_sinteticos.py --db prueba.db --reservas 100000 --seed 7
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from bisect import bisect
+from datetime import datetime
+from itertools import accumulate
+from multiprocessing import Pool
+
+from vlx_migrations import BASE_SCHEMA, apply_migrations
+
+PASSWORD = "sintetico123"
+
+# ==============================================================================
+# DISTRIBUCIONES
+# ==============================================================================
+
+# (roles, allowed_apps, peso)
+USER_PROFILES = (
+    (["passenger"], ["vanelux"], 55),
+    (["passenger"], ["vanelux", "conexaship"], 15),
+    (["client"], ["conexaship"], 12),
+    (["customer"], ["vanelux", "conexaship"], 6),
+    (["driver"], ["vanelux"], 8),
+    (["driver"], ["vanelux", "conexaship"], 2),
+    (["manager"], ["vanelux", "conexaship"], 1.5),
+    (["admin", "ceo"], ["vanelux", "conexaship"], 0.5),
+)
+
+# nombre -> (lat, lng, desviación en grados, dirección, peso como recogida)
+ZONES = {
+    "JFK": (40.6413, -73.7781, 0.004, "JFK Terminal {j}, Queens, NY 11430", 20),
+    "LGA": (40.7769, -73.8740, 0.003, "LaGuardia Terminal {t}, Queens, NY 11371", 12),
+    "EWR": (40.6895, -74.1745, 0.004, "Newark Liberty Terminal {t}, Newark, NJ 07114", 8),
+    "Manhattan": (40.7680, -73.9780, 0.025, "{n} {street}, New York, NY", 45),
+    "NYC": (40.6900, -73.9400, 0.060, "{n} {street}, Brooklyn, NY", 10),
+    "Afueras": (40.9500, -73.7500, 0.120, "{n} {street}, Westchester, NY", 5),
+}
+AIRPORTS = ("JFK", "LGA", "EWR")
+STREETS = (
+    "W 57th St", "5th Ave", "Park Ave", "Madison Ave", "Broadway", "Lexington Ave",
+    "E 42nd St", "W 34th St", "Wall St", "Columbus Ave", "Amsterdam Ave", "Houston St",
+)
+
+# (vehículo, tier, peso, pasajeros máximos)
+VEHICLES = (
+    ("Mercedes-Maybach S 680", "sedan", 30, 3),
+    ("BMW 7 Series", "sedan", 12, 3),
+    ("Suburban", "suv", 22, 6),
+    ("Cadillac Escalade ESV", "escalade", 20, 6),
+    ("Mercedes-Benz Sprinter Jet", "sprinter", 12, 12),
+    ("Mini Coach 27 pax", "miniCoach", 4, 27),
+)
+
+SERVICE_TYPES = (
+    ("point to point", 45), ("to airport", 20), ("from airport", 20),
+    ("hourly/as directed", 8), ("corporate", 4), ("events", 3),
+)
+
+# Tarifas de lib/services/pricing_service.dart (aproximación para seed)
+AIRPORT_FLAT = {
+    "JFK": {"sedan": 190, "suv": 230, "escalade": 280, "sprinter": 390, "miniCoach": 560},
+    "LGA": {"sedan": 170, "suv": 210, "escalade": 255, "sprinter": 360, "miniCoach": 520},
+    "EWR": {"sedan": 230, "suv": 275, "escalade": 330, "sprinter": 460, "miniCoach": 640},
+}
+LOCAL_BASE = {"sedan": 75, "suv": 95, "escalade": 125, "sprinter": 190, "miniCoach": 280}
+LOCAL_MILE = {"sedan": 4.25, "suv": 5.5, "escalade": 6.75, "sprinter": 9.5, "miniCoach": 12.0}
+OUTSIDE_BASE = {"sedan": 140, "suv": 170, "escalade": 210, "sprinter": 300, "miniCoach": 430}
+OUTSIDE_MILE = {"sedan": 6.0, "suv": 7.25, "escalade": 8.75, "sprinter": 12.5, "miniCoach": 16.0}
+
+BOOKING_SQL = """
+    INSERT INTO vlx_bookings (
+        user_id, pickup_address, pickup_lat, pickup_lng, destination_address,
+        destination_lat, destination_lng, pickup_time, vehicle_name, passengers,
+        price, distance_miles, distance_text, duration_text, service_type,
+        is_scheduled, status, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+BOOKING_FIELDS = (
+    "user_id, pickup_address, pickup_lat, pickup_lng, destination_address, "
+    "destination_lat, destination_lng, pickup_time, vehicle_name, passengers, "
+    "price, distance_miles, distance_text, duration_text, service_type, "
+    "is_scheduled, status, created_at, updated_at"
+)
+
+
+def haversine_miles(lat1, lng1, lat2, lng2):
+    dlat = math.radians(lat2 - lat1)
+    dlng = math.radians(lng2 - lng1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlng / 2) ** 2
+    return 3958.8 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+# ==============================================================================
+# GENERACIÓN POR BLOQUES
+# ==============================================================================
+
+def _address_pool(rng, zone, size=512):
+    """Direcciones de una zona, generadas una vez por bloque"""
+    template = ZONES[zone][3]
+    return [
+        template.format(
+            n=rng.randint(1, 899), j=rng.choice((1, 4, 5, 7, 8)), t=rng.choice("ABCD"),
+            street=rng.choice(STREETS),
+        )
+        for _ in range(size)
+    ]
+
+
+def _pick(rng, items, cum_weights):
+    """rng.choices(items, cum_weights=...)[0] sin el costo de armar la lista"""
+    return items[bisect(cum_weights, rng.random() * cum_weights[-1])]
+
+
+def _price(tier, pickup_zone, dest_zone, miles):
+    airports = {pickup_zone, dest_zone} & set(AIRPORTS)
+    if airports and "Manhattan" in (pickup_zone, dest_zone):
+        return float(AIRPORT_FLAT[airports.pop()][tier])
+    if "Afueras" not in (pickup_zone, dest_zone):
+        return LOCAL_BASE[tier] + max(0.0, miles - 5.0) * LOCAL_MILE[tier]
+    return OUTSIDE_BASE[tier] + miles * OUTSIDE_MILE[tier]
+
+
+class _Timestamps:
+    """Formatea segundos epoch; cachea la parte de la fecha (strftime es lo más caro)"""
+
+    def __init__(self):
+        self._days = {}
+
+    def format(self, epoch, sep=" ", suffix=""):
+        day, seconds = divmod(int(epoch), 86400)
+        date = self._days.get(day)
+        if date is None:
+            date = self._days[day] = time.strftime("%Y-%m-%d", time.gmtime(day * 86400))
+        hours, seconds = divmod(seconds, 3600)
+        return f"{date}{sep}{hours:02d}:{seconds // 60:02d}:{seconds % 60:02d}{suffix}"
+
+
+def generate_block(seed, block, size, first_user_id, users, until, days):
+    """Filas del bloque `block`; misma (seed, block) -> mismas filas"""
+    rng = random.Random(f"{seed}:{block}")
+    random_ = rng.random
+    gauss = rng.gauss
+
+    zone_names = list(ZONES)
+    zone_cum = list(accumulate(ZONES[zone][4] for zone in zone_names))
+    manhattan_dest = ("JFK", "LGA", "EWR", "Manhattan", "NYC", "Afueras")
+    manhattan_dest_cum = list(accumulate((25, 18, 10, 35, 8, 4)))
+    vehicle_cum = list(accumulate(vehicle[2] for vehicle in VEHICLES))
+    services = [service for service, _ in SERVICE_TYPES]
+    service_cum = list(accumulate(weight for _, weight in SERVICE_TYPES))
+    past_status = ("completed", "cancelled", "in_progress")
+    past_status_cum = list(accumulate((88, 11, 1)))
+    future_status = ("pending", "confirmed", "assigned")
+    future_status_cum = list(accumulate((45, 35, 20)))
+    lead_hours = (1, 2, 4, 12, 24, 48, 72, 168)
+    addresses = {zone: _address_pool(rng, zone) for zone in zone_names}
+
+    # `until` es medianoche local; se trata como UTC para no depender de la zona horaria
+    until_epoch = (until - datetime(1970, 1, 1)).total_seconds()
+    span = days * 86400
+    stamps = _Timestamps()
+
+    rows = []
+    for _ in range(size):
+        pickup_zone = _pick(rng, zone_names, zone_cum)
+        if pickup_zone in AIRPORTS:
+            dest_zone = "Manhattan" if random_() < 0.8 else ("NYC", "Afueras")[random_() < 0.5]
+        elif pickup_zone == "Manhattan":
+            dest_zone = _pick(rng, manhattan_dest, manhattan_dest_cum)
+        else:
+            dest_zone = ("Manhattan", "JFK", "LGA")[int(random_() * 3)]
+
+        lat, lng, spread, _, _ = ZONES[pickup_zone]
+        pickup_lat, pickup_lng = round(gauss(lat, spread), 6), round(gauss(lng, spread), 6)
+        lat, lng, spread, _, _ = ZONES[dest_zone]
+        dest_lat, dest_lng = round(gauss(lat, spread), 6), round(gauss(lng, spread), 6)
+        pickup_address = addresses[pickup_zone][int(random_() * 512)]
+        dest_address = addresses[dest_zone][int(random_() * 512)]
+
+        miles = round(haversine_miles(pickup_lat, pickup_lng, dest_lat, dest_lng) * 1.3 + 0.5, 1)
+        minutes = int(miles / (12 + random_() * 16) * 60) + 5
+        vehicle, tier, _, max_passengers = _pick(rng, VEHICLES, vehicle_cum)
+        service = _pick(rng, services, service_cum)
+
+        created = until_epoch - random_() * span
+        pickup = created + lead_hours[int(random_() * 8)] * 3600 * (0.5 + random_())
+        if pickup < until_epoch:
+            status = _pick(rng, past_status, past_status_cum)
+            if status == "completed":
+                updated = pickup + minutes * 60
+            else:
+                updated = created + (1 + int(random_() * 600)) * 60
+        else:
+            status = _pick(rng, future_status, future_status_cum)
+            updated = created if status == "pending" else created + int(random_() * 121) * 60
+        updated = min(updated, until_epoch)
+
+        rows.append((
+            first_user_id + int(random_() * users),
+            pickup_address, pickup_lat, pickup_lng,
+            dest_address, dest_lat, dest_lng,
+            stamps.format(pickup, "T", "Z"),
+            vehicle,
+            1 + int(random_() * max_passengers),
+            round(_price(tier, pickup_zone, dest_zone, miles), 2),
+            miles,
+            f"{miles} mi",
+            f"{minutes} min" if minutes < 60 else f"{minutes // 60} h {minutes % 60} min",
+            service,
+            1,
+            status,
+            stamps.format(created),
+            stamps.format(updated),
+        ))
+    return rows
+
+
+def write_shard(task):
+    """Proceso hijo: escribe sus bloques en un archivo SQLite propio"""
+    path, blocks, block_size, total, seed, first_user_id, users, until, days = task
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.executescript(BASE_SCHEMA)
+    for block in blocks:
+        size = min(block_size, total - block * block_size)
+        conn.executemany(BOOKING_SQL, generate_block(seed, block, size, first_user_id, users, until, days))
+    conn.commit()
+    conn.close()
+    return path
+
+
+# ==============================================================================
+# CARGA
+# ==============================================================================
+
+def insert_users(conn, count, seed):
+    """Crea `count` usuarios y devuelve el id del primero"""
+    from passlib.context import CryptContext
+
+    rng = random.Random(f"{seed}:users")
+    hashed = CryptContext(schemes=["bcrypt"]).hash(PASSWORD)  # uno para todos
+    weights = [profile[2] for profile in USER_PROFILES]
+    first_id = (conn.execute("SELECT COALESCE(MAX(id), 0) FROM users").fetchone()[0]) + 1
+    tag = f"s{seed}"
+
+    rows = []
+    for i in range(count):
+        roles, apps, _ = rng.choices(USER_PROFILES, weights)[0]
+        username = f"sint_{tag}_{first_id + i}"
+        rows.append((
+            username,
+            f"{username}@example.com",
+            hashed,
+            f"Usuario Sintético {first_id + i}",
+            f"+1 212 {rng.randint(200, 999)} {rng.randint(1000, 9999)}",
+            json.dumps(roles),
+            json.dumps(apps),
+            "active" if rng.random() < 0.97 else "inactive",
+        ))
+    conn.executemany(
+        "INSERT INTO users (username, email, password_hash, full_name, phone, roles, allowed_apps, status) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    conn.commit()
+    return first_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera usuarios y reservas sintéticos en SQLite")
+    parser.add_argument("--db", default="logistics_sintetico.db")
+    parser.add_argument("--usuarios", type=int, default=10000)
+    parser.add_argument("--reservas", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--procesos", type=int, default=1)
+    parser.add_argument("--bloque", type=int, default=50000, help="filas por executemany / semilla")
+    parser.add_argument("--dias", type=int, default=365, help="antigüedad máxima de created_at")
+    parser.add_argument("--hasta", default=datetime.now().strftime("%Y-%m-%d"),
+                        help="fecha de referencia (fijarla para reproducir exactamente)")
+    args = parser.parse_args()
+
+    until = datetime.strptime(args.hasta, "%Y-%m-%d")
+    started = time.perf_counter()
+
+    new_database = not os.path.exists(args.db)
+    conn = sqlite3.connect(args.db)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")  # solo esta conexión, durante la carga
+    conn.executescript(BASE_SCHEMA)
+
+    print("=" * 80)
+    print(f"🧪 Generando datos sintéticos en {args.db} (seed={args.seed}, hasta={args.hasta})")
+    print("=" * 80)
+
+    first_user_id = insert_users(conn, args.usuarios, args.seed)
+    print(f"👥 {args.usuarios:,} usuarios creados (ids desde {first_user_id})")
+
+    blocks = list(range(math.ceil(args.reservas / args.bloque)))
+    common = (args.bloque, args.reservas, args.seed, first_user_id, args.usuarios, until, args.dias)
+
+    if args.procesos <= 1:
+        for block in blocks:
+            size = min(args.bloque, args.reservas - block * args.bloque)
+            conn.executemany(BOOKING_SQL, generate_block(args.seed, block, size, first_user_id, args.usuarios, until, args.dias))
+            conn.commit()
+            print(f"   📦 {min((block + 1) * args.bloque, args.reservas):,} / {args.reservas:,} reservas", flush=True)
+    else:
+        tmpdir = tempfile.mkdtemp(prefix="vlx_seed_", dir=os.path.dirname(os.path.abspath(args.db)))
+        # Bloques consecutivos por proceso: al unir en orden se conserva el orden global
+        per_process = math.ceil(len(blocks) / args.procesos)
+        tasks = [
+            (os.path.join(tmpdir, f"shard_{i}.db"), blocks[i * per_process:(i + 1) * per_process]) + common
+            for i in range(args.procesos)
+            if blocks[i * per_process:(i + 1) * per_process]
+        ]
+        with Pool(len(tasks)) as pool:
+            shards = pool.map(write_shard, tasks)
+        for path in shards:
+            conn.execute("ATTACH DATABASE ? AS shard", (path,))
+            conn.execute(f"INSERT INTO vlx_bookings ({BOOKING_FIELDS}) SELECT {BOOKING_FIELDS} FROM shard.vlx_bookings ORDER BY id")
+            conn.commit()
+            conn.execute("DETACH DATABASE shard")
+            os.remove(path)
+            print(f"   📦 {os.path.basename(path)} unido", flush=True)
+        os.rmdir(tmpdir)
+
+    load_seconds = time.perf_counter() - started
+    print(f"✅ {args.reservas:,} reservas en {load_seconds:.1f}s ({args.reservas / max(load_seconds, 1e-9):,.0f} filas/s)")
+
+    if new_database:
+        print("🔧 Creando índices (vlx_migrations)...")
+    for name in apply_migrations(conn):
+        print(f"   ✅ {name}")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.close()
+    print(f"⏱️  Total: {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
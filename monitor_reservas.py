@@ -1,81 +1,187 @@
 import sqlite3
 import json
+import time
+import argparse
+from pathlib import Path
 from datetime import datetime
 
 db_path = r'C:\Users\elkin\OneDrive\Desktop\app de prueba\logistics.db'
 
-print("=" * 80)
-print("🔄 MONITOREO DE RESERVAS EN TIEMPO REAL")
-print("=" * 80)
-print(f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-print()
-
-try:
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Contar reservas
-    cursor.execute("SELECT COUNT(*) FROM vlx_bookings")
-    total = cursor.fetchone()[0]
-    
-    print(f"📊 Total de reservas: {total}")
+BOOKINGS_QUERY = """
+    SELECT
+        b.id,
+        b.user_id,
+        u.email,
+        b.pickup_address,
+        b.destination_address,
+        b.pickup_time,
+        b.vehicle_name,
+        b.passengers,
+        b.price,
+        b.distance_text,
+        b.duration_text,
+        b.status,
+        b.created_at,
+        b.updated_at
+    FROM vlx_bookings b
+    LEFT JOIN users u ON b.user_id = u.id
+"""
+
+COLUMNS = [
+    "id", "user_id", "email", "pickup_address", "destination_address", "pickup_time",
+    "vehicle_name", "passengers", "price", "distance_text", "duration_text",
+    "status", "created_at", "updated_at",
+]
+
+
+def print_booking(booking, output_format="human", event=None):
+    if output_format == "json":
+        record = dict(zip(COLUMNS, booking))
+        if event:
+            record["event"] = event
+        print(json.dumps(record, ensure_ascii=False), flush=True)
+        return
+
+    b_id, user_id, email, origin, dest, pickup, vehicle, passengers, price, distance, duration, status, created, updated = booking
+
+    titulo = {"new": "🆕 Nueva reserva", "updated": "✏️  Reserva actualizada"}.get(event, "🎫 Reserva")
+    print(f"\n{titulo} #{b_id}")
+    print(f"   👤 Usuario: {email} (ID: {user_id})")
+    print(f"   📍 Origen: {origin}")
+    print(f"   🎯 Destino: {dest}")
+    print(f"   🕐 Pickup: {pickup}")
+    print(f"   🚘 Vehículo: {vehicle}")
+    print(f"   👥 Pasajeros: {passengers}")
+    print(f"   💰 Precio: ${price or 0:,.0f} COP")
+    print(f"   📏 Distancia: {distance}")
+    print(f"   ⏱️  Duración: {duration}")
+    print(f"   📌 Estado: {status}")
+    print(f"   🕒 Creada: {created}")
+    if event == "updated":
+        print(f"   🔄 Actualizada: {updated}")
+    print("-" * 80, flush=True)
+
+
+def mostrar_todas():
+    """Modo original: muestra todas las reservas una vez"""
+    print("=" * 80)
+    print("🔄 MONITOREO DE RESERVAS EN TIEMPO REAL")
+    print("=" * 80)
+    print(f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print()
+
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        # Contar reservas
+        cursor.execute("SELECT COUNT(*) FROM vlx_bookings")
+        total = cursor.fetchone()[0]
+
+        print(f"📊 Total de reservas: {total}")
+        print("=" * 80)
+
+        if total > 0:
+            # Mostrar todas las reservas
+            cursor.execute(BOOKINGS_QUERY + " ORDER BY b.created_at DESC")
+
+            for booking in cursor.fetchall():
+                print_booking(booking)
+        else:
+            print("\n⚠️  No hay reservas todavía")
+            print("\n💡 Pasos para probar:")
+            print("   1. Ejecuta la app en el emulador/chrome/windows")
+            print("   2. Haz login con: ampueroelkin@gmail.com")
+            print("   3. Crea una reserva desde la pantalla principal")
+            print("   4. Vuelve a ejecutar este script para ver la reserva")
+
+        conn.close()
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+    print("\n" + "=" * 80)
+    print("✅ Para monitorear continuamente: python monitor_reservas.py --follow")
     print("=" * 80)
-    
-    if total > 0:
-        # Mostrar todas las reservas
-        cursor.execute("""
-            SELECT 
-                b.id,
-                b.user_id,
-                u.email,
-                b.pickup_address,
-                b.destination_address,
-                b.pickup_time,
-                b.vehicle_name,
-                b.passengers,
-                b.price,
-                b.distance_text,
-                b.duration_text,
-                b.status,
-                b.created_at
-            FROM vlx_bookings b
-            LEFT JOIN users u ON b.user_id = u.id
-            ORDER BY b.created_at DESC
-        """)
-        
-        bookings = cursor.fetchall()
-        
-        for booking in bookings:
-            b_id, user_id, email, origin, dest, pickup, vehicle, passengers, price, distance, duration, status, created = booking
-            
-            print(f"\n🎫 Reserva #{b_id}")
-            print(f"   👤 Usuario: {email} (ID: {user_id})")
-            print(f"   📍 Origen: {origin}")
-            print(f"   🎯 Destino: {dest}")
-            print(f"   🕐 Pickup: {pickup}")
-            print(f"   � Vehículo: {vehicle}")
-            print(f"   �👥 Pasajeros: {passengers}")
-            print(f"   💰 Precio: ${price:,.0f} COP")
-            print(f"   📏 Distancia: {distance}")
-            print(f"   ⏱️  Duración: {duration}")
-            print(f"   📌 Estado: {status}")
-            print(f"   🕒 Creada: {created}")
-            print("-" * 80)
+
+
+def seguir(interval, output_format, initial):
+    """
+    Modo --follow: una sola conexión de solo lectura, imprime solo lo nuevo.
+
+    - `PRAGMA data_version` cambia únicamente cuando OTRA conexión hace commit;
+      si no cambió, la vuelta de polling no ejecuta ninguna consulta.
+    - Marca de agua (updated_at, ids ya vistos en ese instante): cada consulta
+      lee solo las filas modificadas desde la última vuelta, usando
+      idx_vlx_bookings_updated (ver vlx_migrations.py).
+    - Sin transacciones abiertas entre vueltas: no compite con la API por el lock.
+    """
+    conn = sqlite3.connect(Path(db_path).resolve().as_uri() + "?mode=ro", uri=True)
+    conn.execute("PRAGMA busy_timeout = 5000")
+
+    if output_format == "human":
+        print("=" * 80)
+        print(f"🔄 SIGUIENDO RESERVAS (cada {interval}s, Ctrl+C para salir)")
+        print("=" * 80)
+
+    # Estado inicial: marca de agua actual + últimas `initial` reservas
+    high_water, max_id = conn.execute(
+        "SELECT COALESCE(MAX(updated_at), ''), COALESCE(MAX(id), 0) FROM vlx_bookings"
+    ).fetchone()
+    seen_at_high_water = {
+        row[0] for row in conn.execute("SELECT id FROM vlx_bookings WHERE updated_at = ?", (high_water,))
+    }
+    if initial > 0:
+        recientes = conn.execute(BOOKINGS_QUERY + " ORDER BY b.id DESC LIMIT ?", (initial,)).fetchall()
+        for booking in reversed(recientes):
+            print_booking(booking, output_format)
+
+    last_version = conn.execute("PRAGMA data_version").fetchone()[0]
+
+    try:
+        while True:
+            time.sleep(interval)
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == last_version:
+                continue
+            last_version = version
+
+            changed = conn.execute(
+                BOOKINGS_QUERY + " WHERE b.updated_at >= ? ORDER BY b.updated_at, b.id",
+                (high_water,),
+            ).fetchall()
+
+            for booking in changed:
+                b_id, updated = booking[0], booking[13]
+                if updated == high_water and b_id in seen_at_high_water:
+                    continue
+                if updated != high_water:
+                    high_water = updated
+                    seen_at_high_water = set()
+                seen_at_high_water.add(b_id)
+
+                event = "new" if b_id > max_id else "updated"
+                max_id = max(max_id, b_id)
+                print_booking(booking, output_format, event)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monitor de reservas VaneLux")
+    parser.add_argument("--db", default=db_path, help="ruta a logistics.db")
+    parser.add_argument("--follow", "-f", action="store_true", help="seguir mostrando reservas nuevas o modificadas")
+    parser.add_argument("--interval", type=float, default=2.0, help="segundos entre consultas en --follow")
+    parser.add_argument("--format", choices=["human", "json"], default="human", help="salida legible o JSON lines (en --follow)")
+    parser.add_argument("--initial", type=int, default=10, help="reservas recientes a mostrar al iniciar --follow")
+    args = parser.parse_args()
+
+    db_path = args.db
+    if args.follow:
+        seguir(args.interval, args.format, args.initial)
     else:
-        print("\n⚠️  No hay reservas todavía")
-        print("\n💡 Pasos para probar:")
-        print("   1. Ejecuta la app en el emulador/chrome/windows")
-        print("   2. Haz login con: ampueroelkin@gmail.com")
-        print("   3. Crea una reserva desde la pantalla principal")
-        print("   4. Vuelve a ejecutar este script para ver la reserva")
-    
-    conn.close()
-    
-except Exception as e:
-    print(f"❌ Error: {e}")
-    import traceback
-    traceback.print_exc()
-
-print("\n" + "=" * 80)
-print("✅ Para monitorear continuamente, ejecuta este script después de cada reserva")
-print("=" * 80)
+        mostrar_todas()
@@ -0,0 +1,81 @@
+"""
+PRUEBAS DE vlx_distance_cache
+=============================
+
+Los requests simultáneos con la misma clave comparten una sola llamada a
+Google, y cancelar al request que la lanzó no deja sin respuesta a los que
+se sumaron.
+
+Uso:
+    python -m pytest -q test_vlx_distance_cache.py
+"""
+
+import asyncio
+
+import pytest
+
+from vlx_distance_cache import DistanceCache, DistanceNotFoundError, FakeDistanceProvider, place_key
+
+JFK = "40.641300,-73.778100"
+MIDTOWN = "40.758000,-73.985500"
+
+
+def test_concurrent_misses_share_one_provider_call():
+    async def scenario():
+        provider = FakeDistanceProvider(latency=(0.05, 0.05))
+        cache = DistanceCache(provider)
+        results = await asyncio.gather(*[cache.get(JFK, MIDTOWN) for _ in range(10)])
+        assert provider.calls == 1
+        assert len({value["distance_meters"] for value, _ in results}) == 1
+        _, source = await cache.get(JFK, MIDTOWN)
+        assert source == "memory"
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert cache.coalesced == 9 and cache.provider_calls == 1
+    assert not cache._inflight
+
+
+def test_cancelling_the_leader_does_not_cancel_waiters():
+    async def scenario():
+        provider = FakeDistanceProvider(latency=(0.05, 0.05))
+        cache = DistanceCache(provider)
+        leader = asyncio.create_task(cache.get(JFK, MIDTOWN))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(cache.get(JFK, MIDTOWN)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*waiters)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert provider.calls == 1
+        assert all(source == "fake" for _, source in results)
+        # La llamada terminó igual y quedó en memoria
+        _, source = await cache.get(JFK, MIDTOWN)
+        assert source == "memory"
+
+    asyncio.run(scenario())
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    async def scenario():
+        provider = FakeDistanceProvider(latency=(0.02, 0.02))
+        cache = DistanceCache(provider)
+        results = await asyncio.gather(
+            *[cache.get("Nowhere Street", MIDTOWN) for _ in range(4)], return_exceptions=True
+        )
+        assert all(isinstance(result, DistanceNotFoundError) for result in results)
+        assert provider.calls == 1 and cache.errors == 1
+        with pytest.raises(DistanceNotFoundError):
+            await cache.get("Nowhere Street", MIDTOWN)
+        assert provider.calls == 2
+        assert not cache._inflight
+
+    asyncio.run(scenario())
+
+
+def test_nearby_points_share_a_key():
+    cache = DistanceCache(None)
+    assert cache.key("40.758000,-73.985500", JFK) == cache.key("40.758010,-73.985510", JFK)
+    assert cache.key(MIDTOWN, JFK, 1_772_456_400) != cache.key(MIDTOWN, JFK)
+    assert place_key("  Times   Square ") == place_key("times square")
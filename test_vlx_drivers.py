@@ -0,0 +1,129 @@
+"""
+PRUEBAS DE vlx_drivers
+======================
+
+`DriverIndex.nearest` debe devolver los mismos k conductores que un
+recorrido completo con los mismos filtros (tier, disponibilidad, TTL y
+radio), tanto por la grilla como por el recorrido directo de tiers chicos.
+
+Uso:
+    python -m pytest -q test_vlx_drivers.py
+"""
+
+import random
+
+import pytest
+
+from vlx_drivers import DRIVER_RADIUS_MAX_MILES, DRIVER_SCAN_MAX, DriverIndex, distance_miles
+
+MIDTOWN = (40.7580, -73.9855)
+
+
+def brute_force(index, lat, lng, k, tier, radius, cutoff):
+    candidates = []
+    for location in index._drivers.values():
+        if not location.available or location.updated_at < cutoff:
+            continue
+        if tier is not None and location.tier != tier:
+            continue
+        miles = distance_miles(lat, lng, location.lat, location.lng)
+        if miles <= radius:
+            candidates.append((miles, location.driver_id))
+    candidates.sort()
+    return candidates[:k]
+
+
+def populated_index(count, seed):
+    rng = random.Random(seed)
+    clock = [0.0]
+    index = DriverIndex(clock=lambda: clock[0])
+    for driver_id in range(count):
+        clock[0] = rng.uniform(0, 200)  # con ttl 120, algunos quedan vencidos
+        index.update(
+            driver_id,
+            MIDTOWN[0] + rng.gauss(0, 0.08),
+            MIDTOWN[1] + rng.gauss(0, 0.08),
+            # tier 4 escaso: se recorre directo, sin la grilla
+            tier=rng.choices(range(5), (5, 3, 2, 1, 0.05))[0],
+            available=rng.random() < 0.7,
+        )
+    clock[0] = 200.0
+    return index, rng
+
+
+@pytest.mark.parametrize("tier", [None, 0, 2, 4])
+@pytest.mark.parametrize("k, radius", [(1, 15.0), (5, 15.0), (20, 2.0)])
+def test_nearest_matches_brute_force(tier, k, radius):
+    index, rng = populated_index(3000, seed=k * 10 + (tier or 0))
+    cutoff = 200.0 - index.ttl
+    for _ in range(150):
+        lat = MIDTOWN[0] + rng.gauss(0, 0.1)
+        lng = MIDTOWN[1] + rng.gauss(0, 0.1)
+        found = index.nearest(lat, lng, k=k, tier=tier, radius_miles=radius)
+        expected = brute_force(index, lat, lng, k, tier, radius, cutoff)
+        assert [location.driver_id for location, _ in found] == [driver_id for _, driver_id in expected]
+        assert [miles for _, miles in found] == pytest.approx([miles for miles, _ in expected])
+
+
+def test_rare_tier_uses_direct_scan():
+    index, _ = populated_index(3000, seed=1)
+    assert len(index._by_tier[4]) <= DRIVER_SCAN_MAX < len(index._by_tier[0])
+    before = index.cells_visited
+    index.nearest(*MIDTOWN, k=3, tier=4)
+    assert index.cells_visited - before == 1
+
+
+def test_update_moves_driver_between_cells():
+    index = DriverIndex()
+    index.update(7, *MIDTOWN, tier=1)
+    index.update(7, 40.6413, -73.7781)
+    assert index.nearest(*MIDTOWN, k=1, radius_miles=2) == []
+    (location, miles), = index.nearest(40.6413, -73.7781, k=1)
+    assert location.driver_id == 7 and location.tier == 1 and miles == pytest.approx(0)
+    assert index.stats()["occupied_cells"] == 1
+
+
+def test_availability_remove_and_purge():
+    clock = [0.0]
+    index = DriverIndex(ttl=120, clock=lambda: clock[0])
+    index.update(1, *MIDTOWN)
+    index.update(2, MIDTOWN[0] + 0.001, MIDTOWN[1])
+
+    index.set_available(1, False)
+    assert [location.driver_id for location, _ in index.nearest(*MIDTOWN, k=5)] == [2]
+    assert {location.driver_id for location, _ in index.nearest(*MIDTOWN, k=5, available_only=False)} == {1, 2}
+
+    assert index.remove(2) and not index.remove(2)
+    assert index.set_available(2, True) is None
+
+    clock[0] = 121
+    assert index.nearest(*MIDTOWN, k=5, available_only=False) == []
+    assert index.purge_stale() == 1
+    assert index.stats()["drivers"] == 0 and index.stats()["occupied_cells"] == 0
+
+
+def test_invalid_coordinates_are_rejected():
+    with pytest.raises(ValueError):
+        DriverIndex().update(1, 91.0, 0.0)
+    assert DriverIndex().nearest(*MIDTOWN, k=0) == []
+
+
+@pytest.mark.parametrize("lat, lng, radius", [
+    (float("nan"), -73.9, 15.0),
+    (40.7, float("inf"), 15.0),
+    (40.7, -181.0, 15.0),
+    (40.7, -73.9, float("inf")),
+    (40.7, -73.9, float("nan")),
+    (40.7, -73.9, 0.0),
+])
+def test_nearest_rejects_non_finite_input_on_the_grid_path(lat, lng, radius):
+    index, _ = populated_index(DRIVER_SCAN_MAX * 4, seed=3)
+    with pytest.raises(ValueError):
+        index.nearest(lat, lng, k=5, radius_miles=radius)
+
+
+def test_nearest_caps_huge_radius():
+    index, _ = populated_index(DRIVER_SCAN_MAX * 4, seed=4)
+    # Con menos de k conductores el recorrido por anillos llegaría hasta el radio
+    found = index.nearest(*MIDTOWN, k=10_000, radius_miles=1e9)
+    assert found and all(miles <= DRIVER_RADIUS_MAX_MILES for _, miles in found)
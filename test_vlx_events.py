@@ -0,0 +1,173 @@
+"""
+PRUEBAS DE vlx_events
+=====================
+
+El historial para Last-Event-ID cubre solo la ventana de reconexión: no
+crece con usuarios que no están conectados. Un cambio de estado, hecho por
+la API o por otro proceso, le llega al suscriptor una sola vez.
+
+Uso:
+    python -m pytest -q test_vlx_events.py
+"""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from vlx_db_pool import SQLitePool
+from vlx_events import BookingChangeFeed, BookingEventBus
+from vlx_migrations import create_schema
+from vlx_repository import AsyncDatabase, BookingRepository
+
+
+def make_bus(**kwargs):
+    clock = [0.0]
+    return BookingEventBus(clock=lambda: clock[0], **kwargs), clock
+
+
+def test_idle_history_expires_after_ttl():
+    bus, clock = make_bus(history_ttl=60)
+    first = bus.publish(1, "booking.updated", {"id": 10})
+    bus.publish(1, "booking.updated", {"id": 11})
+    assert [item[2]["id"] for item in bus._replay(1, first - 1)] == [10, 11]
+
+    clock[0] = 61
+    bus.publish(2, "booking.updated", {"id": 20})
+    assert bus._replay(1, first - 1) == []
+    assert list(bus._history) == [2]
+
+
+def test_replay_does_not_create_history():
+    bus, _ = make_bus()
+    assert bus._replay(42, 0) == []
+    assert bus._replay(42, None) == []
+    assert bus.stats()["history_users"] == 0
+
+
+def test_history_is_capped_by_users():
+    bus, clock = make_bus(history_users=3)
+    for user_id in range(10):
+        clock[0] += 1
+        bus.publish(user_id, "booking.updated", {"id": user_id})
+    assert list(bus._history) == [7, 8, 9]
+
+
+def test_connected_users_keep_their_history():
+    async def scenario():
+        bus, clock = make_bus(history_ttl=60)
+        first = bus.publish(1, "booking.created", {"id": 1})
+        stream = bus.stream(1, last_event_id=first - 1, heartbeat=0.01)
+        assert (await stream.__anext__()).startswith("retry:")
+        assert "booking.created" in await stream.__anext__()
+
+        # Conectado: pasado el TTL, otro publish no le borra el historial
+        clock[0] = 120
+        bus.publish(2, "booking.created", {"id": 2})
+        assert 1 in bus._history
+
+        # Se desconecta: la ventana de reconexión cuenta desde ese momento
+        await stream.aclose()
+        clock[0] = 170
+        bus.publish(3, "booking.created", {"id": 3})
+        assert [item[2]["id"] for item in bus._replay(1, first - 1)] == [1]
+        clock[0] = 250
+        bus.publish(3, "booking.updated", {"id": 3})
+        assert 1 not in bus._history and 2 not in bus._history
+        assert bus.stats()["subscribers"] == 0
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "logistics.db")
+    conn = sqlite3.connect(path)
+    create_schema(conn)
+    conn.execute("""
+        INSERT INTO vlx_bookings (user_id, pickup_address, destination_address, pickup_time, updated_at)
+        VALUES (7, 'Times Square', 'JFK Airport', '2026-03-02T13:10:00Z', '2026-03-01 10:00:00')
+    """)
+    conn.commit()
+    conn.close()
+    return path
+
+
+async def next_event(stream):
+    while True:
+        chunk = await asyncio.wait_for(stream.__anext__(), timeout=1)
+        if chunk.startswith("id:"):
+            return chunk
+
+
+def test_status_update_reaches_subscriber_once(database):
+    async def scenario():
+        bus = BookingEventBus()
+        feed = BookingChangeFeed(bus, database)
+        feed.poll()
+        pool = SQLitePool(database, size=1)
+        repo = BookingRepository(AsyncDatabase(pool))
+        stream = bus.stream(7, heartbeat=0.01)
+        assert (await stream.__anext__()).startswith("retry:")
+
+        booking = await repo.update_status(1, "confirmed")
+        bus.publish_booking(booking, "booking.updated")
+        event = await next_event(stream)
+        assert "event: booking.updated" in event and '"confirmed"' in event
+
+        # El feed ve el mismo commit (otra conexión) pero esa versión ya se publicó
+        assert feed.poll() == 0
+        assert bus.stats()["published"] == 1
+
+        with pytest.raises(ValueError):
+            await repo.update_status(1, "lost")
+        assert await repo.update_status(99, "confirmed") is None
+        await stream.aclose()
+        repo.db.close()
+        pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_feed_publishes_changes_from_other_processes(database):
+    async def scenario():
+        bus = BookingEventBus()
+        feed = BookingChangeFeed(bus, database)
+        assert feed.poll() == 0  # marca de agua inicial: lo existente no es un cambio
+        assert feed.poll() == 0
+
+        stream = bus.stream(7, heartbeat=0.01)
+        assert (await stream.__anext__()).startswith("retry:")
+
+        # Como el panel admin o un script: otra conexión, sin pasar por la API
+        conn = sqlite3.connect(database)
+        conn.execute("UPDATE vlx_bookings SET status = 'assigned', updated_at = '2026-03-01 10:05:00' WHERE id = 1")
+        conn.execute("""
+            INSERT INTO vlx_bookings (user_id, pickup_address, destination_address, pickup_time, updated_at)
+            VALUES (7, 'LaGuardia Airport', 'Midtown', '2026-03-03T09:00:00Z', '2026-03-01 10:05:00')
+        """)
+        conn.commit()
+
+        assert feed.poll() == 2
+        updated, created = await next_event(stream), await next_event(stream)
+        assert "event: booking.updated" in updated and "assigned" in updated
+        assert "event: booking.created" in created and "LaGuardia" in created
+        assert feed.poll() == 0
+
+        conn.execute("UPDATE vlx_bookings SET status = 'completed', updated_at = '2026-03-01 10:05:00' WHERE id = 1")
+        conn.commit()
+        conn.close()
+        # Mismo updated_at que la marca de agua, pero otro estado: es un cambio nuevo
+        assert feed.poll() == 1
+        assert "completed" in await next_event(stream)
+        await stream.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_feed_thread_starts_and_stops(database):
+    bus = BookingEventBus()
+    feed = BookingChangeFeed(bus, database, interval=0.01)
+    feed.start()
+    feed.close()
+    assert feed.errors == 0 and feed._conn is None
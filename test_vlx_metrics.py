@@ -0,0 +1,70 @@
+"""
+PRUEBAS DE vlx_metrics
+======================
+
+Gauges y contadores leídos al momento del scrape, y la espera en la cola
+de hashing medida aparte del tiempo de bcrypt.
+
+Uso:
+    python -m pytest -q test_vlx_metrics.py
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from vlx_metrics import Metrics
+
+
+def sample(text, name):
+    """Valor de una serie sin labels en la exposición de texto"""
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.split()[1])
+    raise AssertionError(f"{name} no está en /metrics")
+
+
+def test_gauges_and_counters_are_read_at_scrape_time():
+    metrics = Metrics()
+    state = {"queued": 0, "hits": 0}
+    metrics.gauge("vlx_test_queue_depth", "Cola de prueba", lambda: state["queued"])
+    metrics.counter("vlx_test_hits_total", "Aciertos de prueba", lambda: state["hits"])
+
+    text = metrics.render()
+    assert "# TYPE vlx_test_queue_depth gauge" in text
+    assert "# TYPE vlx_test_hits_total counter" in text
+    assert sample(text, "vlx_test_queue_depth") == 0
+
+    state.update(queued=3, hits=41)
+    text = metrics.render()
+    assert sample(text, "vlx_test_queue_depth") == 3
+    assert sample(text, "vlx_test_hits_total") == 41
+
+
+def test_hash_queue_wait_is_not_counted_as_bcrypt_time():
+    pytest.importorskip("passlib")
+    from vlx_hashing import PasswordHasher
+
+    metrics = Metrics()
+    hasher = PasswordHasher(kind="thread", workers=1, metrics=metrics)
+    metrics.gauge("vlx_hash_queue_depth", "", lambda: hasher.queued)
+    metrics.gauge("vlx_hash_inflight", "", lambda: hasher.in_flight)
+
+    async def scenario():
+        tasks = [asyncio.create_task(hasher._run("verify", time.sleep, 0.1)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        text = metrics.render()
+        assert sample(text, "vlx_hash_queue_depth") == 1
+        assert sample(text, "vlx_hash_inflight") == 1
+        await asyncio.gather(*tasks)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        hasher.shutdown()
+    stats = metrics.stats()
+    bcrypt = stats["vlx_bcrypt_verify_seconds"]
+    assert bcrypt["count"] == 2 and bcrypt["avg_ms"] < 150
+    # El segundo esperó al primero en cola: esa espera va a su propio histograma
+    assert stats["vlx_hash_queue_wait_seconds{verify}"]["count"] == 2
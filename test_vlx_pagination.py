@@ -0,0 +1,52 @@
+"""
+PRUEBAS DE vlx_pagination
+=========================
+
+Validación de `page` / `page_size` (el listado responde 400 en lugar de
+llegar al SQL) y armado del `next_cursor` a partir de la fila extra.
+
+Uso:
+    python -m pytest -q test_vlx_pagination.py
+"""
+
+import pytest
+
+from vlx_pagination import PAGE_SIZE_MAX, check_page, decode_cursor, encode_cursor, next_page
+
+
+def rows(count):
+    return [{"id": 100 - i, "created_at": f"2026-03-01T10:{i:02d}:00"} for i in range(count)]
+
+
+@pytest.mark.parametrize("page, page_size", [(1, 1), (3, 50), (1, PAGE_SIZE_MAX)])
+def test_valid_pages(page, page_size):
+    check_page(page, page_size)
+
+
+@pytest.mark.parametrize("page, page_size", [(1, 0), (1, -5), (0, 50), (-1, 50), (1, PAGE_SIZE_MAX + 1)])
+def test_invalid_pages_are_rejected(page, page_size):
+    with pytest.raises(ValueError):
+        check_page(page, page_size)
+
+
+def test_next_page_with_extra_row():
+    page, cursor = next_page(rows(4), 3)
+    assert [row["id"] for row in page] == [100, 99, 98]
+    assert decode_cursor(cursor) == ("2026-03-01T10:02:00", 98)
+
+
+@pytest.mark.parametrize("count", [0, 2, 3])
+def test_last_page_has_no_cursor(count):
+    page, cursor = next_page(rows(count), 3)
+    assert len(page) == count and cursor is None
+
+
+def test_zero_page_size_does_not_index_an_empty_page():
+    # page_size=0 con LIMIT 1 devolvía una fila, se cortaba a [] y se leía [-1]
+    assert next_page(rows(1), 0) == ([], None)
+
+
+def test_cursor_round_trip_and_garbage():
+    assert decode_cursor(encode_cursor("2026-03-01T10:00:00", 7)) == ("2026-03-01T10:00:00", 7)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
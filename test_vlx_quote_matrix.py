@@ -0,0 +1,87 @@
+"""
+PRUEBAS DE vlx_quote_matrix
+===========================
+
+La matriz debe dar, par por par, lo mismo que el camino escalar de
+vlx_pricing (port directo de PricingService), y rechazar entradas inválidas
+antes de emitir la primera línea del stream.
+
+Uso:
+    python -m pytest -q test_vlx_quote_matrix.py
+"""
+
+import json
+import math
+import random
+
+import numpy as np
+import pytest
+
+from vlx_pricing import EWR, JFK, LGA, classify_route, haversine_miles, price_route
+from vlx_quote_matrix import as_points, iter_matrix_blocks, iter_matrix_ndjson
+
+
+def random_points(count, seed):
+    rng = random.Random(seed)
+    anchors = [JFK, LGA, EWR, (40.758, -73.9855), (40.7128, -74.0060), (40.85, -73.87), (41.05, -73.75)]
+    return [
+        [anchor[0] + rng.uniform(-0.04, 0.04), anchor[1] + rng.uniform(-0.04, 0.04)]
+        for anchor in (rng.choice(anchors) for _ in range(count))
+    ]
+
+
+def test_blocks_match_scalar_pricing():
+    pickups, destinations = random_points(23, 1), random_points(17, 2)
+    seen_rows = 0
+    # chunk_pairs chico: fuerza varios bloques y un bloque final incompleto
+    for start, distances, routes, prices in iter_matrix_blocks(
+        pickups, destinations, multiplier=1.2, is_return_trip=True, road_factor=1.3, chunk_pairs=50
+    ):
+        for offset in range(len(routes)):
+            p = pickups[start + offset]
+            for j, d in enumerate(destinations):
+                miles = float(haversine_miles(p[0], p[1], d[0], d[1])) * 1.3
+                route = classify_route(p[0], p[1], d[0], d[1])
+                assert routes[offset, j] == route
+                assert distances[offset, j] == pytest.approx(miles)
+                assert prices[offset, j].tolist() == pytest.approx(price_route(route, miles, 1.2, True))
+        seen_rows += len(routes)
+    assert seen_rows == len(pickups)
+
+
+def test_ndjson_has_header_and_one_line_per_pickup():
+    pickups, destinations = random_points(5, 3), random_points(4, 4)
+    lines = b"".join(iter_matrix_ndjson(pickups, destinations, tiers=["sedan", "escalade"], chunk_pairs=8))
+    records = [json.loads(line) for line in lines.splitlines()]
+    header, rows = records[0], records[1:]
+    assert header["pickups"] == 5 and header["destinations"] == 4
+    assert header["tiers"] == ["sedan", "escalade"]
+    assert len(header["pickup_zones"]) == 5 and len(header["destination_zones"]) == 4
+    assert [row["pickup"] for row in rows] == list(range(5))
+    assert all(len(row["prices"]["escalade"]) == 4 for row in rows)
+
+
+@pytest.mark.parametrize("pickups, destinations", [
+    ([], [[40.64, -73.78]]),
+    ([[40.75, -73.98]], []),
+    ([[float("nan"), -73.98]], [[40.64, -73.78]]),
+    ([[40.75, -73.98]], [[40.64, math.inf]]),
+    ([[40.75, -73.98, 1.0]], [[40.64, -73.78]]),
+    ([[40.75]], [[40.64, -73.78]]),
+])
+def test_invalid_points_fail_before_streaming(pickups, destinations):
+    # El error tiene que salir al llamar, no al recorrer: el endpoint
+    # responde 400 antes de crear el StreamingResponse
+    with pytest.raises(ValueError):
+        iter_matrix_ndjson(pickups, destinations)
+
+
+def test_unknown_tier_fails_before_streaming():
+    with pytest.raises(ValueError):
+        iter_matrix_ndjson([[40.75, -73.98]], [[40.64, -73.78]], tiers=["limo"])
+
+
+def test_as_points_accepts_valid_pairs():
+    points = as_points([[40.75, -73.98], [40.64, -73.78]])
+    assert points.shape == (2, 2)
+    assert np.isfinite(points).all()
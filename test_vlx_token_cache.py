@@ -0,0 +1,46 @@
+"""
+PRUEBAS DE vlx_token_cache
+==========================
+
+Aciertos, fallos y vencimientos del cache de tokens, y su exposición como
+contadores en /metrics.
+
+Uso:
+    python -m pytest -q test_vlx_token_cache.py
+"""
+
+from vlx_metrics import Metrics
+from vlx_token_cache import TokenCache
+
+
+def test_hits_misses_and_expiry():
+    clock = [1000.0]
+    cache = TokenCache(maxsize=2, ttl=60, clock=lambda: clock[0])
+    assert cache.get("a") is None
+    cache.put("a", {"user_id": 1})
+    assert cache.get("a") == {"user_id": 1}
+    # exp del propio token antes que el TTL
+    cache.put("b", {"user_id": 2, "exp": 1010})
+    clock[0] = 1011
+    assert cache.get("b") is None
+    cache.put("c", {"user_id": 3})
+    cache.put("d", {"user_id": 4})
+    assert cache.stats() | {"hit_ratio": None} == {
+        "size": 2, "maxsize": 2, "hits": 1, "misses": 2, "hit_ratio": None,
+        "evictions": 1, "expirations": 1,
+    }
+
+
+def test_counters_rendered_on_metrics():
+    cache = TokenCache()
+    metrics = Metrics()
+    metrics.counter("vlx_token_cache_hits_total", "Tokens JWT servidos desde el cache", lambda: cache.hits)
+    metrics.counter("vlx_token_cache_misses_total", "Tokens JWT que hubo que decodificar", lambda: cache.misses)
+    cache.put("t", {"user_id": 1})
+    for _ in range(3):
+        cache.get("t")
+    cache.get("otro")
+    text = metrics.render()
+    assert "# TYPE vlx_token_cache_hits_total counter" in text
+    assert "vlx_token_cache_hits_total 3" in text.splitlines()
+    assert "vlx_token_cache_misses_total 1" in text.splitlines()
@@ -0,0 +1,124 @@
+"""
+PRUEBAS DE vlx_toll_table
+=========================
+
+Geocercas de cada cruce en cada sentido, reglas por pares de zonas y la
+búsqueda escalar de zonas de vlx_zones contra la vectorizada.
+
+Uso:
+    python -m pytest -q test_vlx_toll_table.py
+"""
+
+import numpy as np
+import pytest
+
+from vlx_toll_table import FACILITIES, TOLL_TABLE_VERSION, TollModel
+from vlx_tolls import TollRequest
+from vlx_zones import default_index
+
+OFF_PEAK = "2026-03-03T04:00:00Z"  # martes 23:00 en Nueva York
+PEAK = "2026-03-03T13:00:00Z"  # martes 8:00 en Nueva York
+
+MIDTOWN = (40.7580, -73.9855)
+JFK = (40.6413, -73.7781)
+LGA = (40.7769, -73.8740)
+EWR = (40.6895, -74.1745)
+PARK_SLOPE = (40.6720, -73.9778)
+MARINE_PARK = (40.6030, -73.9200)
+ROCKAWAY = (40.5830, -73.8200)
+WESTERLEIGH = (40.6200, -74.1000)
+NEW_DORP = (40.5730, -74.1160)
+JERSEY_CITY = (40.7178, -74.0431)
+FORDHAM = (40.8610, -73.8900)
+
+
+@pytest.fixture(scope="module")
+def model():
+    return TollModel()
+
+
+def zone_request(origin, destination, departure=OFF_PEAK, vehicle="2AxlesAuto"):
+    return TollRequest.from_payload({
+        "origin": f"{origin[0]:.6f},{origin[1]:.6f}",
+        "destination": f"{destination[0]:.6f},{destination[1]:.6f}",
+        "vehicle": {"type": vehicle},
+        "departureTime": departure,
+    })
+
+
+def crossing_cases():
+    for facility in FACILITIES:
+        for entry, entry_ring in facility.approaches:
+            for exit, exit_ring in facility.approaches:
+                if entry != exit:
+                    yield pytest.param(facility, entry, entry_ring, exit, exit_ring, id=f"{facility.key}:{entry}>{exit}")
+
+
+@pytest.mark.parametrize("facility, entry, entry_ring, exit, exit_ring", list(crossing_cases()))
+def test_polyline_detects_each_crossing_and_direction(model, facility, entry, entry_ring, exit, exit_ring):
+    a, b = np.mean(entry_ring, axis=0), np.mean(exit_ring, axis=0)
+    direction = (b - a) / np.linalg.norm(b - a) * 0.0045
+    polyline = [list(a - direction), list(a), list(b), list(b + direction)]
+    request = TollRequest.from_payload({
+        "origin": "a", "destination": "b", "polyline": polyline, "departureTime": OFF_PEAK,
+    })
+    result = model.estimate(request)
+    toll = facility.toll(entry, exit, "auto", False)
+    assert result is not None and result["match"] == "polyline"
+    assert result["crossings"] == [{"facilities": [facility.key], "from": entry, "to": exit, "toll": toll}]
+    assert result["toll_cost"] == round(toll, 2)
+    assert result["toll_table_version"] == TOLL_TABLE_VERSION
+
+
+def test_polyline_leaving_covered_zones_goes_to_provider(model):
+    # Midtown -> Filadelfia: NJ Turnpike, fuera de la tabla
+    request = TollRequest.from_payload({
+        "origin": "a", "destination": "b", "polyline": [list(MIDTOWN), [40.7605, -74.0020], [39.9526, -75.1652]],
+    })
+    assert model.estimate(request) is None
+
+
+@pytest.mark.parametrize("origin, destination, facilities, toll", [
+    (MIDTOWN, MIDTOWN, [], 0.0),
+    (JFK, LGA, [], 0.0),
+    (PARK_SLOPE, JFK, [], 0.0),
+    (MARINE_PARK, JFK, [], 0.0),  # sur de Brooklyn: Belt Parkway, sin Marine Parkway
+    (PARK_SLOPE, NEW_DORP, [["verrazzano"]], 6.94),
+    (NEW_DORP, PARK_SLOPE, [["verrazzano"]], 0.0),
+    (JFK, WESTERLEIGH, [["verrazzano"]], 6.94),
+    (WESTERLEIGH, LGA, [["verrazzano"]], 0.0),
+    (FORDHAM, LGA, [["whitestone", "throgs_neck", "rfk"]], 6.94),
+    (JERSEY_CITY, MIDTOWN, [["holland", "lincoln"]], 14.06),
+    (MIDTOWN, JERSEY_CITY, [["holland", "lincoln"]], 0.0),
+    (EWR, EWR, [], 0.0),
+])
+def test_zone_rules(model, origin, destination, facilities, toll):
+    result = model.estimate(zone_request(origin, destination))
+    assert result is not None and result["match"] == "zones"
+    assert [crossing["facilities"] for crossing in result["crossings"]] == facilities
+    assert result["toll_cost"] == toll
+
+
+@pytest.mark.parametrize("origin, destination", [
+    (MIDTOWN, JFK),  # Queens-Midtown o Queensboro
+    (MIDTOWN, PARK_SLOPE),  # Hugh Carey o puentes gratis
+    (EWR, MIDTOWN),  # NJ Turnpike
+    (ROCKAWAY, JFK),  # Cross Bay según el punto exacto
+])
+def test_ambiguous_pairs_go_to_provider(model, origin, destination):
+    assert model.estimate(zone_request(origin, destination)) is None
+
+
+def test_port_authority_peak_and_vehicle_classes(model):
+    assert model.estimate(zone_request(JERSEY_CITY, MIDTOWN, departure=PEAK))["toll_cost"] == 16.06
+    assert model.estimate(zone_request(JERSEY_CITY, MIDTOWN, vehicle="2AxlesBus"))["toll_cost"] == 38.00
+    assert model.estimate(zone_request(JERSEY_CITY, MIDTOWN, vehicle="3AxlesTruck")) is None
+
+
+def test_scalar_zone_lookup_matches_vectorized():
+    index = default_index()
+    rng = np.random.default_rng(7)
+    lat = rng.uniform(40.40, 41.20, 20000)
+    lng = rng.uniform(-74.40, -73.60, 20000)
+    expected = index.lookup_many(lat, lng)
+    assert [index.lookup_index(a, b) for a, b in zip(lat.tolist(), lng.tolist())] == expected.tolist()
@@ -0,0 +1,165 @@
+"""
+PRUEBAS DE vlx_tolls
+====================
+
+El body que recibe /api/tolls tiene que llegar a TollGuru con los mismos
+lugares (address / placeId / lat-lng) que mandaría tolls.js, y el cache
+tiene que distinguir tipos de lugar y unir llamadas simultáneas.
+
+Uso:
+    python -m pytest -q test_vlx_tolls.py
+"""
+
+import asyncio
+import io
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from vlx_tolls import FakeTollProvider, TollGuruProvider, TollProviderError, TollRequest, TollService, decode_polyline
+
+
+def test_place_id_round_trips_unchanged():
+    request = TollRequest.from_payload({
+        "from": {"placeId": "ChIJOwg_06VPwokRYv534QaPC8g"},
+        "to": {"address": "JFK Airport"},
+        "waypoints": [{"lat": 40.75, "lng": -73.98}],
+        "departureTime": "2026-03-02T13:10:00Z",
+    })
+    payload = request.tollguru_payload()
+    assert payload["from"] == {"placeId": "ChIJOwg_06VPwokRYv534QaPC8g"}
+    assert payload["to"] == {"address": "JFK Airport"}
+    assert payload["waypoints"] == [{"lat": 40.75, "lng": -73.98}]
+    assert payload["departureTime"] == "2026-03-02T13:10:00Z"
+
+
+@pytest.mark.parametrize("place, expected", [
+    ({"address": "Times Square, New York"}, {"address": "Times Square, New York"}),
+    ({"placeId": "ChIJmQJIxlVYwokRLgeuocVOGVU"}, {"placeId": "ChIJmQJIxlVYwokRLgeuocVOGVU"}),
+    ({"lat": 40.6413, "lng": -73.7781}, {"lat": 40.6413, "lng": -73.7781}),
+    ("40.6413,-73.7781", {"lat": 40.6413, "lng": -73.7781}),
+    ("Newark Liberty International Airport", {"address": "Newark Liberty International Airport"}),
+])
+def test_each_place_kind_keeps_its_field(place, expected):
+    request = TollRequest.from_payload({"origin": place, "destination": "LaGuardia Airport"})
+    assert request.tollguru_payload()["from"] == expected
+
+
+def test_cache_key_includes_place_kind():
+    as_address = TollRequest.from_payload({"from": {"address": "ChIJ123"}, "to": "JFK Airport"})
+    as_place_id = TollRequest.from_payload({"from": {"placeId": "ChIJ123"}, "to": "JFK Airport"})
+    assert as_address.cache_key() != as_place_id.cache_key()
+
+
+def test_cache_key_ignores_gps_noise_but_not_polyline():
+    body = {"origin": "40.758000,-73.985500", "destination": "JFK Airport", "departureTime": "2026-03-02T13:10:00Z"}
+    noisy = {**body, "origin": "40.758010,-73.985510"}
+    with_polyline = {**body, "polyline": [[40.758, -73.9855], [40.6413, -73.7781]]}
+    key = TollRequest.from_payload(body).cache_key()
+    assert TollRequest.from_payload(noisy).cache_key() == key
+    assert TollRequest.from_payload(with_polyline).cache_key() != key
+
+
+def test_missing_endpoints_and_bad_polyline_are_rejected():
+    with pytest.raises(ValueError):
+        TollRequest.from_payload({"origin": "JFK Airport"})
+    with pytest.raises(ValueError):
+        TollRequest.from_payload({"origin": "a", "destination": "b", "polyline": "_p~iF~ps|U_ulLnnqC_mqNvxq"})
+
+
+def test_decode_polyline_reference_example():
+    # Ejemplo de la documentación de Google
+    assert decode_polyline("_p~iF~ps|U_ulLnnqC_mqNvxq`@") == [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+
+
+def test_service_coalesces_and_serves_from_cache():
+    async def scenario():
+        provider = FakeTollProvider(latency=0.05)
+        service = TollService(provider)
+        request = TollRequest.from_payload({"origin": {"placeId": "ChIJ1"}, "destination": "JFK Airport"})
+        results = await asyncio.gather(*[service.get(request) for _ in range(10)])
+        assert provider.calls == 1
+        assert sorted(state for _, state in results) == ["coalesced"] * 9 + ["miss"]
+        _, state = await service.get(request)
+        assert state == "fresh"
+        return service.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["upstream_calls"] == 1
+    assert stats["upstream_calls_avoided"] == 10
+
+
+def test_service_serves_stale_when_provider_fails():
+    async def scenario():
+        clock = [0.0]
+        provider = FakeTollProvider()
+        service = TollService(provider, clock=lambda: clock[0])
+        request = TollRequest.from_payload({"origin": "JFK Airport", "destination": "LaGuardia Airport"})
+        first, _ = await service.get(request)
+        clock[0] += service.ttl + 1
+        provider.fail = True
+        result, state = await service.get(request)
+        assert state == "stale" and result["stale"] is True
+        assert result["toll_cost"] == first["toll_cost"]
+        service.clear()
+        with pytest.raises(TollProviderError):
+            await service.get(request)
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("waypoints", [5, "JFK", {"address": "JFK"}, None, True])
+def test_non_list_waypoints_are_ignored(waypoints):
+    request = TollRequest.from_payload({"origin": "Times Square", "destination": "JFK Airport", "waypoints": waypoints})
+    assert request.waypoints == ()
+    assert "waypoints" not in request.tollguru_payload()
+
+
+@pytest.mark.parametrize("place", [
+    {"lat": "nan", "lng": -73.78},
+    {"lat": 40.64, "lng": "inf"},
+    {"lat": "-Infinity", "lng": -73.78},
+    {"lat": 91, "lng": -73.78},
+    {"lat": 40.64, "lng": -181},
+])
+def test_non_finite_or_out_of_range_coordinates_are_rejected(place):
+    with pytest.raises(ValueError):
+        TollRequest.from_payload({"origin": place, "destination": "JFK Airport"})
+    # Un waypoint inválido se descarta; el payload sigue siendo JSON estricto
+    request = TollRequest.from_payload({"origin": "Times Square", "destination": "JFK Airport", "waypoints": [place]})
+    assert request.waypoints == ()
+    json.dumps(request.tollguru_payload(), allow_nan=False)
+
+
+def test_address_wins_over_bad_coordinates():
+    request = TollRequest.from_payload({"origin": {"address": "Times Square", "lat": "nan", "lng": 1}, "destination": "JFK"})
+    assert request.tollguru_payload()["from"] == {"address": "Times Square"}
+
+
+class FakeResponse(io.BytesIO):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@pytest.mark.parametrize("body", [b"[]", b'["OK"]', b"42", b'"OK"', b"null"])
+def test_tollguru_non_object_response_is_a_provider_error(monkeypatch, body):
+    monkeypatch.setattr(urllib.request, "urlopen", lambda *args, **kwargs: FakeResponse(body))
+    request = TollRequest.from_payload({"origin": "Times Square", "destination": "JFK Airport"})
+    with pytest.raises(TollProviderError, match="Unexpected TollGuru response"):
+        TollGuruProvider("key")._post(request)
+
+
+def test_tollguru_http_error_with_non_object_body(monkeypatch):
+    def urlopen(*args, **kwargs):
+        raise urllib.error.HTTPError("https://tollguru", 403, "Forbidden", {}, io.BytesIO(b"[1, 2]"))
+
+    monkeypatch.setattr(urllib.request, "urlopen", urlopen)
+    request = TollRequest.from_payload({"origin": "Times Square", "destination": "JFK Airport"})
+    with pytest.raises(TollProviderError) as excinfo:
+        TollGuruProvider("key")._post(request)
+    assert excinfo.value.status_code == 403
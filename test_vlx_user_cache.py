@@ -0,0 +1,74 @@
+"""
+PRUEBAS DE vlx_user_cache
+=========================
+
+Invalidación del cache de usuarios desde el router y desde los scripts de
+administración (notify_user_changed contra un backend local de prueba).
+
+Uso:
+    python -m pytest -q test_vlx_user_cache.py
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from vlx_user_cache import CachedUser, UserCache, notify_user_changed
+
+
+def make_user(user_id=1, email="tumama@gmail.com", username="tumama"):
+    return CachedUser.from_row({
+        "id": user_id, "username": username, "email": email, "password_hash": "x",
+        "roles": '["passenger"]', "allowed_apps": '["vanelux"]', "status": "active",
+    })
+
+
+def test_invalidate_by_any_key():
+    cache = UserCache()
+    for key in ({"user_id": 1}, {"email": "tumama@gmail.com"}, {"username": "tumama"}):
+        cache.put(make_user())
+        assert cache.invalidate(**key)
+        assert cache.get_by_id(1) is None
+        assert cache.get_by_login("tumama@gmail.com") is None
+    assert not cache.invalidate(email="nadie@example.com")
+
+
+@pytest.fixture
+def backend():
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.append((self.path, self.headers["Authorization"], json.loads(body)))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b'{"invalidated": true}')
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", received
+    server.shutdown()
+    server.server_close()
+
+
+def test_notify_user_changed_posts_to_the_router(backend):
+    url, received = backend
+    assert notify_user_changed(email="tumama@gmail.com", backend_url=url + "/", token="secret")
+    assert received == [(
+        "/api/vlx/admin/users/cache/invalidate", "Bearer secret", {"email": "tumama@gmail.com"},
+    )]
+
+
+def test_notify_user_changed_without_token_or_backend(backend):
+    url, received = backend
+    assert not notify_user_changed(email="tumama@gmail.com", backend_url=url, token="")
+    assert received == []
+    assert not notify_user_changed(email="tumama@gmail.com", backend_url="http://127.0.0.1:9", token="secret", timeout=1)
@@ -0,0 +1,187 @@
+"""
+POOL DE CONEXIONES SQLITE PARA EL ROUTER VANELUX
+================================================
+
+Reemplaza el `sqlite3.connect(DATABASE_PATH)` por request de los endpoints.
+Las conexiones se abren una sola vez, se configuran con los PRAGMAs de
+rendimiento (WAL, synchronous=NORMAL, mmap, cache, busy_timeout) y se
+reutilizan entre requests, así login, create_booking y get_bookings no pagan
+la apertura del archivo ni el calentamiento del page cache en cada llamada.
+
+Copiar este archivo junto al main.py del backend.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional, Sequence, Tuple, Type
+
+# ==============================================================================
+# CONFIGURACIÓN
+# ==============================================================================
+
+DEFAULT_POOL_SIZE = int(os.getenv("VLX_DB_POOL_SIZE", "8"))
+DEFAULT_ACQUIRE_TIMEOUT = float(os.getenv("VLX_DB_POOL_TIMEOUT", "10"))
+
+# PRAGMAs aplicados a cada conexión nueva del pool
+DEFAULT_PRAGMAS: Sequence[Tuple[str, object]] = (
+    ("journal_mode", "WAL"),            # lectores no bloquean al escritor
+    ("synchronous", "NORMAL"),          # seguro con WAL, un fsync por checkpoint
+    ("mmap_size", 256 * 1024 * 1024),   # 256 MB mapeados en memoria
+    ("cache_size", -64 * 1024),         # negativo = KiB -> 64 MB de page cache
+    ("busy_timeout", 5000),             # ms esperando el lock antes de fallar
+    ("temp_store", "MEMORY"),
+)
+
+
+class PoolTimeoutError(RuntimeError):
+    """No hubo conexión libre dentro del timeout configurado"""
+
+
+# ==============================================================================
+# CONEXIONES
+# ==============================================================================
+
+def configure_connection(conn: sqlite3.Connection, pragmas: Sequence[Tuple[str, object]] = DEFAULT_PRAGMAS) -> sqlite3.Connection:
+    """Aplica los PRAGMAs de rendimiento a una conexión"""
+    for name, value in pragmas:
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def connect(
+    database: str,
+    pragmas: Sequence[Tuple[str, object]] = DEFAULT_PRAGMAS,
+    factory: Type[sqlite3.Connection] = sqlite3.Connection,
+) -> sqlite3.Connection:
+    """
+    Abre una conexión configurada (row_factory=Row, usable desde cualquier hilo).
+    `factory` permite conexiones instrumentadas (ver vlx_slow_queries.py).
+    """
+    # check_same_thread=False: FastAPI resuelve las dependencias en su
+    # threadpool, así que una conexión puede cambiar de hilo entre requests.
+    # El pool garantiza que nunca la usen dos requests a la vez.
+    conn = sqlite3.connect(database, check_same_thread=False, factory=factory)
+    conn.row_factory = sqlite3.Row
+    return configure_connection(conn, pragmas)
+
+
+# ==============================================================================
+# POOL
+# ==============================================================================
+
+class SQLitePool:
+    """
+    Pool acotado de conexiones SQLite.
+
+    Las conexiones se crean bajo demanda hasta `size`. Las libres se guardan
+    en una pila (LIFO) para reutilizar primero la conexión con el cache más
+    caliente. Si todas están ocupadas, `acquire` espera hasta `timeout`.
+    """
+
+    def __init__(
+        self,
+        database: str,
+        size: int = DEFAULT_POOL_SIZE,
+        timeout: float = DEFAULT_ACQUIRE_TIMEOUT,
+        pragmas: Sequence[Tuple[str, object]] = DEFAULT_PRAGMAS,
+        factory: Type[sqlite3.Connection] = sqlite3.Connection,
+    ):
+        if size < 1:
+            raise ValueError("El tamaño del pool debe ser >= 1")
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = pragmas
+        self.factory = factory
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def _new_connection(self) -> sqlite3.Connection:
+        return connect(self.database, self.pragmas, self.factory)
+
+    def acquire(self, timeout: Optional[float] = None) -> sqlite3.Connection:
+        """Saca una conexión del pool (crea una nueva si aún no se llegó a `size`)"""
+        if self._closed:
+            raise RuntimeError("El pool está cerrado")
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._new_connection()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        wait = self.timeout if timeout is None else timeout
+        try:
+            return self._idle.get(timeout=wait)
+        except queue.Empty:
+            raise PoolTimeoutError(
+                f"No hay conexiones libres en el pool ({self.size}) tras {wait}s"
+            )
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Devuelve una conexión al pool, descartando transacciones a medias"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # Conexión dañada: se descarta y se libera su cupo
+            self._discard(conn)
+            return
+
+        if self._closed:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Context manager: `with pool.connection() as conn: ...`"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        """Cierra las conexiones libres; las ocupadas se cierran al devolverse"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self) -> dict:
+        """Estado actual del pool (para logs o /metrics)"""
+        idle = self._idle.qsize()
+        return {
+            "size": self.size,
+            "created": self._created,
+            "idle": idle,
+            "in_use": self._created - idle,
+        }
@@ -0,0 +1,418 @@
+"""
+CACHE PERSISTENTE DE DISTANCIAS (PROXY DE GOOGLE DISTANCE MATRIX)
+=================================================================
+
+Cada cotización de la app llama a `getDistanceMatrix` (google_maps_service_
+mobile.dart / maps_proxy.js) directo a Google: el mismo JFK -> Midtown se
+paga y se espera (200-600 ms) miles de veces al día. Este módulo es el
+backend de `GET /api/vlx/distance`, con dos niveles de cache:
+
+1. LRU en memoria del proceso (con TTL): acierto en microsegundos.
+2. Tabla SQLite `vlx_distance_cache` (migración 0005) con `expires_at`:
+   sobrevive reinicios y la comparten los workers de uvicorn.
+
+Clave: origen y destino redondeados a una celda geohash de
+`VLX_DISTANCE_GEOHASH_PRECISION` caracteres (7 ≈ 150 m de lado) más el
+bucket de la hora de salida (`VLX_DISTANCE_HOUR_BUCKET` horas, UTC). Sin
+hora de salida Google no usa tráfico y el bucket es "any". Si el origen es
+una dirección de texto (no "lat,lng") se usa el texto normalizado.
+
+El proveedor es intercambiable (`DistanceProvider`): `GoogleDistanceProvider`
+en producción y `FakeDistanceProvider` (haversine x factor de calle, con
+latencia simulada) para pruebas y benchmarks sin gastar elementos.
+
+Dos requests que fallan el cache con la misma clave a la vez comparten una
+sola llamada al proveedor (single-flight): la llamada corre en su propia
+tarea y cada request la espera con `asyncio.shield`, así cancelar al que
+la lanzó no cancela a los demás. Los errores no se guardan.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import urllib.parse
+import urllib.request
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from vlx_repository import AsyncDatabase
+
+logger = logging.getLogger("vlx.distance")
+
+# ==============================================================================
+# CONFIGURACIÓN
+# ==============================================================================
+
+DISTANCE_CACHE_TTL = float(os.getenv("VLX_DISTANCE_CACHE_TTL", str(7 * 24 * 3600)))  # segundos
+DISTANCE_CACHE_SIZE = int(os.getenv("VLX_DISTANCE_CACHE_SIZE", "20000"))
+GEOHASH_PRECISION = int(os.getenv("VLX_DISTANCE_GEOHASH_PRECISION", "7"))
+HOUR_BUCKET = int(os.getenv("VLX_DISTANCE_HOUR_BUCKET", "1"))  # horas por bucket
+GOOGLE_DISTANCE_URL = "https://maps.googleapis.com/maps/api/distancematrix/json"
+
+_COORDINATES = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+class DistanceProviderError(Exception):
+    """El proveedor falló (HTTP, cuota, clave inválida...): reintentable"""
+
+
+class DistanceNotFoundError(Exception):
+    """El proveedor respondió, pero no hay ruta entre los puntos"""
+
+
+# ==============================================================================
+# CLAVES
+# ==============================================================================
+
+def geohash(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Geohash estándar (base32) de `precision` caracteres"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits, value, even = 0, 0, True
+    while len(chars) < precision:
+        bounds, coordinate = (lng_range, lng) if even else (lat_range, lat)
+        middle = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def parse_coordinates(place: str) -> Optional[Tuple[float, float]]:
+    """(lat, lng) si `place` es "lat,lng" (como lo arma la app), si no None"""
+    match = _COORDINATES.match(place)
+    if not match:
+        return None
+    lat, lng = float(match.group(1)), float(match.group(2))
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+def place_key(place: str, precision: int = GEOHASH_PRECISION) -> str:
+    coordinates = parse_coordinates(place)
+    if coordinates is not None:
+        return "g:" + geohash(coordinates[0], coordinates[1], precision)
+    return "a:" + " ".join(place.lower().split())
+
+
+def departure_bucket(departure_time: Optional[int], hours: int = HOUR_BUCKET) -> str:
+    """Bucket de la hora de salida (UTC); "any" si no hay hora (sin tráfico)"""
+    if departure_time is None:
+        return "any"
+    hour = int(departure_time // 3600) % 24
+    return f"h{hour - hour % max(1, hours):02d}"
+
+
+# ==============================================================================
+# PROVEEDORES
+# ==============================================================================
+
+class DistanceProvider:
+    """
+    Interfaz: `distance(origin, destination, departure_time)` devuelve
+    {"distance_meters", "duration_seconds", "distance_text", "duration_text"}
+    o lanza DistanceNotFoundError / DistanceProviderError.
+    """
+
+    name = "provider"
+
+    async def distance(self, origin: str, destination: str, departure_time: Optional[int] = None) -> dict:
+        raise NotImplementedError
+
+
+class GoogleDistanceProvider(DistanceProvider):
+    """Distance Matrix API, un elemento por llamada (urllib en un hilo: sin dependencias)"""
+
+    name = "google"
+
+    def __init__(self, api_key: str, timeout: float = 5.0, url: str = GOOGLE_DISTANCE_URL):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.url = url
+
+    def _fetch(self, origin: str, destination: str, departure_time: Optional[int]) -> dict:
+        params = {"origins": origin, "destinations": destination, "key": self.api_key}
+        if departure_time is not None:
+            params["departure_time"] = str(int(departure_time))
+        try:
+            with urllib.request.urlopen(f"{self.url}?{urllib.parse.urlencode(params)}", timeout=self.timeout) as response:
+                data = json.loads(response.read())
+        except (OSError, ValueError) as e:
+            raise DistanceProviderError(f"Google Distance Matrix: {e}") from e
+
+        if data.get("status") != "OK":
+            raise DistanceProviderError(
+                f"Google Distance Matrix: {data.get('status')} {data.get('error_message', '')}".strip()
+            )
+        try:
+            element = data["rows"][0]["elements"][0]
+        except (KeyError, IndexError) as e:
+            raise DistanceProviderError("Google Distance Matrix: respuesta sin elementos") from e
+        if element.get("status") != "OK":
+            raise DistanceNotFoundError(element.get("status", "UNKNOWN"))
+        # Con departure_time Google agrega la duración con tráfico
+        duration = element.get("duration_in_traffic") or element["duration"]
+        return {
+            "distance_meters": element["distance"]["value"],
+            "duration_seconds": duration["value"],
+            "distance_text": element["distance"]["text"],
+            "duration_text": duration["text"],
+        }
+
+    async def distance(self, origin: str, destination: str, departure_time: Optional[int] = None) -> dict:
+        return await asyncio.to_thread(self._fetch, origin, destination, departure_time)
+
+
+class FakeDistanceProvider(DistanceProvider):
+    """
+    Proveedor local para pruebas: haversine x `road_factor` a `speed_mph`,
+    con latencia simulada. Solo entiende "lat,lng". Cuenta las llamadas.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: Tuple[float, float] = (0.0, 0.0), road_factor: float = 1.3, speed_mph: float = 25.0):
+        self.latency = latency
+        self.road_factor = road_factor
+        self.speed_mph = speed_mph
+        self.calls = 0
+
+    async def distance(self, origin: str, destination: str, departure_time: Optional[int] = None) -> dict:
+        self.calls += 1
+        low, high = self.latency
+        if high > 0:
+            # Determinista por par: mismas entradas, misma latencia
+            spread = zlib.crc32(f"{origin}|{destination}".encode("utf-8")) % 1000 / 1000
+            await asyncio.sleep(low + (high - low) * spread)
+        a, b = parse_coordinates(origin), parse_coordinates(destination)
+        if a is None or b is None:
+            raise DistanceNotFoundError("NOT_FOUND")
+        lat1, lng1, lat2, lng2 = map(math.radians, (*a, *b))
+        h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+        miles = 3958.8 * 2 * math.asin(math.sqrt(h)) * self.road_factor
+        minutes = max(1, round(miles / self.speed_mph * 60))
+        return {
+            "distance_meters": round(miles * 1609.344),
+            "duration_seconds": minutes * 60,
+            "distance_text": f"{miles:.1f} mi",
+            "duration_text": f"{minutes} mins",
+        }
+
+
+# ==============================================================================
+# CACHE DE DOS NIVELES
+# ==============================================================================
+
+class DistanceCache:
+    """LRU en memoria + tabla SQLite con TTL delante de un DistanceProvider"""
+
+    def __init__(
+        self,
+        provider: Optional[DistanceProvider],
+        db: Optional[AsyncDatabase] = None,
+        ttl: float = DISTANCE_CACHE_TTL,
+        maxsize: int = DISTANCE_CACHE_SIZE,
+        precision: int = GEOHASH_PRECISION,
+        hour_bucket: int = HOUR_BUCKET,
+        clock=time.time,
+    ):
+        self.provider = provider
+        self.db = db
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.precision = precision
+        self.hour_bucket = hour_bucket
+        self._clock = clock
+        self._memory: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        # Métricas
+        self.memory_hits = 0
+        self.sqlite_hits = 0
+        self.provider_calls = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def key(self, origin: str, destination: str, departure_time: Optional[int] = None) -> str:
+        return "|".join((
+            place_key(origin, self.precision),
+            place_key(destination, self.precision),
+            departure_bucket(departure_time, self.hour_bucket),
+        ))
+
+    # ------------------------------------------------------------------
+    # Nivel 1: memoria
+    # ------------------------------------------------------------------
+
+    def _memory_get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self._clock():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return entry[1]
+
+    def _memory_put(self, key: str, value: dict, expires_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Nivel 2: SQLite (en el hilo de AsyncDatabase)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _select(conn: sqlite3.Connection, key: str, now: float) -> Optional[tuple]:
+        return conn.execute(
+            """
+            SELECT distance_meters, duration_seconds, distance_text, duration_text, expires_at
+            FROM vlx_distance_cache
+            WHERE cache_key = ? AND expires_at > ?
+            """,
+            (key, now),
+        ).fetchone()
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, key: str, value: dict, provider: str, now: float, expires_at: float) -> None:
+        try:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO vlx_distance_cache (
+                    cache_key, distance_meters, duration_seconds, distance_text,
+                    duration_text, provider, created_at, expires_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (key, value["distance_meters"], value["duration_seconds"], value["distance_text"],
+                 value["duration_text"], provider, now, expires_at),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    @staticmethod
+    def _delete_expired(conn: sqlite3.Connection, now: float) -> int:
+        try:
+            deleted = conn.execute("DELETE FROM vlx_distance_cache WHERE expires_at <= ?", (now,)).rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return deleted
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    async def get(self, origin: str, destination: str, departure_time: Optional[int] = None) -> Tuple[dict, str]:
+        """(resultado, origen) con origen "memory", "sqlite" o el nombre del proveedor"""
+        key = self.key(origin, destination, departure_time)
+        value = self._memory_get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value, "memory"
+
+        if self.db is not None:
+            row = await self.db.run(self._select, key, self._clock())
+            if row is not None:
+                value = {
+                    "distance_meters": row[0], "duration_seconds": row[1],
+                    "distance_text": row[2], "duration_text": row[3],
+                }
+                self._memory_put(key, value, row[4])
+                self.sqlite_hits += 1
+                return value, "sqlite"
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.get_running_loop().create_task(self._fetch(key, origin, destination, departure_time))
+            # Si falla y el que la lanzó ya se canceló, nadie más lee el error
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self._inflight[key] = task
+        # shield: si este request se cancela, la llamada sigue para los demás
+        return await asyncio.shield(task), self.provider.name
+
+    async def _fetch(self, key: str, origin: str, destination: str, departure_time: Optional[int]) -> dict:
+        try:
+            if self.provider is None:
+                raise DistanceProviderError("No hay proveedor de distancias configurado")
+            self.provider_calls += 1
+            try:
+                value = await self.provider.distance(origin, destination, departure_time)
+            except Exception:
+                self.errors += 1
+                raise
+        finally:
+            self._inflight.pop(key, None)
+
+        now = self._clock()
+        expires_at = now + self.ttl
+        self._memory_put(key, value, expires_at)
+        if self.db is not None:
+            try:
+                await self.db.run(self._upsert, key, value, self.provider.name, now, expires_at)
+            except sqlite3.Error:
+                # El resultado ya está en memoria: la tabla es solo el segundo nivel
+                logger.warning("No se pudo guardar %s en vlx_distance_cache", key, exc_info=True)
+        return value
+
+    async def purge_expired(self) -> int:
+        """Borra de la tabla las filas vencidas (se llama al arrancar)"""
+        if self.db is None:
+            return 0
+        return await self.db.run(self._delete_expired, self._clock())
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.sqlite_hits + self.coalesced
+        total = hits + self.provider_calls
+        return {
+            "provider": self.provider.name if self.provider else None,
+            "size": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "sqlite_hits": self.sqlite_hits,
+            "coalesced": self.coalesced,
+            "provider_calls": self.provider_calls,
+            "errors": self.errors,
+            "hit_ratio": (hits / total) if total else 0.0,
+            "precision": self.precision,
+            "hour_bucket": self.hour_bucket,
+        }
+
+
+def response_fields(value: dict) -> dict:
+    """Mismo formato que getDistanceMatrix en la app"""
+    return {
+        "distance": value["distance_text"],
+        "distance_value": value["distance_meters"],
+        "duration": value["duration_text"],
+        "duration_value": value["duration_seconds"],
+    }
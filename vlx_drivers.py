@@ -0,0 +1,299 @@
+"""
+ÍNDICE ESPACIAL DE CONDUCTORES EN LÍNEA
+=======================================
+
+DriverService.getAvailableDrivers devuelve la lista completa: para asignar
+un pasajero habría que recorrer todos los conductores. Este índice en
+memoria guarda la última posición de cada conductor en una grilla uniforme
+de celdas de `cell_deg` grados (0.01° ≈ 0.7 mi) y responde "los k más
+cercanos" mirando solo las celdas alrededor del punto:
+
+- Un ping (`update`) es O(1): se saca al conductor de su celda anterior y
+  se lo pone en la nueva (diccionarios, no listas).
+- `nearest` recorre anillos de celdas desde la celda del punto. Después
+  del anillo r, todo conductor no visto está a más de r x (lado menor de
+  la celda en millas); si ya hay k candidatos más cerca que eso, o ese
+  mínimo pasa el radio, se corta. Dentro de un anillo se saltan las celdas
+  cuya distancia mínima ya supera al k-ésimo candidato, así una celda
+  llena de Midtown no se recorre entera si no puede mejorar el resultado.
+- Si los conductores que pasan el filtro de tier son pocos (hasta
+  DRIVER_SCAN_MAX, típico de Sprinter o Mini Coach) se recorren directo:
+  buscarlos por anillos visitaría cientos de celdas vacías.
+- Filtros: tier del vehículo (índice de vlx_pricing.TIERS), disponibilidad
+  y antigüedad del ping: un conductor sin ping hace más de VLX_DRIVER_TTL
+  segundos se considera desconectado y se limpia en el siguiente
+  `purge_stale`.
+
+Las distancias son en línea recta (haversine): para el ETA real se cotiza
+después con vlx_distance_cache solo contra los k candidatos.
+"""
+
+import heapq
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from vlx_pricing import EARTH_RADIUS_MILES
+
+DRIVER_CELL_DEG = float(os.getenv("VLX_DRIVER_CELL_DEG", "0.01"))
+DRIVER_TTL = float(os.getenv("VLX_DRIVER_TTL", "120"))  # segundos sin ping hasta quedar fuera de línea
+DRIVER_RADIUS_MILES = float(os.getenv("VLX_DRIVER_RADIUS_MILES", "15"))
+DRIVER_RADIUS_MAX_MILES = float(os.getenv("VLX_DRIVER_RADIUS_MAX_MILES", "100"))
+DRIVER_PURGE_EVERY = 1000  # pings entre limpiezas de conductores vencidos
+DRIVER_SCAN_MAX = 256  # con menos candidatos que esto se recorren sin la grilla
+
+_MILES_PER_DEG = EARTH_RADIUS_MILES * math.pi / 180
+
+
+@dataclass(frozen=True)
+class DriverLocation:
+    driver_id: int
+    lat: float
+    lng: float
+    tier: int  # índice en vlx_pricing.TIERS
+    available: bool
+    updated_at: float  # reloj del índice (time.monotonic)
+
+
+def _check_point(lat: float, lng: float) -> None:
+    # La comparación encadenada también rechaza NaN
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        raise ValueError("Coordenadas fuera de rango")
+
+
+def distance_miles(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Haversine de un par de puntos, en millas"""
+    d_lat = math.radians(lat2 - lat1)
+    d_lng = math.radians(lng2 - lng1)
+    a = math.sin(d_lat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lng / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+class DriverIndex:
+    """Última posición por conductor en una grilla uniforme (celda -> {driver_id: DriverLocation})"""
+
+    def __init__(self, cell_deg: float = DRIVER_CELL_DEG, ttl: float = DRIVER_TTL, clock=time.monotonic):
+        self.cell_deg = cell_deg
+        self.ttl = ttl
+        self._clock = clock
+        self._cells: Dict[Tuple[int, int], Dict[int, DriverLocation]] = {}
+        self._drivers: Dict[int, DriverLocation] = {}
+        self._by_tier: Dict[int, Dict[int, DriverLocation]] = {}
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.pings = 0
+        self.queries = 0
+        self.cells_visited = 0
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def update(
+        self,
+        driver_id: int,
+        lat: float,
+        lng: float,
+        tier: Optional[int] = None,
+        available: Optional[bool] = None,
+    ) -> DriverLocation:
+        """
+        Registra un ping. `tier` y `available` en None conservan el valor
+        anterior (tier 0 y disponible para un conductor nuevo).
+        """
+        _check_point(lat, lng)
+        with self._lock:
+            previous = self._drivers.get(driver_id)
+            location = DriverLocation(
+                driver_id=driver_id,
+                lat=lat,
+                lng=lng,
+                tier=tier if tier is not None else (previous.tier if previous else 0),
+                available=available if available is not None else (previous.available if previous else True),
+                updated_at=self._clock(),
+            )
+            if previous is not None:
+                self._discard(previous)
+            self._place(location)
+            self.pings += 1
+        if self.pings % DRIVER_PURGE_EVERY == 0:
+            self.purge_stale()
+        return location
+
+    def _place(self, location: DriverLocation) -> None:
+        self._drivers[location.driver_id] = location
+        self._cells.setdefault(self._cell(location.lat, location.lng), {})[location.driver_id] = location
+        self._by_tier.setdefault(location.tier, {})[location.driver_id] = location
+
+    def _discard(self, location: DriverLocation) -> None:
+        tier = self._by_tier.get(location.tier)
+        if tier is not None:
+            tier.pop(location.driver_id, None)
+        cell = self._cell(location.lat, location.lng)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(location.driver_id, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def set_available(self, driver_id: int, available: bool) -> Optional[DriverLocation]:
+        """Cambia la disponibilidad sin mover al conductor (None si no está en línea)"""
+        with self._lock:
+            previous = self._drivers.get(driver_id)
+            if previous is None:
+                return None
+            location = DriverLocation(
+                previous.driver_id, previous.lat, previous.lng, previous.tier, available, previous.updated_at
+            )
+            self._place(location)
+            return location
+
+    def remove(self, driver_id: int) -> bool:
+        """Saca al conductor del índice (cerró sesión o terminó el turno)"""
+        with self._lock:
+            location = self._drivers.pop(driver_id, None)
+            if location is None:
+                return False
+            self._discard(location)
+            return True
+
+    def purge_stale(self) -> int:
+        """Saca a los conductores sin ping en `ttl` segundos; devuelve cuántos"""
+        cutoff = self._clock() - self.ttl
+        with self._lock:
+            stale = [location for location in self._drivers.values() if location.updated_at < cutoff]
+            for location in stale:
+                del self._drivers[location.driver_id]
+                self._discard(location)
+        return len(stale)
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def get(self, driver_id: int) -> Optional[DriverLocation]:
+        return self._drivers.get(driver_id)
+
+    def age(self, location: DriverLocation) -> float:
+        """Segundos desde el ping de `location`"""
+        return self._clock() - location.updated_at
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 5,
+        tier: Optional[int] = None,
+        radius_miles: float = DRIVER_RADIUS_MILES,
+        available_only: bool = True,
+    ) -> List[Tuple[DriverLocation, float]]:
+        """
+        Hasta `k` conductores en línea a menos de `radius_miles` (recortado a
+        DRIVER_RADIUS_MAX_MILES), del más cercano al más lejano, como
+        (DriverLocation, millas). ValueError si el punto o el radio no son
+        válidos.
+        """
+        _check_point(lat, lng)
+        if not (radius_miles > 0 and math.isfinite(radius_miles)):
+            raise ValueError("El radio debe ser un número positivo")
+        radius_miles = min(radius_miles, DRIVER_RADIUS_MAX_MILES)
+        if k <= 0:
+            return []
+        cutoff = self._clock() - self.ttl
+        # Millas por grado: la latitud es fija; la longitud se toma en la
+        # latitud más alejada del ecuador que puede alcanzar la búsqueda, así
+        # las cotas de abajo nunca pasan la distancia real
+        far_lat = min(abs(lat) + radius_miles / _MILES_PER_DEG + self.cell_deg, 89.0)
+        lng_miles = _MILES_PER_DEG * math.cos(math.radians(far_lat))
+        cell_miles = self.cell_deg * lng_miles
+        best: List[Tuple[float, int, DriverLocation]] = []  # heap de máximos (-millas)
+        limit = radius_miles  # distancia del k-ésimo mejor, o el radio mientras no haya k
+        visited = 0
+
+        with self._lock:
+            population = self._drivers if tier is None else self._by_tier.get(tier, {})
+            if len(population) <= DRIVER_SCAN_MAX:
+                batches = [(math.inf, [(0.0, population)])]
+            else:
+                batches = self._rings(lat, lng, int(radius_miles / cell_miles) + 1, lng_miles)
+            for next_bound, candidates in batches:
+                for cell_bound, bucket in candidates:
+                    if cell_bound > limit:
+                        break
+                    visited += 1
+                    for location in bucket.values():
+                        if location.updated_at < cutoff:
+                            continue
+                        if available_only and not location.available:
+                            continue
+                        if tier is not None and location.tier != tier:
+                            continue
+                        if abs(location.lat - lat) * _MILES_PER_DEG > limit:
+                            continue
+                        miles = distance_miles(lat, lng, location.lat, location.lng)
+                        if miles > limit:
+                            continue
+                        entry = (-miles, location.driver_id, location)
+                        if len(best) < k:
+                            heapq.heappush(best, entry)
+                        else:
+                            heapq.heapreplace(best, entry)
+                        if len(best) == k:
+                            limit = -best[0][0]
+                if next_bound > limit:
+                    break
+
+        self.queries += 1
+        self.cells_visited += visited
+        return [(location, -negative) for negative, _, location in sorted(best, reverse=True)]
+
+    def _rings(self, lat: float, lng: float, max_ring: int, lng_miles: float):
+        """
+        Por anillo: (distancia mínima a lo que queda en anillos siguientes,
+        [(cota inferior de la celda, conductores)] de más cercana a más lejana).
+        """
+        row0, col0 = self._cell(lat, lng)
+        cell_miles = self.cell_deg * lng_miles
+        for ring in range(max_ring + 1):
+            if ring == 0:
+                cells = [(row0, col0)]
+            else:
+                top, bottom = row0 - ring, row0 + ring
+                cells = [(top, col) for col in range(col0 - ring, col0 + ring + 1)]
+                cells += [(bottom, col) for col in range(col0 - ring, col0 + ring + 1)]
+                cells += [(row, col0 - ring) for row in range(top + 1, bottom)]
+                cells += [(row, col0 + ring) for row in range(top + 1, bottom)]
+            candidates = []
+            for row, col in cells:
+                bucket = self._cells.get((row, col))
+                if not bucket:
+                    continue
+                # Cota inferior de la distancia a cualquier punto de la celda
+                d_lat = max(row * self.cell_deg - lat, lat - (row + 1) * self.cell_deg, 0.0) * _MILES_PER_DEG
+                d_lng = max(col * self.cell_deg - lng, lng - (col + 1) * self.cell_deg, 0.0) * lng_miles
+                candidates.append((math.hypot(d_lat, d_lng), bucket))
+            # Celdas más cercanas primero: el heap se llena antes y poda más
+            candidates.sort(key=lambda item: item[0])
+            # Lo que falta está en anillos > ring: a más de ring x cell_miles
+            yield ring * cell_miles, candidates
+
+    def stats(self) -> dict:
+        cutoff = self._clock() - self.ttl
+        online = [location for location in list(self._drivers.values()) if location.updated_at >= cutoff]
+        return {
+            "drivers": len(self._drivers),
+            "online": len(online),
+            "available": sum(1 for location in online if location.available),
+            "occupied_cells": len(self._cells),
+            "cell_deg": self.cell_deg,
+            "pings": self.pings,
+            "queries": self.queries,
+            "avg_cells_per_query": (self.cells_visited / self.queries) if self.queries else 0.0,
+        }
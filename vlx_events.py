@@ -0,0 +1,358 @@
+"""
+PUB/SUB EN PROCESO PARA EVENTOS DE RESERVAS
+===========================================
+
+La app solo se enteraba de cambios de estado (pending -> confirmed ->
+assigned -> completed) volviendo a pedir el listado. `BookingEventBus`
+permite que las rutas de escritura publiquen cada cambio y que el endpoint
+SSE `GET /api/vlx/bookings/stream` se lo entregue al pasajero por una sola
+conexión abierta.
+
+- Cada evento tiene un id creciente; el bus guarda los últimos
+  `history_size` por usuario para que un cliente que se reconecta con
+  `Last-Event-ID` reciba lo que se perdió.
+- Ese historial solo cubre la ventana de reconexión: el de un usuario sin
+  conexiones abiertas se borra después de `history_ttl` segundos sin
+  actividad, y como mucho se guardan `history_users` usuarios (se
+  descarta el de actividad más vieja).
+- Cada suscriptor tiene una cola acotada: si un cliente no consume, se
+  descartan sus eventos más viejos en lugar de crecer sin límite.
+- `publish` puede llamarse desde cualquier hilo (p. ej. el hilo de
+  GroupCommitWriter); la entrega siempre ocurre en el event loop.
+
+El bus es en memoria y por proceso. Los cambios hechos por fuera (panel
+admin, scripts, otros workers de uvicorn) los publica `BookingChangeFeed`,
+con el mismo polling por `PRAGMA data_version` y marca de agua de
+updated_at que `monitor_reservas.py --follow`. Una reserva que ya se
+publicó con el mismo (updated_at, status) no se vuelve a publicar, así que
+la ruta de escritura y el feed no duplican eventos.
+"""
+
+import asyncio
+import itertools
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from collections import OrderedDict, defaultdict, deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+HEARTBEAT_SECONDS = 15.0
+SUBSCRIBER_QUEUE_SIZE = 100
+HISTORY_SIZE = 200
+HISTORY_TTL = 600.0  # segundos que se guarda el historial de un usuario desconectado
+HISTORY_USERS = 10000
+PUBLISHED_VERSIONS = 10000  # reservas cuyo último (updated_at, status) publicado se recuerda
+FEED_INTERVAL = 2.0
+
+
+def _dumps(data: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(data).decode("utf-8")
+    return json.dumps(data, ensure_ascii=False)
+
+
+def format_sse(event_id: Optional[int], event: str, data: dict) -> str:
+    """Serializa un evento en formato text/event-stream"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {_dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class BookingEventBus:
+    """Distribuye eventos de reservas a los suscriptores de cada usuario"""
+
+    def __init__(
+        self,
+        history_size: int = HISTORY_SIZE,
+        queue_size: int = SUBSCRIBER_QUEUE_SIZE,
+        history_ttl: float = HISTORY_TTL,
+        history_users: int = HISTORY_USERS,
+        clock=time.monotonic,
+    ):
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self.history_ttl = history_ttl
+        self.history_users = history_users
+        self._clock = clock
+        # Ids a partir del reloj en ms: siguen creciendo tras un reinicio, así un
+        # Last-Event-ID viejo no oculta los eventos nuevos
+        self._ids = itertools.count(int(time.time() * 1000))
+        # user_id -> (última actividad, eventos), de actividad más vieja a más nueva
+        self._history: "OrderedDict[int, Tuple[float, Deque[Tuple[int, str, dict]]]]" = OrderedDict()
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # booking id -> (updated_at, status) del último evento publicado
+        self._versions: "OrderedDict[Any, Tuple[Any, Any]]" = OrderedDict()
+
+        # Métricas
+        self.published = 0
+        self.dropped = 0
+
+    # --------------------------------------------------------------------------
+    # Publicación
+    # --------------------------------------------------------------------------
+
+    def publish(self, user_id: int, event: str, data: dict) -> int:
+        """Publica un evento para un usuario; devuelve su id"""
+        with self._lock:
+            event_id = next(self._ids)
+            entry = self._history.pop(user_id, None)
+            events = entry[1] if entry is not None else deque(maxlen=self.history_size)
+            events.append((event_id, event, data))
+            self._history[user_id] = (self._clock(), events)
+            self._expire_history()
+            self.published += 1
+
+        loop = self._loop
+        if loop is None:
+            return event_id
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(user_id, event_id, event, data)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self._deliver, user_id, event_id, event, data)
+        return event_id
+
+    def _expire_history(self) -> None:
+        """Borra historiales vencidos desde el más viejo (con el lock tomado)"""
+        cutoff = self._clock() - self.history_ttl
+        for _ in range(len(self._history)):
+            user_id, (touched, events) = self._history.popitem(last=False)
+            if len(self._history) >= self.history_users:
+                continue
+            if touched >= cutoff:
+                self._history[user_id] = (touched, events)
+                self._history.move_to_end(user_id, last=False)
+                break
+            if self._subscribers.get(user_id):
+                # Conectado: su historial sigue sirviendo, vuelve al final
+                self._history[user_id] = (self._clock(), events)
+
+    def publish_booking(self, booking: dict, event: str = "booking.updated") -> Optional[int]:
+        """
+        Atajo para las rutas de escritura: publica la fila completa de la
+        reserva. Devuelve None sin publicar si esa versión ya se publicó (la
+        ruta de escritura y BookingChangeFeed pueden ver el mismo cambio).
+        """
+        booking_id = booking.get("id")
+        if booking_id is not None:
+            version = (booking.get("updated_at"), booking.get("status"))
+            with self._lock:
+                if self._versions.get(booking_id) == version:
+                    return None
+                self._versions.pop(booking_id, None)
+                self._versions[booking_id] = version
+                while len(self._versions) > PUBLISHED_VERSIONS:
+                    self._versions.popitem(last=False)
+        return self.publish(booking["user_id"], event, booking)
+
+    def _deliver(self, user_id: int, event_id: int, event: str, data: dict) -> None:
+        for queue in list(self._subscribers.get(user_id, ())):
+            if queue.full():
+                # Cliente lento: se pierde el evento más viejo, no el nuevo
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait((event_id, event, data))
+
+    # --------------------------------------------------------------------------
+    # Suscripción
+    # --------------------------------------------------------------------------
+
+    def _replay(self, user_id: int, last_event_id: Optional[int]) -> List[Tuple[int, str, dict]]:
+        if last_event_id is None:
+            return []
+        with self._lock:
+            entry = self._history.get(user_id)
+            if entry is None:
+                return []
+            return [item for item in entry[1] if item[0] > last_event_id]
+
+    async def stream(
+        self,
+        user_id: int,
+        last_event_id: Optional[int] = None,
+        heartbeat: float = HEARTBEAT_SECONDS,
+    ) -> AsyncIterator[str]:
+        """
+        Genera el cuerpo SSE para un usuario: primero los eventos perdidos desde
+        `last_event_id`, luego los nuevos, con un comentario de heartbeat cada
+        `heartbeat` segundos para mantener viva la conexión en proxies.
+        """
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[user_id].add(queue)
+        try:
+            # retry: cuánto espera EventSource antes de reconectar
+            yield "retry: 3000\n\n"
+            # La cola se registró antes del replay: un evento publicado en medio
+            # puede llegar por ambos lados y se descarta por id
+            delivered = last_event_id or 0
+            for event_id, event, data in self._replay(user_id, last_event_id):
+                delivered = event_id
+                yield format_sse(event_id, event, data)
+
+            while True:
+                try:
+                    event_id, event, data = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                if event_id <= delivered:
+                    continue
+                delivered = event_id
+                yield format_sse(event_id, event, data)
+        finally:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[user_id]
+            with self._lock:
+                # La ventana de reconexión cuenta desde que se fue
+                entry = self._history.pop(user_id, None)
+                if entry is not None:
+                    self._history[user_id] = (self._clock(), entry[1])
+                self._expire_history()
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+            "history_users": len(self._history),
+        }
+
+
+# ==============================================================================
+# CAMBIOS HECHOS POR OTROS PROCESOS
+# ==============================================================================
+
+class BookingChangeFeed:
+    """
+    Publica en el bus los cambios de vlx_bookings que no pasaron por las
+    rutas de escritura de este proceso, con una conexión de solo lectura:
+
+    - `PRAGMA data_version` cambia únicamente cuando otra conexión hace
+      commit; si no cambió, la vuelta no ejecuta ninguna consulta.
+    - Marca de agua (updated_at, (id, status) ya vistos en ese instante):
+      cada vuelta lee solo lo modificado desde la anterior
+      (idx_vlx_bookings_updated). updated_at tiene resolución de segundos, así
+      que un cambio de estado en el mismo segundo también cuenta.
+    - Ids mayores al máximo del arranque son `booking.created`; el resto,
+      `booking.updated`.
+    """
+
+    def __init__(self, bus: BookingEventBus, database: str, interval: float = FEED_INTERVAL):
+        self.bus = bus
+        self.database = database
+        self.interval = interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._version = None
+        self._high_water = ""
+        self._seen_at_high_water: Set[Tuple[int, Any]] = set()
+        self._max_id = 0
+
+        # Métricas
+        self.polls = 0
+        self.published = 0
+        self.errors = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(Path(self.database).resolve().as_uri() + "?mode=ro", uri=True)
+        conn.execute("PRAGMA busy_timeout = 5000")
+        self._high_water, self._max_id = conn.execute(
+            "SELECT COALESCE(MAX(updated_at), ''), COALESCE(MAX(id), 0) FROM vlx_bookings"
+        ).fetchone()
+        self._seen_at_high_water = set(
+            conn.execute("SELECT id, status FROM vlx_bookings WHERE updated_at = ?", (self._high_water,))
+        )
+        self._version = conn.execute("PRAGMA data_version").fetchone()[0]
+        return conn
+
+    def poll(self) -> int:
+        """Una vuelta de polling; devuelve cuántos eventos publicó"""
+        if self._conn is None:
+            # La primera vuelta solo fija la marca de agua: lo anterior no es un cambio
+            self._conn = self._connect()
+            return 0
+        self.polls += 1
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._version:
+            return 0
+        self._version = version
+
+        cursor = self._conn.execute(
+            "SELECT * FROM vlx_bookings WHERE updated_at >= ? ORDER BY updated_at, id",
+            (self._high_water,),
+        )
+        columns = [description[0] for description in cursor.description]
+        published = 0
+        for row in cursor.fetchall():
+            booking = dict(zip(columns, row))
+            booking_id, updated = booking["id"], booking["updated_at"]
+            seen = (booking_id, booking["status"])
+            if updated == self._high_water and seen in self._seen_at_high_water:
+                continue
+            if updated != self._high_water:
+                self._high_water = updated
+                self._seen_at_high_water = set()
+            self._seen_at_high_water.add(seen)
+
+            event = "booking.created" if booking_id > self._max_id else "booking.updated"
+            self._max_id = max(self._max_id, booking_id)
+            if self.bus.publish_booking(booking, event) is not None:
+                published += 1
+        self.published += published
+        return published
+
+    def _run(self) -> None:
+        try:
+            while True:
+                try:
+                    self.poll()
+                except sqlite3.Error:
+                    # Base bloqueada o todavía sin crear: se reintenta en la próxima vuelta
+                    self.errors += 1
+                if self._stop.wait(self.interval):
+                    break
+        finally:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def start(self) -> None:
+        """Arranca el hilo de polling; su primera vuelta fija la marca de agua"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="vlx-booking-feed", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "polls": self.polls,
+            "published": self.published,
+            "errors": self.errors,
+        }
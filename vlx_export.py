@@ -0,0 +1,110 @@
+"""
+EXPORTACIÓN EN STREAMING DE RESERVAS (NDJSON / CSV)
+===================================================
+
+Reemplaza el `fetchall()` de monitor_reservas.py / ver_reservas_db.py para
+volcar reservas: el cursor del servidor se lee con `fetchmany(chunk_size)` y
+cada bloque se codifica y entrega antes de leer el siguiente, así la memoria
+queda plana tanto con 1k como con 10M de filas.
+
+El generador es síncrono a propósito: `StreamingResponse` lo recorre en el
+threadpool y espera a que cada bloque se envíe antes de pedir el siguiente.
+Si el cliente lee lento, uvicorn pausa el envío y el generador deja de leer
+la base (back-pressure), en lugar de acumular el export en el worker.
+
+Usa una conexión propia (no del pool): un export largo no debe dejar a los
+endpoints normales sin conexiones.
+"""
+
+import csv
+import io
+import json
+from typing import Iterator, Optional
+
+from vlx_db_pool import connect
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+EXPORT_FORMATS = ("ndjson", "csv")
+DEFAULT_CHUNK_SIZE = 1000
+
+EXPORT_QUERY = """
+    SELECT
+        b.id, b.user_id, u.email AS user_email,
+        b.pickup_address, b.pickup_lat, b.pickup_lng,
+        b.destination_address, b.destination_lat, b.destination_lng,
+        b.pickup_time, b.vehicle_name, b.passengers, b.price,
+        b.distance_miles, b.distance_text, b.duration_text,
+        b.service_type, b.is_scheduled, b.status, b.created_at, b.updated_at
+    FROM vlx_bookings b
+    LEFT JOIN users u ON b.user_id = u.id
+"""
+
+
+def _dumps_line(record: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record) + b"\n"
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def iter_bookings_export(
+    database: str,
+    fmt: str = "ndjson",
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    status: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Genera el export en bloques de `chunk_size` filas.
+
+    `date_from` / `date_to` filtran `created_at` en el rango [date_from, date_to)
+    (formato 'YYYY-MM-DD' o 'YYYY-MM-DD HH:MM:SS'); `status` filtra por estado.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt}")
+
+    query = EXPORT_QUERY
+    conditions = []
+    params = []
+    if date_from:
+        conditions.append("b.created_at >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append("b.created_at < ?")
+        params.append(date_to)
+    if status:
+        conditions.append("b.status = ?")
+        params.append(status)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    # idx_vlx_bookings_created entrega las filas ya ordenadas, sin sort temporal
+    query += " ORDER BY b.created_at, b.id"
+
+    conn = connect(database)
+    try:
+        cursor = conn.execute(query, params)
+        columns = [description[0] for description in cursor.description]
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue().encode("utf-8")
+
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            if fmt == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows(tuple(row) for row in rows)
+                yield buffer.getvalue().encode("utf-8")
+            else:
+                yield b"".join(_dumps_line(dict(zip(columns, row))) for row in rows)
+    finally:
+        conn.close()
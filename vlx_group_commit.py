@@ -0,0 +1,184 @@
+"""
+GROUP COMMIT PARA LA CREACIÓN DE RESERVAS
+=========================================
+
+Cada reserva era una transacción propia: BEGIN, INSERT, COMMIT (y un fsync
+con synchronous=FULL). En los picos llegan muchas reservas casi al mismo
+tiempo, así que `GroupCommitWriter` las junta:
+
+1. Un hilo escritor dedicado toma todas las reservas que ya estén en cola.
+   Si hay concurrencia (más de una en cola, o el lote anterior fue múltiple)
+   espera hasta `window_ms` (o `max_batch` reservas) por más; un cliente
+   solitario no paga la ventana.
+2. Inserta todas en UNA transacción, cada una con `INSERT ... RETURNING`
+   dentro de su propio SAVEPOINT: si una falla, solo esa recibe el error.
+3. Hace COMMIT y recién entonces entrega a cada llamador su propia fila.
+
+Se activa con VLX_GROUP_COMMIT_MS > 0 (ver BACKEND_ENDPOINTS_IMPLEMENTACION.py).
+"""
+
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, List, Optional, Sequence, Tuple
+
+from vlx_db_pool import DEFAULT_PRAGMAS, connect
+from vlx_metrics import Metrics
+from vlx_repository import BookingRepository
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """Agrupa inserts de reservas concurrentes en una sola transacción"""
+
+    def __init__(
+        self,
+        database: str,
+        window_ms: float = 2.0,
+        max_batch: int = 64,
+        pragmas: Sequence[Tuple[str, object]] = DEFAULT_PRAGMAS,
+        metrics: Optional[Metrics] = None,
+    ):
+        self.database = database
+        self.pragmas = pragmas
+        self.metrics = metrics
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        # Métricas
+        self.batches = 0
+        self.inserts = 0
+        self.largest_batch = 0
+        self._last_batch_size = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="vlx-group-commit", daemon=True
+                    )
+                    self._thread.start()
+
+    def submit(self, user_id: int, booking: Any) -> Future:
+        """Encola una reserva; el Future se resuelve con la fila tras el COMMIT"""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((user_id, booking, future))
+        return future
+
+    async def create(self, user_id: int, booking: Any) -> dict:
+        """Versión async de submit()"""
+        return await asyncio.wrap_future(self.submit(user_id, booking))
+
+    # --------------------------------------------------------------------------
+    # Hilo escritor
+    # --------------------------------------------------------------------------
+
+    def _collect(self, first: Tuple[int, Any, Future]) -> Tuple[List[Tuple[int, Any, Future]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        # Lo que ya está en cola entra sin esperar
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+
+        # Solo se espera la ventana si hay señales de concurrencia, y solo
+        # hasta juntar tantas reservas como el lote anterior: si todos los
+        # clientes activos ya están en el lote, esperar más es tiempo perdido
+        if len(batch) == 1 and self._last_batch_size <= 1:
+            return batch, False
+        target = min(self.max_batch, max(2, self._last_batch_size))
+        while len(batch) < target:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[Tuple[int, Any, Future]]) -> None:
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for user_id, booking, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT booking")
+                try:
+                    row = BookingRepository.insert_returning(conn, user_id, booking)
+                    conn.execute("RELEASE SAVEPOINT booking")
+                    results.append((future, row, None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO SAVEPOINT booking")
+                    conn.execute("RELEASE SAVEPOINT booking")
+                    results.append((future, None, e))
+            conn.commit()
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self._last_batch_size = len(batch)
+        self.batches += 1
+        self.inserts += sum(1 for _, row, _ in results if row is not None)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for future, row, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(row)
+
+    def _run(self) -> None:
+        conn = connect(self.database, self.pragmas)
+        try:
+            stopping = False
+            while not stopping:
+                first = self._queue.get()
+                if first is _STOP:
+                    break
+                batch, stopping = self._collect(first)
+                if self.metrics is None:
+                    self._write_batch(conn, batch)
+                else:
+                    with self.metrics.time("vlx_db_query_duration_seconds", "group_commit"):
+                        self._write_batch(conn, batch)
+        finally:
+            conn.close()
+
+    def close(self) -> None:
+        """Procesa lo pendiente y detiene el hilo escritor"""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "inserts": self.inserts,
+            "avg_batch": (self.inserts / self.batches) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+        }
@@ -0,0 +1,160 @@
+"""
+HASHING DE CONTRASEÑAS FUERA DEL EVENT LOOP
+===========================================
+
+bcrypt es lento a propósito (~100-300 ms por verificación). Llamarlo desde un
+endpoint `async def` congela todo el worker de uvicorn mientras dura, incluidas
+las reservas que no tienen nada que ver con el login.
+
+`PasswordHasher` ejecuta el hash y la verificación en un executor acotado:
+- Hilos (por defecto): bcrypt libera el GIL, así que escala con los núcleos.
+- Procesos (VLX_HASH_EXECUTOR=process): aislamiento total del worker.
+
+La concurrencia se limita a `workers` operaciones a la vez; las demás esperan
+en cola hasta `max_pending`, y por encima de eso se rechazan (HTTP 503) para
+no acumular latencia sin límite durante un pico de logins.
+
+Con `metrics` (vlx_metrics.Metrics) cada operación registra por separado
+la espera en cola (`vlx_hash_queue_wait_seconds{op}`) y el tiempo de bcrypt
+(`vlx_bcrypt_verify_seconds` / `vlx_bcrypt_hash_seconds`); la profundidad de
+cola y las operaciones en curso se exportan como gauges desde el router.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from passlib.context import CryptContext
+
+from vlx_metrics import Metrics
+
+# ==============================================================================
+# CONFIGURACIÓN
+# ==============================================================================
+
+HASH_EXECUTOR_KIND = os.getenv("VLX_HASH_EXECUTOR", "thread")  # "thread" | "process"
+HASH_WORKERS = int(os.getenv("VLX_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_MAX_PENDING = int(os.getenv("VLX_HASH_MAX_PENDING", "64"))
+
+# Contexto propio del módulo: las funciones de abajo deben ser importables
+# desde un proceso hijo (ProcessPoolExecutor las serializa por nombre).
+_pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return _pwd_context.verify(plain_password, hashed_password)
+
+
+def _hash(plain_password: str) -> str:
+    return _pwd_context.hash(plain_password)
+
+
+class HasherOverloadedError(RuntimeError):
+    """La cola de hashing está llena; el cliente debe reintentar más tarde"""
+
+
+# ==============================================================================
+# EXECUTOR ACOTADO
+# ==============================================================================
+
+class PasswordHasher:
+    """Ejecuta bcrypt en un pool de hilos o procesos con límite de concurrencia"""
+
+    def __init__(
+        self,
+        kind: str = HASH_EXECUTOR_KIND,
+        workers: int = HASH_WORKERS,
+        max_pending: int = HASH_MAX_PENDING,
+        metrics: Optional[Metrics] = None,
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Executor de hashing desconocido: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.metrics = metrics
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # Métricas
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="vlx-hash"
+                )
+        return self._executor
+
+    async def _run(self, op: str, fn, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+
+        if self._semaphore.locked() and self.queued >= self.max_pending:
+            self.rejected += 1
+            raise HasherOverloadedError("Demasiadas operaciones de hashing en cola")
+
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        queued_at = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        started_at = time.perf_counter()
+        self.total_wait_seconds += started_at - queued_at
+        if self.metrics is not None:
+            self.metrics.observe("vlx_hash_queue_wait_seconds", started_at - queued_at, op)
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            run_seconds = time.perf_counter() - started_at
+            self.total_run_seconds += run_seconds
+            if self.metrics is not None:
+                self.metrics.observe(f"vlx_bcrypt_{op}_seconds", run_seconds)
+            self._semaphore.release()
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verifica una contraseña sin bloquear el event loop"""
+        return await self._run("verify", _verify, plain_password, hashed_password)
+
+    async def hash(self, plain_password: str) -> str:
+        """Hashea una contraseña sin bloquear el event loop"""
+        return await self._run("hash", _hash, plain_password)
+
+    def metrics(self) -> dict:
+        """Profundidad de cola y tiempos acumulados (para logs o /metrics)"""
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": (self.total_wait_seconds / self.completed * 1000) if self.completed else 0.0,
+            "avg_run_ms": (self.total_run_seconds / self.completed * 1000) if self.completed else 0.0,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Libera el executor (espera a que terminen las operaciones en curso)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
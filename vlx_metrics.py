@@ -0,0 +1,280 @@
+"""
+MÉTRICAS DE LATENCIA EN FORMATO PROMETHEUS
+==========================================
+
+No sabíamos en qué se va el tiempo de `login`, `create_booking` y
+`get_bookings`. Este módulo registra:
+
+- `vlx_http_request_duration_seconds{method,route,status}`: histograma por
+  ruta (plantilla de FastAPI, p. ej. `/api/vlx/bookings`, nunca la URL
+  cruda) medido por `MetricsMiddleware`.
+- `vlx_db_query_duration_seconds{op}`: ejecución de SQL en el hilo de base de
+  datos (AsyncDatabase) y en el escritor de group commit.
+- `vlx_bcrypt_verify_seconds` / `vlx_bcrypt_hash_seconds`: bcrypt en el
+  executor de vlx_hashing, sin contar la espera en cola, que va aparte en
+  `vlx_hash_queue_wait_seconds{op}`.
+- `vlx_jwt_duration_seconds{op}`: `encode` / `decode` de tokens JWT.
+
+Contadores sin locks: cada hilo escribe en su propio shard (`threading.local`)
+y solo ese hilo lo modifica; el lock se toma una vez por hilo, al registrar
+su shard. `render()` suma los shards al momento del scrape (una lectura puede
+quedar un incremento atrás, lo que no importa para un histograma).
+
+p95/p99 por ruta en Prometheus/Grafana:
+
+    histogram_quantile(0.99, sum by (le, route) (
+        rate(vlx_http_request_duration_seconds_bucket[5m])))
+
+Sin Prometheus, `stats()` estima los mismos percentiles desde los buckets.
+
+Gauges y contadores que ya lleva otro componente (cola de hashing, aciertos
+del cache de tokens) se registran con `gauge()` / `counter()` y una función
+que se lee recién al momento del scrape.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# ==============================================================================
+# BUCKETS (segundos)
+# ==============================================================================
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+BCRYPT_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0)
+JWT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Histogram:
+    __slots__ = ("name", "help", "labelnames", "buckets")
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+
+
+class _Timer:
+    """Context manager de `Metrics.time()`; sin generador para no sumar overhead"""
+    __slots__ = ("_metrics", "_name", "_labels", "_started")
+
+    def __init__(self, metrics: "Metrics", name: str, labels: Tuple[str, ...]):
+        self._metrics = metrics
+        self._name = name
+        self._labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._metrics.observe(self._name, time.perf_counter() - self._started, *self._labels)
+
+
+class Metrics:
+    """Registro de histogramas con un shard por hilo"""
+
+    def __init__(self):
+        self._histograms: Dict[str, _Histogram] = {}
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._lock = threading.Lock()
+        # nombre -> (tipo, ayuda, función que devuelve el valor actual)
+        self._callbacks: Dict[str, Tuple[str, str, Callable[[], float]]] = {}
+
+        self.histogram("vlx_http_request_duration_seconds", "Latencia de requests HTTP por ruta",
+                       ("method", "route", "status"), HTTP_BUCKETS)
+        self.histogram("vlx_db_query_duration_seconds", "Tiempo de ejecución de SQL",
+                       ("op",), DB_BUCKETS)
+        self.histogram("vlx_bcrypt_verify_seconds", "Tiempo de verificación bcrypt (sin la espera en cola)",
+                       (), BCRYPT_BUCKETS)
+        self.histogram("vlx_bcrypt_hash_seconds", "Tiempo de hash bcrypt (sin la espera en cola)",
+                       (), BCRYPT_BUCKETS)
+        self.histogram("vlx_hash_queue_wait_seconds", "Espera en la cola del executor de hashing",
+                       ("op",), HTTP_BUCKETS)
+        self.histogram("vlx_jwt_duration_seconds", "Tiempo de encode/decode de JWT",
+                       ("op",), JWT_BUCKETS)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = HTTP_BUCKETS) -> None:
+        """Declara un histograma (idempotente)"""
+        with self._lock:
+            self._histograms.setdefault(name, _Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, fn: Callable[[], float]) -> None:
+        """Gauge leído de `fn()` en cada scrape (p. ej. profundidad de una cola)"""
+        with self._lock:
+            self._callbacks[name] = ("gauge", help, fn)
+
+    def counter(self, name: str, help: str, fn: Callable[[], float]) -> None:
+        """Contador monótono que ya lleva otro componente, leído de `fn()` en cada scrape"""
+        with self._lock:
+            self._callbacks[name] = ("counter", help, fn)
+
+    # --------------------------------------------------------------------------
+    # Escritura (camino caliente)
+    # --------------------------------------------------------------------------
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def observe(self, name: str, seconds: float, *labels: str) -> None:
+        """Suma una observación; `labels` en el orden de `labelnames`"""
+        shard = self._shard()
+        key = (name, labels)
+        series = shard.get(key)
+        if series is None:
+            buckets = self._histograms[name].buckets
+            # [conteo por bucket..., +Inf, suma, total]
+            series = shard[key] = [0] * (len(buckets) + 1) + [0.0, 0]
+        series[bisect_left(self._histograms[name].buckets, seconds)] += 1
+        series[-2] += seconds
+        series[-1] += 1
+
+    def time(self, name: str, *labels: str) -> _Timer:
+        """`with metrics.time("vlx_jwt_duration_seconds", "decode"): ...`"""
+        return _Timer(self, name, labels)
+
+    # --------------------------------------------------------------------------
+    # Lectura
+    # --------------------------------------------------------------------------
+
+    def _collect(self) -> Dict[Tuple[str, Tuple[str, ...]], List[float]]:
+        with self._lock:
+            shards = list(self._shards)
+        merged: Dict[Tuple[str, Tuple[str, ...]], List[float]] = {}
+        for shard in shards:
+            # dict.copy() es atómico bajo el GIL aunque el dueño esté insertando
+            for key, series in shard.copy().items():
+                total = merged.get(key)
+                if total is None:
+                    merged[key] = list(series)
+                else:
+                    for i, value in enumerate(series):
+                        total[i] += value
+        return merged
+
+    def render(self) -> str:
+        """Exposición en formato de texto de Prometheus"""
+        merged = self._collect()
+        lines: List[str] = []
+        for histogram in self._histograms.values():
+            name = histogram.name
+            lines.append(f"# HELP {name} {histogram.help}")
+            lines.append(f"# TYPE {name} histogram")
+            for (series_name, labels), series in sorted(merged.items()):
+                if series_name != name:
+                    continue
+                pairs = [f'{key}="{_escape(value)}"' for key, value in zip(histogram.labelnames, labels)]
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), series):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    bucket_labels = ",".join(pairs + ['le="' + le + '"'])
+                    lines.append(f"{name}_bucket{{{bucket_labels}}} {cumulative}")
+                label_text = "{" + ",".join(pairs) + "}" if pairs else ""
+                lines.append(f"{name}_sum{label_text} {series[-2]!r}")
+                lines.append(f"{name}_count{label_text} {series[-1]}")
+        with self._lock:
+            callbacks = list(self._callbacks.items())
+        for name, (kind, help, fn) in callbacks:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {fn()!r}")
+        return "\n".join(lines) + "\n"
+
+    def stats(self) -> dict:
+        """Conteo, promedio y p50/p95/p99 estimados por serie (en ms)"""
+        result = {}
+        for (name, labels), series in sorted(self._collect().items()):
+            buckets = self._histograms[name].buckets
+            count = series[-1]
+            key = name + ("{" + ",".join(labels) + "}" if labels else "")
+            result[key] = {
+                "count": count,
+                "avg_ms": (series[-2] / count * 1000) if count else 0.0,
+                "p50_ms": _quantile(buckets, series, 0.50) * 1000,
+                "p95_ms": _quantile(buckets, series, 0.95) * 1000,
+                "p99_ms": _quantile(buckets, series, 0.99) * 1000,
+            }
+        return result
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _quantile(buckets: Sequence[float], series: List[float], q: float) -> float:
+    """Interpolación lineal dentro del bucket, igual que histogram_quantile()"""
+    count = series[-1]
+    if not count:
+        return 0.0
+    rank = q * count
+    cumulative = 0
+    lower = 0.0
+    for bound, bucket_count in zip(buckets, series):
+        if bucket_count and cumulative + bucket_count >= rank:
+            return lower + (bound - lower) * (rank - cumulative) / bucket_count
+        cumulative += bucket_count
+        lower = bound
+    # Cae en +Inf: el mejor dato disponible es el límite del último bucket
+    return buckets[-1]
+
+
+# ==============================================================================
+# MIDDLEWARE ASGI
+# ==============================================================================
+
+class MetricsMiddleware:
+    """
+    Mide cada request HTTP hasta el último byte de la respuesta.
+
+    ASGI puro (no BaseHTTPMiddleware) para no envolver el body de
+    StreamingResponse. La ruta sale de `scope["route"]`, que FastAPI rellena al
+    resolver el endpoint; lo que no coincide con ninguna ruta se agrupa como
+    "unmatched" para no crear una serie por cada URL inventada.
+
+        app.add_middleware(MetricsMiddleware, metrics=metrics)
+    """
+
+    def __init__(self, app, metrics: Metrics, skip_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.metrics = metrics
+        self.skip_paths = frozenset(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            self.metrics.observe(
+                "vlx_http_request_duration_seconds",
+                time.perf_counter() - started,
+                scope.get("method", ""),
+                getattr(route, "path", None) or "unmatched",
+                str(status_code),
+            )
+
@@ -0,0 +1,195 @@
+"""
+MIGRACIONES DE LA BASE DE DATOS VANELUX
+=======================================
+
+Índices y ajustes de esquema que necesitan los endpoints del router.
+Cada migración se aplica una sola vez y queda registrada en la tabla
+`vlx_schema_migrations`, así que es seguro ejecutarlas en cada arranque.
+
+Uso manual:
+    python vlx_migrations.py "C:\\ruta\\a\\logistics.db"
+"""
+
+import sqlite3
+import sys
+from typing import List, Sequence, Tuple
+
+# ==============================================================================
+# MIGRACIONES (en orden; nunca editar una ya publicada, agregar una nueva)
+# ==============================================================================
+
+MIGRATIONS: Sequence[Tuple[str, Sequence[str]]] = (
+    (
+        "0001_bookings_keyset_indexes",
+        (
+            # GET /api/vlx/bookings: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+            """
+            CREATE INDEX IF NOT EXISTS idx_vlx_bookings_user_created
+            ON vlx_bookings (user_id, created_at DESC, id DESC)
+            """,
+            # Mismo listado filtrado por estado (?status=pending, ...)
+            """
+            CREATE INDEX IF NOT EXISTS idx_vlx_bookings_user_status_created
+            ON vlx_bookings (user_id, status, created_at DESC, id DESC)
+            """,
+        ),
+    ),
+    (
+        "0002_bookings_user_updated_index",
+        (
+            # ETag del listado: COUNT(*) y MAX(updated_at) por usuario
+            # se resuelven solo con el índice, sin leer las filas
+            """
+            CREATE INDEX IF NOT EXISTS idx_vlx_bookings_user_updated
+            ON vlx_bookings (user_id, updated_at)
+            """,
+        ),
+    ),
+    (
+        "0003_bookings_created_index",
+        (
+            # Export de admin: rango de fechas sobre todas las reservas,
+            # ordenado por created_at sin sort temporal
+            """
+            CREATE INDEX IF NOT EXISTS idx_vlx_bookings_created
+            ON vlx_bookings (created_at)
+            """,
+        ),
+    ),
+    (
+        "0004_bookings_updated_index",
+        (
+            # monitor_reservas.py --follow: filas modificadas desde la marca de agua
+            """
+            CREATE INDEX IF NOT EXISTS idx_vlx_bookings_updated
+            ON vlx_bookings (updated_at)
+            """,
+        ),
+    ),
+    (
+        "0005_distance_cache",
+        (
+            # Segundo nivel de vlx_distance_cache: una fila por
+            # (geohash origen, geohash destino, bucket horario)
+            """
+            CREATE TABLE IF NOT EXISTS vlx_distance_cache (
+                cache_key TEXT PRIMARY KEY,
+                distance_meters INTEGER NOT NULL,
+                duration_seconds INTEGER NOT NULL,
+                distance_text TEXT,
+                duration_text TEXT,
+                provider TEXT,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            ) WITHOUT ROWID
+            """,
+            # Limpieza de vencidas al arrancar
+            """
+            CREATE INDEX IF NOT EXISTS idx_vlx_distance_cache_expires
+            ON vlx_distance_cache (expires_at)
+            """,
+        ),
+    ),
+)
+
+
+# ==============================================================================
+# ESQUEMA BASE (solo para bases nuevas: benchmarks, pruebas de carga, seeds)
+# ==============================================================================
+
+# Refleja las tablas que ya existen en logistics.db; en producción no se usa.
+BASE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        full_name TEXT,
+        phone TEXT,
+        roles TEXT,
+        allowed_apps TEXT,
+        status TEXT DEFAULT 'active',
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS vlx_bookings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        pickup_address TEXT NOT NULL,
+        pickup_lat REAL,
+        pickup_lng REAL,
+        destination_address TEXT NOT NULL,
+        destination_lat REAL,
+        destination_lng REAL,
+        pickup_time TEXT NOT NULL,
+        vehicle_name TEXT,
+        passengers INTEGER DEFAULT 1,
+        price REAL,
+        distance_miles REAL,
+        distance_text TEXT,
+        duration_text TEXT,
+        service_type TEXT DEFAULT 'standard',
+        is_scheduled INTEGER DEFAULT 1,
+        status TEXT DEFAULT 'pending',
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    );
+"""
+
+
+def create_schema(conn: sqlite3.Connection) -> None:
+    """Crea users y vlx_bookings si no existen y aplica las migraciones"""
+    conn.executescript(BASE_SCHEMA)
+    apply_migrations(conn)
+
+
+# ==============================================================================
+# EJECUCIÓN
+# ==============================================================================
+
+def _ensure_migrations_table(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS vlx_schema_migrations (
+            name TEXT PRIMARY KEY,
+            applied_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+    """)
+
+
+def apply_migrations(conn: sqlite3.Connection) -> List[str]:
+    """Aplica las migraciones pendientes y devuelve sus nombres"""
+    _ensure_migrations_table(conn)
+    conn.commit()
+    applied = {row[0] for row in conn.execute("SELECT name FROM vlx_schema_migrations")}
+
+    executed = []
+    for name, statements in MIGRATIONS:
+        if name in applied:
+            continue
+        try:
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute("INSERT INTO vlx_schema_migrations (name) VALUES (?)", (name,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        executed.append(name)
+    return executed
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Uso: python vlx_migrations.py <ruta a logistics.db>")
+        sys.exit(1)
+
+    conn = sqlite3.connect(sys.argv[1])
+    done = apply_migrations(conn)
+    conn.close()
+
+    if done:
+        for name in done:
+            print(f"✅ Migración aplicada: {name}")
+    else:
+        print("✅ La base de datos ya estaba al día")
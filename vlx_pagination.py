@@ -0,0 +1,60 @@
+"""
+PAGINACIÓN POR CURSOR (KEYSET) PARA LOS LISTADOS VANELUX
+========================================================
+
+El cursor es opaco para el cliente: codifica la clave de orden de la última
+fila entregada, `(created_at, id)`, en base64 url-safe. La siguiente página
+continúa con `WHERE (created_at, id) < (?, ?)`, que usa el índice
+`(user_id, created_at DESC, id DESC)` sin recorrer las filas anteriores
+como hace OFFSET.
+
+`check_page` valida `page` / `page_size` antes de llegar al SQL y
+`next_page` corta la fila extra que se pide para saber si hay otra página.
+"""
+
+import base64
+import json
+import os
+from typing import List, Optional, Tuple
+
+PAGE_SIZE_MAX = int(os.getenv("VLX_PAGE_SIZE_MAX", "500"))
+
+
+def encode_cursor(created_at: str, booking_id: int) -> str:
+    """Codifica la clave de orden de una fila como cursor opaco"""
+    raw = json.dumps([created_at, booking_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Decodifica un cursor; lanza ValueError si está mal formado"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, booking_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Cursor inválido")
+    if not isinstance(created_at, str) or not isinstance(booking_id, int):
+        raise ValueError("Cursor inválido")
+    return created_at, booking_id
+
+
+def check_page(page: int, page_size: int, max_page_size: int = PAGE_SIZE_MAX) -> None:
+    """Lanza ValueError si la página o su tamaño están fuera de rango"""
+    if page < 1:
+        raise ValueError("page must be >= 1")
+    if not 1 <= page_size <= max_page_size:
+        raise ValueError(f"page_size must be between 1 and {max_page_size}")
+
+
+def next_page(rows: List[dict], page_size: int) -> Tuple[List[dict], Optional[str]]:
+    """
+    (filas de la página, next_cursor) a partir de una consulta con LIMIT
+    page_size + 1: la fila extra solo indica que hay más.
+    """
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    if not rows:
+        return rows, None
+    last = rows[-1]
+    return rows, encode_cursor(last["created_at"], last["id"])
@@ -0,0 +1,356 @@
+"""
+MOTOR DE TARIFAS VECTORIZADO (PORT DE pricing_service.dart)
+===========================================================
+
+Las reglas de precio vivían solo en `PricingService` de la app Flutter
+(lib/services/pricing_service.dart), así que el backend aceptaba cualquier
+`price` que enviara el cliente. Este módulo replica esas reglas en NumPy:
+
+- Clasificación de ruta: Manhattan <-> JFK / LGA / Newark (tarifa plana),
+  local NYC (base hasta 5 millas + extra por milla) o fuera de NYC (base +
+  por milla), con las mismas cajas y el mismo radio de aeropuerto (3 mi,
+  haversine con la fórmula de atan2 de la app).
+- Los cinco tiers (sedan, suv, escalade, sprinter, miniCoach) salen en una
+  sola pasada: el resultado es una matriz (viajes x tiers).
+- Multiplicador por tipo de servicio, ida y vuelta (x2 millas, x2 peajes,
+  x2 tarifa plana) y peajes sumados al final, en el mismo orden de
+  operaciones que el Dart para que los doubles coincidan exactamente.
+
+Si se cambia una tarifa en pricing_service.dart hay que cambiarla aquí.
+"""
+
+import math
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+# ==============================================================================
+# TARIFAS (mismas constantes que PricingService)
+# ==============================================================================
+
+TIERS = ("sedan", "suv", "escalade", "sprinter", "miniCoach")
+TIER_LABELS = ("Sedan", "Luxury SUV", "Executive SUV", "Sprinter", "Mini Coach")
+
+ROUTE_TYPES = (
+    "airportManhattanJFK",
+    "airportManhattanLGA",
+    "airportManhattanNewark",
+    "localCity",
+    "outsideCity",
+)
+ROUTE_LABELS = (
+    "Manhattan ↔ JFK Airport",
+    "Manhattan ↔ LaGuardia Airport",
+    "Manhattan ↔ Newark Airport",
+    "NYC Local",
+    "Outside NYC",
+)
+ROUTE_JFK, ROUTE_LGA, ROUTE_EWR, ROUTE_LOCAL, ROUTE_OUTSIDE = range(5)
+
+JFK = (40.6413, -73.7781)
+LGA = (40.7769, -73.8740)
+EWR = (40.6895, -74.1745)
+AIRPORT_RADIUS_MILES = 3.0
+EARTH_RADIUS_MILES = 3958.8
+
+MANHATTAN_BOX = (40.700, 40.882, -74.020, -73.907)  # lat_min, lat_max, lng_min, lng_max
+NYC_BOX = (40.490, 40.920, -74.260, -73.680)
+
+# Filas: JFK, LGA, EWR; columnas en el orden de TIERS
+AIRPORT_FLAT_RATES = np.array([
+    [190.0, 230.0, 280.0, 390.0, 560.0],
+    [170.0, 210.0, 255.0, 360.0, 520.0],
+    [230.0, 275.0, 330.0, 460.0, 640.0],
+])
+LOCAL_BASE_RATE = np.array([75.0, 95.0, 125.0, 190.0, 280.0])
+LOCAL_EXTRA_MILE_RATE = np.array([4.25, 5.50, 6.75, 9.50, 12.00])
+LOCAL_BASE_INCLUDED_MILES = 5.0
+OUTSIDE_CITY_BASE_FARE = np.array([140.0, 170.0, 210.0, 300.0, 430.0])
+OUTSIDE_CITY_RATE = np.array([6.00, 7.25, 8.75, 12.50, 16.00])
+
+SERVICE_MULTIPLIERS: Dict[str, float] = {
+    "point to point": 1.0,
+    "to airport": 1.10,
+    "from airport": 1.10,
+    "airport transfer": 1.10,
+    "hourly/as directed": 1.35,
+    "hourly service": 1.35,
+    "corporate": 1.20,
+    "wedding": 1.40,
+    "events": 1.40,
+    "proms": 1.40,
+    "tour": 1.25,
+    "tours": 1.25,
+    "city tour": 1.25,
+}
+
+
+def vehicle_tier(vehicle_name: Optional[str]) -> int:
+    """Índice en TIERS según el nombre del vehículo (PricingService.getVehicleTier)"""
+    name = (vehicle_name or "").lower()
+    if "escalade" in name or "range rover" in name or "autobiography" in name:
+        return 2
+    if "suburban" in name or "expedition" in name:
+        return 1
+    if "sprinter" in name:
+        return 3
+    if "coach" in name:
+        return 4
+    return 0
+
+
+def service_multiplier(service_type: Optional[str]) -> float:
+    raw = (service_type or "").strip().lower()
+    return SERVICE_MULTIPLIERS.get(raw or "point to point", 1.0)
+
+
+# ==============================================================================
+# CÁLCULO VECTORIZADO
+# ==============================================================================
+
+def _to_rad(degrees):
+    return degrees * math.pi / 180
+
+
+def haversine_miles(lat1, lng1, lat2, lng2) -> np.ndarray:
+    """
+    Distancia en millas, elemento a elemento (con broadcasting). Mismo orden
+    de operaciones que PricingService._distanceBetween, para que el radio de
+    aeropuerto corte en el mismo punto que en la app.
+    """
+    lat1 = np.asarray(lat1, dtype=np.float64)
+    lat2 = np.asarray(lat2, dtype=np.float64)
+    sin_dlat = np.sin(_to_rad(lat2 - lat1) / 2)
+    sin_dlng = np.sin(_to_rad(np.asarray(lng2, dtype=np.float64) - lng1) / 2)
+    a = sin_dlat * sin_dlat + np.cos(_to_rad(lat1)) * np.cos(_to_rad(lat2)) * sin_dlng * sin_dlng
+    return EARTH_RADIUS_MILES * (2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)))
+
+
+def _in_box(lat, lng, box) -> np.ndarray:
+    lat_min, lat_max, lng_min, lng_max = box
+    return (lat >= lat_min) & (lat <= lat_max) & (lng >= lng_min) & (lng <= lng_max)
+
+
+def _near(lat, lng, airport) -> np.ndarray:
+    return haversine_miles(lat, lng, airport[0], airport[1]) <= AIRPORT_RADIUS_MILES
+
+
+def classify_routes(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng) -> np.ndarray:
+    """Índice en ROUTE_TYPES por viaje (PricingService.detectRouteType)"""
+    pickup_lat, pickup_lng, dropoff_lat, dropoff_lng = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.float64) for value in (pickup_lat, pickup_lng, dropoff_lat, dropoff_lng))
+    )
+    pickup_manhattan = _in_box(pickup_lat, pickup_lng, MANHATTAN_BOX)
+    dropoff_manhattan = _in_box(dropoff_lat, dropoff_lng, MANHATTAN_BOX)
+
+    conditions = []
+    for airport in (JFK, LGA, EWR):
+        conditions.append(
+            (pickup_manhattan & _near(dropoff_lat, dropoff_lng, airport))
+            | (_near(pickup_lat, pickup_lng, airport) & dropoff_manhattan)
+        )
+    conditions.append(_in_box(pickup_lat, pickup_lng, NYC_BOX) & _in_box(dropoff_lat, dropoff_lng, NYC_BOX))
+    # np.select respeta el orden: JFK, LGA, EWR, local, y si nada aplica, fuera de NYC
+    return np.select(conditions, [ROUTE_JFK, ROUTE_LGA, ROUTE_EWR, ROUTE_LOCAL], default=ROUTE_OUTSIDE)
+
+
+def price_routes(routes, distance_miles, multiplier=1.0, is_return_trip=False, toll_cost=0.0) -> np.ndarray:
+    """
+    Matriz de precios (viajes x 5 tiers) para rutas ya clasificadas.
+    Todos los argumentos aceptan escalares o arreglos de un valor por viaje.
+    """
+    routes = np.asarray(routes)
+    factor = np.where(np.asarray(is_return_trip, dtype=bool), 2.0, 1.0)
+    effective_miles = (np.asarray(distance_miles, dtype=np.float64) * factor)[..., None]
+    effective_tolls = (np.asarray(toll_cost, dtype=np.float64) * factor)[..., None]
+    multiplier = np.asarray(multiplier, dtype=np.float64)[..., None]
+    factor = factor[..., None]
+
+    # Cada regla para todos los viajes; luego se elige la que corresponde a la ruta
+    flat_rates = AIRPORT_FLAT_RATES[np.minimum(routes, ROUTE_EWR)]
+    flat = (flat_rates * factor) * multiplier + effective_tolls
+    extra_miles = np.maximum(effective_miles - LOCAL_BASE_INCLUDED_MILES, 0.0)
+    local = (LOCAL_BASE_RATE + extra_miles * LOCAL_EXTRA_MILE_RATE) * multiplier + effective_tolls
+    outside = (OUTSIDE_CITY_BASE_FARE + effective_miles * OUTSIDE_CITY_RATE) * multiplier + effective_tolls
+
+    route_column = routes[..., None]
+    return np.where(route_column <= ROUTE_EWR, flat, np.where(route_column == ROUTE_LOCAL, local, outside))
+
+
+def quote_arrays(
+    pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, distance_miles,
+    multiplier=1.0, is_return_trip=False, toll_cost=0.0,
+):
+    """(rutas, precios viajes x tiers) en una sola pasada vectorizada"""
+    routes = classify_routes(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng)
+    return routes, price_routes(routes, distance_miles, multiplier, is_return_trip, toll_cost)
+
+
+# ==============================================================================
+# CAMINO ESCALAR (lotes chicos)
+# ==============================================================================
+
+# Por debajo de este tamaño el costo fijo de NumPy (~decenas de ops sobre
+# arreglos diminutos) supera al cálculo: re-tarifar una reserva en
+# create_booking usa el camino escalar, con las mismas operaciones en el
+# mismo orden
+SCALAR_MAX_TRIPS = 16
+
+_FLAT_ROWS = AIRPORT_FLAT_RATES.tolist()
+_LOCAL_BASE = LOCAL_BASE_RATE.tolist()
+_LOCAL_EXTRA = LOCAL_EXTRA_MILE_RATE.tolist()
+_OUTSIDE_BASE = OUTSIDE_CITY_BASE_FARE.tolist()
+_OUTSIDE_RATE = OUTSIDE_CITY_RATE.tolist()
+
+
+def _haversine_scalar(lat1, lng1, lat2, lng2):
+    sin_dlat = math.sin(_to_rad(lat2 - lat1) / 2)
+    sin_dlng = math.sin(_to_rad(lng2 - lng1) / 2)
+    a = sin_dlat * sin_dlat + math.cos(_to_rad(lat1)) * math.cos(_to_rad(lat2)) * sin_dlng * sin_dlng
+    return EARTH_RADIUS_MILES * (2 * math.atan2(math.sqrt(a), math.sqrt(1 - a)))
+
+
+def _in_box_scalar(lat, lng, box):
+    return box[0] <= lat <= box[1] and box[2] <= lng <= box[3]
+
+
+def classify_route(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng) -> int:
+    """Versión escalar de classify_routes"""
+    pickup_manhattan = _in_box_scalar(pickup_lat, pickup_lng, MANHATTAN_BOX)
+    dropoff_manhattan = _in_box_scalar(dropoff_lat, dropoff_lng, MANHATTAN_BOX)
+    if pickup_manhattan or dropoff_manhattan:
+        for route, airport in ((ROUTE_JFK, JFK), (ROUTE_LGA, LGA), (ROUTE_EWR, EWR)):
+            if (pickup_manhattan and _haversine_scalar(dropoff_lat, dropoff_lng, *airport) <= AIRPORT_RADIUS_MILES) or (
+                dropoff_manhattan and _haversine_scalar(pickup_lat, pickup_lng, *airport) <= AIRPORT_RADIUS_MILES
+            ):
+                return route
+    if _in_box_scalar(pickup_lat, pickup_lng, NYC_BOX) and _in_box_scalar(dropoff_lat, dropoff_lng, NYC_BOX):
+        return ROUTE_LOCAL
+    return ROUTE_OUTSIDE
+
+
+def price_route(route, distance_miles, multiplier=1.0, is_return_trip=False, toll_cost=0.0) -> list:
+    """Versión escalar de price_routes: lista con el precio de cada tier"""
+    factor = 2.0 if is_return_trip else 1.0
+    effective_miles = distance_miles * factor
+    effective_tolls = toll_cost * factor
+    if route <= ROUTE_EWR:
+        return [(rate * factor) * multiplier + effective_tolls for rate in _FLAT_ROWS[route]]
+    if route == ROUTE_LOCAL:
+        extra_miles = max(effective_miles - LOCAL_BASE_INCLUDED_MILES, 0.0)
+        return [
+            (base + extra_miles * extra) * multiplier + effective_tolls
+            for base, extra in zip(_LOCAL_BASE, _LOCAL_EXTRA)
+        ]
+    return [
+        (base + effective_miles * rate) * multiplier + effective_tolls
+        for base, rate in zip(_OUTSIDE_BASE, _OUTSIDE_RATE)
+    ]
+
+
+def quote_rows(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, distance_miles, multipliers, returns, tolls):
+    """
+    (rutas, precios) como listas de Python, una fila por viaje. Elige el
+    camino escalar o el vectorizado según el tamaño del lote.
+    """
+    if len(pickup_lat) <= SCALAR_MAX_TRIPS:
+        routes = [
+            classify_route(*coordinates)
+            for coordinates in zip(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng)
+        ]
+        prices = [
+            price_route(*row)
+            for row in zip(routes, distance_miles, multipliers, returns, tolls)
+        ]
+        return routes, prices
+    routes, prices = quote_arrays(
+        pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, distance_miles, multipliers, returns, tolls
+    )
+    return routes.tolist(), prices.tolist()
+
+
+# ==============================================================================
+# RESPUESTAS PARA LA API
+# ==============================================================================
+
+def _tier_rates(route: int, tier: int):
+    """(base_rate, per_mile_rate) como en PriceEstimate; None en tarifa plana"""
+    if route <= ROUTE_EWR:
+        return None, None
+    if route == ROUTE_LOCAL:
+        return _LOCAL_BASE[tier], _LOCAL_EXTRA[tier]
+    return _OUTSIDE_BASE[tier], _OUTSIDE_RATE[tier]
+
+
+def quote_trips(trips: Sequence[dict]) -> list:
+    """
+    Cotiza una lista de viajes (dicts con pickup_lat, pickup_lng,
+    destination_lat, destination_lng, distance_miles y opcionales
+    service_type, is_return_trip, toll_cost, vehicle_name) y arma la
+    respuesta con los cinco tiers de cada uno.
+    """
+    if not trips:
+        return []
+    returns = [bool(trip.get("is_return_trip")) for trip in trips]
+    tolls = [float(trip.get("toll_cost") or 0.0) for trip in trips]
+    routes, prices = quote_rows(
+        [trip["pickup_lat"] for trip in trips], [trip["pickup_lng"] for trip in trips],
+        [trip["destination_lat"] for trip in trips], [trip["destination_lng"] for trip in trips],
+        [trip["distance_miles"] for trip in trips],
+        [service_multiplier(trip.get("service_type")) for trip in trips],
+        returns, tolls,
+    )
+
+    results = []
+    for trip, route, row, is_return, toll in zip(trips, routes, prices, returns, tolls):
+        factor = 2.0 if is_return else 1.0
+        tiers = {}
+        for t, tier in enumerate(TIERS):
+            base_rate, per_mile_rate = _tier_rates(route, t)
+            tiers[tier] = {
+                "label": TIER_LABELS[t],
+                "total_price": round(row[t], 2),
+                "base_rate": base_rate,
+                "per_mile_rate": per_mile_rate,
+            }
+        result = {
+            "route_type": ROUTE_TYPES[route],
+            "route_label": ROUTE_LABELS[route],
+            "is_flat": route <= ROUTE_EWR,
+            "distance_miles": trip["distance_miles"] * factor,
+            "toll_cost": toll * factor,
+            "tiers": tiers,
+        }
+        if trip.get("vehicle_name"):
+            result["vehicle_tier"] = TIERS[vehicle_tier(trip["vehicle_name"])]
+            result["total_price"] = tiers[result["vehicle_tier"]]["total_price"]
+        results.append(result)
+    return results
+
+
+def tariff_prices(bookings: Sequence) -> list:
+    """
+    Tarifa del servidor (sin peajes: la reserva no los trae) para el vehículo
+    de cada reserva; None si faltan coordenadas o distancia.
+    Acepta objetos con atributos de BookingCreate.
+    """
+    result: list = [None] * len(bookings)
+    indexes = [
+        i for i, booking in enumerate(bookings)
+        if None not in (booking.pickup_lat, booking.pickup_lng, booking.destination_lat,
+                        booking.destination_lng, booking.distance_miles)
+        and math.isfinite(booking.distance_miles)
+    ]
+    if not indexes:
+        return result
+    selected = [bookings[i] for i in indexes]
+    _, prices = quote_rows(
+        [b.pickup_lat for b in selected], [b.pickup_lng for b in selected],
+        [b.destination_lat for b in selected], [b.destination_lng for b in selected],
+        [b.distance_miles for b in selected],
+        [service_multiplier(b.service_type) for b in selected],
+        [False] * len(selected), [0.0] * len(selected),
+    )
+    for i, booking, row in zip(indexes, selected, prices):
+        result[i] = round(row[vehicle_tier(booking.vehicle_name)], 2)
+    return result
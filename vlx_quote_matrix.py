@@ -0,0 +1,202 @@
+"""
+COTIZACIÓN EN MATRIZ (MUCHOS ORÍGENES x MUCHOS DESTINOS)
+========================================================
+
+Para el despacho y el portal corporativo: dados N puntos de recogida y M
+destinos, calcula para cada par (i, j) la distancia, el tipo de ruta y el
+precio de los cinco tiers, con las reglas de vlx_pricing.
+
+- Todo lo que depende de un solo punto (caja de Manhattan, caja de NYC,
+  radio de cada aeropuerto) se calcula una vez por punto: N + M haversines,
+  no N x M. La clasificación del par es solo álgebra booleana con
+  broadcasting.
+- La distancia del par es haversine con broadcasting (filas x columnas),
+  multiplicada por `road_factor` para aproximar la distancia por calle.
+- Se procesa por bloques de filas de a lo sumo `chunk_pairs` pares, así la
+  memoria no depende de N x M: 10k x 10k se entrega en bloques de ~100k
+  pares (unos 30 MB de temporales) sin un loop de Python por par.
+
+`iter_matrix_ndjson` es síncrono, como vlx_export: `StreamingResponse` lo
+recorre en el threadpool y el envío lento del cliente frena el cálculo.
+Valida todo (puntos, tiers) antes de devolver el generador: un error sale
+como ValueError al llamarla, nunca a mitad de una respuesta 200.
+"""
+
+import json
+import os
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+
+from vlx_pricing import (
+    AIRPORT_RADIUS_MILES, EWR, JFK, LGA, MANHATTAN_BOX, NYC_BOX,
+    ROUTE_EWR, ROUTE_JFK, ROUTE_LGA, ROUTE_LOCAL, ROUTE_OUTSIDE, ROUTE_TYPES, TIERS,
+    haversine_miles, price_routes,
+)
+from vlx_zones import zone_keys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MATRIX_CHUNK_PAIRS = int(os.getenv("VLX_MATRIX_CHUNK_PAIRS", "100000"))
+
+
+# ==============================================================================
+# CÁLCULO POR BLOQUES
+# ==============================================================================
+
+def as_points(points, label: str = "points") -> np.ndarray:
+    """Lista no vacía de pares [lat, lng] finitos -> arreglo (N x 2); ValueError si no"""
+    try:
+        points = np.asarray(points, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError(f"{label}: each point must be [lat, lng]") from None
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError(f"{label}: each point must be [lat, lng]")
+    if len(points) == 0:
+        raise ValueError(f"{label} must not be empty")
+    if not np.isfinite(points).all():
+        raise ValueError(f"{label}: coordinates must be finite numbers")
+    return points
+
+
+def _in_box(lat, lng, box) -> np.ndarray:
+    lat_min, lat_max, lng_min, lng_max = box
+    return (lat >= lat_min) & (lat <= lat_max) & (lng >= lng_min) & (lng <= lng_max)
+
+
+class _PointFlags:
+    """Banderas por punto que usa detectRouteType"""
+
+    def __init__(self, points: np.ndarray):
+        lat, lng = points[:, 0], points[:, 1]
+        self.lat = lat
+        self.lng = lng
+        self.manhattan = _in_box(lat, lng, MANHATTAN_BOX)
+        self.nyc = _in_box(lat, lng, NYC_BOX)
+        self.near = [
+            haversine_miles(lat, lng, airport[0], airport[1]) <= AIRPORT_RADIUS_MILES
+            for airport in (JFK, LGA, EWR)
+        ]
+
+
+def _classify_block(origins: _PointFlags, rows: slice, destinations: _PointFlags) -> np.ndarray:
+    """Tipo de ruta (filas x columnas), mismas reglas que classify_routes"""
+    pickup_manhattan = origins.manhattan[rows, None]
+    dropoff_manhattan = destinations.manhattan[None, :]
+    conditions = [
+        (pickup_manhattan & near_dropoff[None, :]) | (near_pickup[rows, None] & dropoff_manhattan)
+        for near_pickup, near_dropoff in zip(origins.near, destinations.near)
+    ]
+    conditions.append(origins.nyc[rows, None] & destinations.nyc[None, :])
+    return np.select(
+        conditions, [ROUTE_JFK, ROUTE_LGA, ROUTE_EWR, ROUTE_LOCAL], default=ROUTE_OUTSIDE
+    ).astype(np.int8)
+
+
+def iter_matrix_blocks(
+    pickups,
+    destinations,
+    multiplier: float = 1.0,
+    is_return_trip: bool = False,
+    road_factor: float = 1.0,
+    chunk_pairs: int = MATRIX_CHUNK_PAIRS,
+) -> Iterator[tuple]:
+    """
+    Genera `(fila_inicial, distancias, rutas, precios)` por bloque de filas:
+    distancias y rutas de forma (filas x M), precios (filas x M x tiers).
+    `pickups` y `destinations` son secuencias de pares [lat, lng].
+    """
+    origins = _PointFlags(as_points(pickups, "pickups"))
+    targets = _PointFlags(as_points(destinations, "destinations"))
+    columns = len(targets.lat)
+    rows_per_block = max(1, chunk_pairs // columns)
+
+    for start in range(0, len(origins.lat), rows_per_block):
+        rows = slice(start, start + rows_per_block)
+        distances = haversine_miles(
+            origins.lat[rows, None], origins.lng[rows, None], targets.lat[None, :], targets.lng[None, :]
+        )
+        if road_factor != 1.0:
+            distances *= road_factor
+        routes = _classify_block(origins, rows, targets)
+        prices = price_routes(routes, distances, multiplier, is_return_trip)
+        yield start, distances, routes, prices
+
+
+# ==============================================================================
+# NDJSON
+# ==============================================================================
+
+def _dumps_line(record: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+    return (json.dumps(record) + "\n").encode("utf-8")
+
+
+def _column(values: np.ndarray):
+    # orjson serializa arreglos NumPy en C; el encoder estándar necesita listas
+    return values if orjson is not None else values.tolist()
+
+
+def iter_matrix_ndjson(
+    pickups,
+    destinations,
+    multiplier: float = 1.0,
+    is_return_trip: bool = False,
+    road_factor: float = 1.0,
+    tiers: Optional[Sequence[str]] = None,
+    chunk_pairs: int = MATRIX_CHUNK_PAIRS,
+) -> Iterator[bytes]:
+    """
+    NDJSON: una línea de encabezado y luego una línea por origen, en orden:
+
+        {"pickups": N, "destinations": M, "tiers": [...], "route_types": [...],
+         "pickup_zones": [N], "destination_zones": [M]}
+        {"pickup": 0, "distance_miles": [M], "route": [M], "prices": {"sedan": [M], ...}}
+
+    `route` es el índice en `route_types` y las zonas son claves de
+    vlx_zones (o null). Precios y distancias redondeados a centavos /
+    centésimas de milla. `tiers` limita los tiers que se envían.
+
+    Lanza ValueError al llamarla (no al recorrer el generador) si hay
+    puntos vacíos, mal formados o no finitos, o tiers desconocidos.
+    """
+    tiers = list(tiers or TIERS)
+    unknown = [tier for tier in tiers if tier not in TIERS]
+    if unknown:
+        raise ValueError(f"Unknown tiers: {', '.join(unknown)}")
+    origins = as_points(pickups, "pickups")
+    targets = as_points(destinations, "destinations")
+    return _matrix_lines(origins, targets, multiplier, is_return_trip, road_factor, tiers, chunk_pairs)
+
+
+def _matrix_lines(origins, targets, multiplier, is_return_trip, road_factor, tiers, chunk_pairs) -> Iterator[bytes]:
+    tier_indexes = [TIERS.index(tier) for tier in tiers]
+    blocks = iter_matrix_blocks(
+        origins, targets, multiplier, is_return_trip, road_factor, chunk_pairs
+    )
+    yield _dumps_line({
+        "pickups": len(origins),
+        "destinations": len(targets),
+        "tiers": tiers,
+        "route_types": list(ROUTE_TYPES),
+        "road_factor": road_factor,
+        "pickup_zones": zone_keys(origins[:, 0], origins[:, 1]),
+        "destination_zones": zone_keys(targets[:, 0], targets[:, 1]),
+    })
+    for start, distances, routes, prices in blocks:
+        distances = np.round(distances, 2)
+        # (filas x M x tiers) -> (tiers x filas x M): cada tier queda contiguo por fila
+        prices = np.ascontiguousarray(np.round(prices[..., tier_indexes], 2).transpose(2, 0, 1))
+        yield b"".join(
+            _dumps_line({
+                "pickup": start + offset,
+                "distance_miles": _column(distances[offset]),
+                "route": _column(routes[offset]),
+                "prices": {tier: _column(prices[t, offset]) for t, tier in enumerate(tiers)},
+            })
+            for offset in range(len(routes))
+        )
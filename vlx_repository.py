@@ -0,0 +1,343 @@
+"""
+CAPA DE ACCESO A DATOS ASÍNCRONA PARA EL ROUTER VANELUX
+=======================================================
+
+Los endpoints son `async def`, pero sqlite3 es bloqueante: una consulta lenta
+ejecutada directamente en el event loop frena todos los requests del worker.
+
+`AsyncDatabase` ejecuta cada operación en un pool de hilos dedicado a la base
+de datos, con una conexión prestada por `SQLitePool`. sqlite3 libera el GIL
+mientras SQLite trabaja, así que las lecturas avanzan en paralelo (WAL) y el
+loop queda libre para atender otros requests.
+
+Los repositorios (`UserRepository`, `BookingRepository`) concentran el SQL;
+los handlers hacen `await repo.metodo(...)` y reciben diccionarios.
+"""
+
+import asyncio
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from vlx_db_pool import SQLitePool
+from vlx_metrics import Metrics
+from vlx_user_cache import CachedUser, UserCache
+
+# Columnas que el cliente envía al crear una reserva (orden del INSERT)
+BOOKING_INSERT_COLUMNS: Sequence[str] = (
+    "pickup_address",
+    "pickup_lat",
+    "pickup_lng",
+    "destination_address",
+    "destination_lat",
+    "destination_lng",
+    "pickup_time",
+    "vehicle_name",
+    "passengers",
+    "price",
+    "distance_miles",
+    "distance_text",
+    "duration_text",
+    "service_type",
+    "is_scheduled",
+)
+
+# Todas las columnas de vlx_bookings que la API puede devolver (?fields=...)
+BOOKING_COLUMNS: Sequence[str] = (
+    ("id", "user_id") + tuple(BOOKING_INSERT_COLUMNS) + ("status", "created_at", "updated_at")
+)
+
+BOOKING_INSERT_SQL = f"""
+    INSERT INTO vlx_bookings (
+        user_id, {", ".join(BOOKING_INSERT_COLUMNS)},
+        status, created_at, updated_at
+    ) VALUES ({", ".join("?" * (len(BOOKING_INSERT_COLUMNS) + 1))},
+              'pending', datetime('now'), datetime('now'))
+"""
+
+# Estados de una reserva, en el orden del viaje
+BOOKING_STATUSES: Sequence[str] = (
+    "pending",
+    "confirmed",
+    "assigned",
+    "in_progress",
+    "completed",
+    "cancelled",
+)
+
+# INSERT ... RETURNING (SQLite >= 3.35) devuelve la fila creada en el mismo
+# statement, sin el SELECT posterior
+SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+BOOKING_INSERT_RETURNING_SQL = BOOKING_INSERT_SQL.rstrip() + " RETURNING *\n"
+
+
+def rows_to_dicts(cursor: sqlite3.Cursor, rows) -> List[dict]:
+    """Convierte filas a diccionarios usando la descripción del cursor"""
+    columns = [description[0] for description in cursor.description]
+    return [dict(zip(columns, row)) for row in rows]
+
+
+# ==============================================================================
+# EJECUCIÓN FUERA DEL EVENT LOOP
+# ==============================================================================
+
+class AsyncDatabase:
+    """Ejecuta funciones `fn(conn, ...)` sobre el pool en hilos dedicados"""
+
+    def __init__(self, pool: SQLitePool, workers: Optional[int] = None, metrics: Optional[Metrics] = None):
+        self.pool = pool
+        self.metrics = metrics
+        # Un hilo por conexión: más hilos solo esperarían en pool.acquire()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or pool.size, thread_name_prefix="vlx-db"
+        )
+
+    def _call(self, fn: Callable[..., Any], args: Tuple[Any, ...]) -> Any:
+        with self.pool.connection() as conn:
+            if self.metrics is None:
+                return fn(conn, *args)
+            # Solo la ejecución: la espera en la cola del executor no cuenta como SQL
+            started = time.perf_counter()
+            try:
+                return fn(conn, *args)
+            finally:
+                self.metrics.observe(
+                    "vlx_db_query_duration_seconds",
+                    time.perf_counter() - started,
+                    fn.__name__.lstrip("_"),
+                )
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Ejecuta `fn(conn, *args)` en el hilo de base de datos y espera el resultado"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, fn, args)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+# ==============================================================================
+# REPOSITORIOS
+# ==============================================================================
+
+class UserRepository:
+    """Acceso a la tabla users, con UserCache opcional delante"""
+
+    def __init__(self, db: AsyncDatabase, cache: Optional[UserCache] = None):
+        self.db = db
+        self.cache = cache
+
+    @staticmethod
+    def _get_active_by_login(conn: sqlite3.Connection, login: str) -> Optional[dict]:
+        cursor = conn.execute("""
+            SELECT id, username, email, password_hash, roles, allowed_apps, status
+            FROM users
+            WHERE (email = ? OR username = ?) AND status = 'active'
+        """, (login, login))
+        row = cursor.fetchone()
+        return rows_to_dicts(cursor, [row])[0] if row else None
+
+    @staticmethod
+    def _get_by_id(conn: sqlite3.Connection, user_id: int) -> Optional[dict]:
+        cursor = conn.execute("""
+            SELECT id, username, email, password_hash, roles, allowed_apps, status
+            FROM users
+            WHERE id = ?
+        """, (user_id,))
+        row = cursor.fetchone()
+        return rows_to_dicts(cursor, [row])[0] if row else None
+
+    def _remember(self, row: Optional[dict]) -> Optional[CachedUser]:
+        if row is None:
+            return None
+        user = CachedUser.from_row(row)
+        if self.cache is not None:
+            self.cache.put(user)
+        return user
+
+    async def get_active_by_login(self, login: str) -> Optional[CachedUser]:
+        """Usuario activo por email o username (None si no existe o no está activo)"""
+        if self.cache is not None:
+            user = self.cache.get_by_login(login)
+            if user is not None:
+                return user if user.is_active else None
+        return self._remember(await self.db.run(self._get_active_by_login, login))
+
+    async def get_by_id(self, user_id: int) -> Optional[CachedUser]:
+        """Usuario por id, con cualquier estado (None si no existe)"""
+        if self.cache is not None:
+            user = self.cache.get_by_id(user_id)
+            if user is not None:
+                return user
+        return self._remember(await self.db.run(self._get_by_id, user_id))
+
+
+class BookingRepository:
+    """Acceso a la tabla vlx_bookings"""
+
+    def __init__(self, db: AsyncDatabase, writer: Optional[Any] = None):
+        self.db = db
+        # GroupCommitWriter opcional (ver vlx_group_commit.py)
+        self.writer = writer
+
+    @staticmethod
+    def _insert_values(user_id: int, booking: Any) -> list:
+        values = [user_id]
+        for column in BOOKING_INSERT_COLUMNS:
+            value = getattr(booking, column)
+            if column == "is_scheduled":
+                value = 1 if value else 0
+            values.append(value)
+        return values
+
+    @staticmethod
+    def insert_returning(conn: sqlite3.Connection, user_id: int, booking: Any) -> dict:
+        """INSERT de una reserva dentro de la transacción actual; devuelve la fila"""
+        values = BookingRepository._insert_values(user_id, booking)
+        if SUPPORTS_RETURNING:
+            cursor = conn.execute(BOOKING_INSERT_RETURNING_SQL, values)
+            return rows_to_dicts(cursor, [cursor.fetchone()])[0]
+
+        cursor = conn.execute(BOOKING_INSERT_SQL, values)
+        cursor = conn.execute("SELECT * FROM vlx_bookings WHERE id = ?", (cursor.lastrowid,))
+        return rows_to_dicts(cursor, [cursor.fetchone()])[0]
+
+    @staticmethod
+    def _create(conn: sqlite3.Connection, user_id: int, booking: Any) -> dict:
+        try:
+            created = BookingRepository.insert_returning(conn, user_id, booking)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return created
+
+    async def create(self, user_id: int, booking: Any) -> dict:
+        """Inserta una reserva 'pending' y devuelve la fila creada"""
+        if self.writer is not None:
+            return await self.writer.create(user_id, booking)
+        return await self.db.run(self._create, user_id, booking)
+
+    @staticmethod
+    def _create_many(conn: sqlite3.Connection, user_id: int, bookings: Sequence[Any]) -> List[dict]:
+        try:
+            # IMMEDIATE toma el lock de escritura antes de leer MAX(id): con
+            # AUTOINCREMENT los ids de este lote quedan contiguos después de él
+            conn.execute("BEGIN IMMEDIATE")
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM vlx_bookings").fetchone()[0]
+            conn.executemany(
+                BOOKING_INSERT_SQL,
+                [BookingRepository._insert_values(user_id, booking) for booking in bookings],
+            )
+            cursor = conn.execute(
+                "SELECT * FROM vlx_bookings WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?",
+                (user_id, last_id, len(bookings)),
+            )
+            created = rows_to_dicts(cursor, cursor.fetchall())
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return created
+
+    async def create_many(self, user_id: int, bookings: Sequence[Any]) -> List[dict]:
+        """Inserta varias reservas en una sola transacción (todas o ninguna)"""
+        if not bookings:
+            return []
+        return await self.db.run(self._create_many, user_id, bookings)
+
+    @staticmethod
+    def _update_status(conn: sqlite3.Connection, booking_id: int, status: str) -> Optional[dict]:
+        try:
+            if SUPPORTS_RETURNING:
+                cursor = conn.execute(
+                    "UPDATE vlx_bookings SET status = ?, updated_at = datetime('now') WHERE id = ? RETURNING *",
+                    (status, booking_id),
+                )
+                row = cursor.fetchone()
+            else:
+                conn.execute(
+                    "UPDATE vlx_bookings SET status = ?, updated_at = datetime('now') WHERE id = ?",
+                    (status, booking_id),
+                )
+                cursor = conn.execute("SELECT * FROM vlx_bookings WHERE id = ?", (booking_id,))
+                row = cursor.fetchone()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return rows_to_dicts(cursor, [row])[0] if row else None
+
+    async def update_status(self, booking_id: int, status: str) -> Optional[dict]:
+        """Cambia el estado (y updated_at) de una reserva; devuelve la fila o None si no existe"""
+        if status not in BOOKING_STATUSES:
+            raise ValueError(f"status must be one of: {', '.join(BOOKING_STATUSES)}")
+        return await self.db.run(self._update_status, booking_id, status)
+
+    @staticmethod
+    def _version_for_user(conn: sqlite3.Connection, user_id: int) -> Tuple[int, Optional[str]]:
+        # Cubierto por idx_vlx_bookings_user_updated
+        row = conn.execute(
+            "SELECT COUNT(*), MAX(updated_at) FROM vlx_bookings WHERE user_id = ?",
+            (user_id,),
+        ).fetchone()
+        return row[0], row[1]
+
+    async def version_for_user(self, user_id: int) -> Tuple[int, Optional[str]]:
+        """(cantidad, último updated_at) de las reservas del usuario; cambia con cada alta o modificación"""
+        return await self.db.run(self._version_for_user, user_id)
+
+    @staticmethod
+    def _list_for_user(
+        conn: sqlite3.Connection,
+        user_id: int,
+        status: Optional[str],
+        limit: int,
+        offset: int,
+        after: Optional[Tuple[str, int]],
+        columns: Optional[Sequence[str]],
+    ) -> List[dict]:
+        # Usa idx_vlx_bookings_user_created o idx_vlx_bookings_user_status_created
+        select = ", ".join(columns) if columns else "*"
+        query = f"SELECT {select} FROM vlx_bookings WHERE user_id = ?"
+        params: list = [user_id]
+
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+
+        if after is not None:
+            query += " AND (created_at, id) < (?, ?)"
+            params.extend(after)
+
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        if offset:
+            query += " OFFSET ?"
+            params.append(offset)
+
+        cursor = conn.execute(query, params)
+        return rows_to_dicts(cursor, cursor.fetchall())
+
+    async def list_for_user(
+        self,
+        user_id: int,
+        status: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        after: Optional[Tuple[str, int]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[dict]:
+        """
+        Reservas del usuario, más recientes primero.
+
+        `after` es la clave `(created_at, id)` de la última fila de la página
+        anterior (paginación keyset); `offset` se mantiene para el modo clásico.
+        `columns` limita el SELECT a esas columnas (deben estar en BOOKING_COLUMNS).
+        """
+        if columns:
+            unknown = set(columns) - set(BOOKING_COLUMNS)
+            if unknown:
+                raise ValueError(f"Columnas desconocidas: {', '.join(sorted(unknown))}")
+        return await self.db.run(self._list_for_user, user_id, status, limit, offset, after, columns)
@@ -0,0 +1,297 @@
+"""
+LOG DE CONSULTAS LENTAS CON EXPLAIN QUERY PLAN
+==============================================
+
+Consultas como el `LIKE '%edgar%'` de buscar_edgar.py, o una del router que
+pierde su índice, se vuelven full scans sin que nadie lo note.
+`SlowQueryLog` instrumenta las conexiones (del pool o de un script):
+
+- `TracedCursor` mide cada `execute` / `executemany` más los `fetch*` hasta
+  agotar el resultado (para un SELECT el trabajo ocurre al recorrerlo).
+- Un progress handler de sqlite3 cuenta instrucciones de la VM de SQLite por
+  sentencia: un full scan se delata por los pasos aunque la tabla aún sea
+  chica y la consulta rápida.
+- Por encima de `threshold_ms` se registra el SQL normalizado (literales
+  reemplazados por `?`), la forma de los parámetros (tipos, nunca valores:
+  hay emails y hashes) y el `EXPLAIN QUERY PLAN`, cacheado por SQL.
+
+Salida: JSON lines en un log rotativo (VLX_SLOW_QUERY_LOG) y los últimos
+eventos + un resumen por consulta en memoria para `GET /api/debug/slow-queries`.
+
+Uso fuera del router:
+
+    slow_log = SlowQueryLog(threshold_ms=50)
+    conn = sqlite3.connect(db_path, factory=slow_log.connection_factory)
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+# ==============================================================================
+# CONFIGURACIÓN
+# ==============================================================================
+
+SLOW_QUERY_MS = float(os.getenv("VLX_SLOW_QUERY_MS", "100"))  # 0 = desactivado
+SLOW_QUERY_LOG = os.getenv("VLX_SLOW_QUERY_LOG", "slow_queries.log")
+SLOW_QUERY_LOG_BYTES = int(os.getenv("VLX_SLOW_QUERY_LOG_BYTES", str(5 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("VLX_SLOW_QUERY_LOG_BACKUPS", "3"))
+
+# Cada cuántas instrucciones de la VM se llama al progress handler
+PROGRESS_STEP = 1000
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+
+
+def normalize_sql(sql: str) -> str:
+    """SQL en una línea, con literales como `?` (agrupa la misma consulta con distintos valores)"""
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(?, ...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def param_shape(params: Any) -> Any:
+    """Tipos de los parámetros: ['int', 'str'] o {'email': 'str'}"""
+    if params is None:
+        return []
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    try:
+        return [type(value).__name__ for value in params]
+    except TypeError:
+        return type(params).__name__
+
+
+# ==============================================================================
+# CONEXIÓN Y CURSOR INSTRUMENTADOS
+# ==============================================================================
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor que reporta al SlowQueryLog de su conexión el tiempo de cada sentencia"""
+
+    _pending = None  # [sql, params, segundos, many] de la sentencia en curso
+
+    def _begin(self, sql, params, many):
+        self._flush()
+        self.connection._vm_steps = 0
+        self._pending = [sql, params, 0.0, many]
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._pending is not None:
+                self._pending[2] += time.perf_counter() - started
+
+    def _flush(self):
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            sql, params, elapsed, many = pending
+            connection = self.connection
+            connection._slow_log.record(
+                connection, sql, params, elapsed, connection._vm_steps * PROGRESS_STEP, many
+            )
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql, parameters, False)
+        self._timed(super().execute, sql, parameters)
+        if self.description is None:
+            self._flush()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        self._begin(sql, seq_of_parameters[0] if seq_of_parameters else (), True)
+        self._timed(super().executemany, sql, seq_of_parameters)
+        self._flush()
+        return self
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._flush()
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        if not rows:
+            self._flush()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._flush()
+        return rows
+
+    def close(self):
+        self._flush()
+        super().close()
+
+    def __del__(self):
+        # Cursores que nunca agotan el resultado (fetchone de una sola fila)
+        try:
+            self._flush()
+        except Exception:
+            pass
+
+
+class _TracedConnection(sqlite3.Connection):
+    """Base de `SlowQueryLog.connection_factory` (la subclase fija `_slow_log`)"""
+
+    _slow_log: "SlowQueryLog"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._vm_steps = 0
+        self.set_progress_handler(self._on_progress, PROGRESS_STEP)
+
+    def _on_progress(self):
+        self._vm_steps += 1
+        return 0  # distinto de 0 abortaría la consulta
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    # Connection.execute nativo no pasa por TracedCursor.execute
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# ==============================================================================
+# REGISTRO
+# ==============================================================================
+
+class SlowQueryLog:
+    """Recibe las sentencias medidas y guarda las que superan el umbral"""
+
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_QUERY_MS,
+        logfile: Optional[str] = SLOW_QUERY_LOG,
+        recent_size: int = 200,
+        max_plans: int = 500,
+    ):
+        self.threshold = threshold_ms / 1000.0
+        self.max_plans = max_plans
+        self.recent: deque = deque(maxlen=recent_size)
+        self._plans: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._summary: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.connection_factory = type(
+            "TracedConnection", (_TracedConnection,), {"_slow_log": self}
+        )
+
+        self.logger = logging.getLogger("vlx.slow_queries")
+        if logfile and not any(
+            getattr(handler, "baseFilename", None) == os.path.abspath(logfile)
+            for handler in self.logger.handlers
+        ):
+            handler = logging.handlers.RotatingFileHandler(
+                logfile,
+                maxBytes=SLOW_QUERY_LOG_BYTES,
+                backupCount=SLOW_QUERY_LOG_BACKUPS,
+                encoding="utf-8",
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(handler)
+            self.logger.setLevel(logging.INFO)
+
+        # Métricas
+        self.statements = 0
+        self.slow = 0
+
+    def record(self, conn, sql: str, params: Any, elapsed: float, vm_steps: int, many: bool = False) -> None:
+        self.statements += 1
+        if elapsed < self.threshold:
+            return
+
+        normalized = normalize_sql(sql)
+        plan = self._explain(conn, normalized, sql, params)
+        entry = {
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "ms": round(elapsed * 1000, 3),
+            "vm_steps": vm_steps,
+            "sql": normalized,
+            "params": param_shape(params),
+            "executemany": many,
+            "plan": plan,
+            "full_scan": any(
+                line.startswith("SCAN") and "USING" not in line for line in plan
+            ),
+        }
+        with self._lock:
+            self.slow += 1
+            self.recent.append(entry)
+            summary = self._summary.get(normalized)
+            if summary is None:
+                summary = self._summary[normalized] = {
+                    "sql": normalized, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "full_scan": entry["full_scan"], "plan": plan,
+                }
+            summary["count"] += 1
+            summary["total_ms"] += entry["ms"]
+            summary["max_ms"] = max(summary["max_ms"], entry["ms"])
+        self.logger.info(json.dumps(entry, ensure_ascii=False))
+
+    def _explain(self, conn, normalized: str, sql: str, params: Any) -> List[str]:
+        with self._lock:
+            plan = self._plans.get(normalized)
+            if plan is not None:
+                self._plans.move_to_end(normalized)
+                return plan
+
+        if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            plan = []
+        else:
+            try:
+                # Cursor base: el EXPLAIN no debe volver a pasar por TracedCursor
+                cursor = sqlite3.Cursor(conn)
+                rows = cursor.execute("EXPLAIN QUERY PLAN " + sql, params or ()).fetchall()
+                cursor.close()
+                plan = [row[-1] for row in rows]
+            except sqlite3.Error as e:
+                plan = [f"EXPLAIN falló: {e}"]
+
+        with self._lock:
+            self._plans[normalized] = plan
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+        return plan
+
+    def top(self, limit: int = 20) -> List[dict]:
+        """Consultas lentas agrupadas por SQL normalizado, las de más tiempo total primero"""
+        with self._lock:
+            summaries = [dict(summary) for summary in self._summary.values()]
+        summaries.sort(key=lambda summary: summary["total_ms"], reverse=True)
+        return summaries[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.recent.clear()
+            self._summary.clear()
+            self._plans.clear()
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "statements": self.statements,
+            "slow": self.slow,
+            "distinct_slow": len(self._summary),
+        }
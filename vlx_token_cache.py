@@ -0,0 +1,116 @@
+"""
+CACHE DE TOKENS JWT YA VALIDADOS
+================================
+
+La app envía el mismo bearer token cientos de veces por sesión y cada request
+repetía `jwt.decode` (verificación HMAC + parseo de claims). Este cache guarda
+el payload ya verificado, con:
+
+- Clave: SHA-256 del token completo. Un token alterado (payload o firma)
+  produce otra clave, no encuentra entrada y pasa por la validación normal,
+  que lo rechaza. Los rechazos nunca se guardan.
+- Expiración: el TTL configurado, recortado al `exp` del propio token, así que
+  un token vencido deja de servirse desde el cache en el mismo instante en
+  que `jwt.decode` empezaría a rechazarlo.
+- Tamaño acotado con desalojo LRU.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# ==============================================================================
+# CONFIGURACIÓN
+# ==============================================================================
+
+TOKEN_CACHE_SIZE = int(os.getenv("VLX_TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = float(os.getenv("VLX_TOKEN_CACHE_TTL", "300"))  # segundos
+
+
+def token_digest(token: str) -> bytes:
+    """Clave del cache: nunca se guarda el token en claro"""
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class TokenCache:
+    """Cache LRU + TTL de payloads JWT verificados (seguro entre hilos)"""
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE, ttl: float = TOKEN_CACHE_TTL, clock=time.time):
+        if maxsize < 1:
+            raise ValueError("El tamaño del cache debe ser >= 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, token: str) -> Optional[dict]:
+        """Payload verificado si el token está en cache y sigue vigente"""
+        key = token_digest(token)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, payload = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, token: str, payload: dict) -> None:
+        """Guarda el payload de un token que YA pasó por jwt.decode"""
+        now = self._clock()
+        expires_at = now + self.ttl
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= now:
+            return
+
+        key = token_digest(token)
+        with self._lock:
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, token: str) -> None:
+        """Saca un token del cache (p. ej. en un logout)"""
+        with self._lock:
+            self._entries.pop(token_digest(token), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Contadores de aciertos/fallos (para logs o /metrics)"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
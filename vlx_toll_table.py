@@ -0,0 +1,435 @@
+"""
+MODELO LOCAL DE PEAJES (TABLA DE CRUCES DE NYC)
+===============================================
+
+Casi todos los viajes pagan, si pagan, alguno de los mismos quince cruces:
+los nueve puentes y túneles de MTA (Verrazzano, RFK, Queens-Midtown, Hugh
+L. Carey, Throgs Neck, Whitestone, Henry Hudson, Cross Bay, Marine Parkway)
+y los seis de Port Authority (GWB, Lincoln, Holland, Goethals, Bayonne,
+Outerbridge). Este módulo los tarifa sin red, en microsegundos, y deja a
+TollGuru (vlx_tolls.TollService) solo las rutas que no puede resolver.
+
+- `FACILITIES`: tabla versionada (TOLL_TABLE_VERSION) con la tarifa E-ZPass
+  por clase de vehículo (pico / valle) y una geocerca por lado de entrada.
+  `charged` dice qué sentidos pagan (Port Authority y Verrazzano cobran en
+  un solo sentido).
+- Por zonas (`match_zones`): con origen y destino en coordenadas, las zonas
+  de vlx_zones y `ZONE_RULES` dan los cruces de pares de zonas sin
+  ambigüedad (Brooklyn -> Staten Island es el Verrazzano; JFK o LGA ->
+  Staten Island también). Si el par admite rutas con y sin peaje
+  (Manhattan <-> Queens y los aeropuertos: Queens-Midtown o el Queensboro
+  gratis; EWR por el NJ Turnpike), no hay regla y decide el proveedor.
+  Cuando una regla admite varios cruces alternativos, solo vale si todos
+  cuestan lo mismo. Con la mezcla de bench_toll_table.py (Manhattan y
+  aeropuertos primero) esto resuelve solo ~37 % de las cotizaciones sin
+  polyline: casi todo el resto son pares con Manhattan o EWR. El ahorro
+  grande de llamadas a TollGuru viene de las rutas que mandan la polyline
+  de Directions (maps_proxy.js `getRouteWithTolls` con `options.polyline`).
+- Por polyline (`match_polyline`): la ruta se densifica a ~50 m y se mira
+  en qué orden pasa por las geocercas de cada cruce. Solo es confiable si
+  toda la ruta queda en zonas cubiertas por la tabla (tramos sin zona de a
+  lo sumo VLX_TOLL_COVERAGE_GAP_M, como un puente gratis sobre el río):
+  afuera hay peajes que la tabla no tiene (NJ Turnpike, Garden State).
+
+No se modelan el cargo de congestión de Manhattan, los descuentos de
+residentes ni Tolls by Mail. Las tarifas y geocercas son de referencia:
+al actualizarlas hay que subir TOLL_TABLE_VERSION (viaja en cada respuesta).
+"""
+
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from vlx_distance_cache import parse_coordinates
+from vlx_tolls import TollRequest
+from vlx_zones import (
+    NO_ZONE, NYC_ZONE_KEYS, Ring, ZoneIndex, default_index, point_in_rings, points_in_rings,
+)
+
+try:
+    from zoneinfo import ZoneInfo
+    _NY = ZoneInfo("America/New_York")
+except Exception:  # sin base de zonas horarias (Windows sin tzdata)
+    _NY = timezone(timedelta(hours=-5))
+
+TOLL_TABLE_VERSION = "2025.1"
+TOLL_COVERAGE_GAP_M = float(os.getenv("VLX_TOLL_COVERAGE_GAP_M", "1500"))
+_DENSIFY_DEG = 0.0005  # ~50 m entre puntos de la polyline densificada
+_METERS_PER_DEG = 111_000
+
+
+# ==============================================================================
+# TABLA DE CRUCES
+# ==============================================================================
+
+# Tipo de vehículo de TollGuru -> clase de la tabla; otros tipos van al proveedor
+VEHICLE_CLASSES = {
+    "2AxlesAuto": "auto",
+    "2AxlesTaxi": "auto",
+    "2AxlesTNC": "auto",
+    "2AxlesBus": "bus",
+}
+
+
+def _box(lat: float, lng: float, half_lat: float = 0.0015, half_lng: float = 0.002) -> Ring:
+    """Geocerca rectangular centrada en el punto"""
+    return (
+        (lat - half_lat, lng - half_lng), (lat - half_lat, lng + half_lng),
+        (lat + half_lat, lng + half_lng), (lat + half_lat, lng - half_lng),
+    )
+
+
+@dataclass(frozen=True)
+class Facility:
+    key: str
+    name: str
+    operator: str  # mta, panynj
+    approaches: Tuple[Tuple[str, Ring], ...]  # (lado, geocerca de entrada)
+    charged: Tuple[Tuple[str, str], ...]  # (lado de entrada, lado de salida) que pagan
+    rates: Dict[str, Tuple[float, float]]  # clase -> (pico, valle) en USD, E-ZPass
+
+    def toll(self, entry: str, exit: str, vehicle_class: str, peak: bool) -> Optional[float]:
+        """Peaje del cruce en ese sentido; None si la clase no tiene tarifa"""
+        rate = self.rates.get(vehicle_class)
+        if rate is None:
+            return None
+        if (entry, exit) not in self.charged:
+            return 0.0
+        return rate[0] if peak else rate[1]
+
+
+def _both(*sides: str) -> Tuple[Tuple[str, str], ...]:
+    return tuple((a, b) for a in sides for b in sides if a != b)
+
+
+# Tarifas E-ZPass de referencia (cruces mayores de MTA: tarifa plana;
+# Port Authority: pico / valle). El Henry Hudson no admite buses.
+_MTA_MAJOR = {"auto": (6.94, 6.94), "bus": (15.13, 15.13)}
+_MTA_MINOR = {"auto": (4.11, 4.11), "bus": (7.63, 7.63)}
+_MTA_HENRY_HUDSON = {"auto": (3.18, 3.18)}
+_PANYNJ = {"auto": (16.06, 14.06), "bus": (38.00, 38.00)}
+
+FACILITIES: Tuple[Facility, ...] = (
+    Facility("verrazzano", "Verrazzano-Narrows Bridge", "mta", (
+        ("brooklyn", _box(40.6085, -74.0370)),
+        ("staten_island", _box(40.6030, -74.0545)),
+    ), (("brooklyn", "staten_island"),), _MTA_MAJOR),
+    Facility("rfk", "RFK (Triborough) Bridge", "mta", (
+        ("manhattan", _box(40.8005, -73.9275, 0.001, 0.0015)),
+        ("bronx", _box(40.8010, -73.9160, 0.001, 0.0015)),
+        ("queens", _box(40.7830, -73.9220, 0.001, 0.0015)),
+    ), _both("manhattan", "bronx", "queens"), _MTA_MAJOR),
+    Facility("queens_midtown", "Queens-Midtown Tunnel", "mta", (
+        ("manhattan", _box(40.7465, -73.9690)),
+        ("queens", _box(40.7440, -73.9560)),
+    ), _both("manhattan", "queens"), _MTA_MAJOR),
+    Facility("hugh_carey", "Hugh L. Carey Tunnel", "mta", (
+        ("manhattan", _box(40.7020, -74.0130)),
+        ("brooklyn", _box(40.6850, -74.0020)),
+    ), _both("manhattan", "brooklyn"), _MTA_MAJOR),
+    Facility("throgs_neck", "Throgs Neck Bridge", "mta", (
+        ("bronx", _box(40.8110, -73.7960)),
+        ("queens", _box(40.7930, -73.7925)),
+    ), _both("bronx", "queens"), _MTA_MAJOR),
+    Facility("whitestone", "Bronx-Whitestone Bridge", "mta", (
+        ("bronx", _box(40.8050, -73.8305)),
+        ("queens", _box(40.7935, -73.8300)),
+    ), _both("bronx", "queens"), _MTA_MAJOR),
+    Facility("henry_hudson", "Henry Hudson Bridge", "mta", (
+        ("manhattan", _box(40.8755, -73.9215, 0.001, 0.0015)),
+        ("bronx", _box(40.8805, -73.9215, 0.001, 0.0015)),
+    ), _both("manhattan", "bronx"), _MTA_HENRY_HUDSON),
+    Facility("cross_bay", "Cross Bay Veterans Memorial Bridge", "mta", (
+        ("broad_channel", _box(40.5950, -73.8180)),
+        ("rockaway", _box(40.5850, -73.8170)),
+    ), _both("broad_channel", "rockaway"), _MTA_MINOR),
+    Facility("marine_parkway", "Marine Parkway-Gil Hodges Bridge", "mta", (
+        ("brooklyn", _box(40.5800, -73.8860)),
+        ("rockaway", _box(40.5690, -73.8830)),
+    ), _both("brooklyn", "rockaway"), _MTA_MINOR),
+    Facility("gwb", "George Washington Bridge", "panynj", (
+        ("nj", _box(40.8520, -73.9600)),
+        ("manhattan", _box(40.8495, -73.9420)),
+    ), (("nj", "manhattan"),), _PANYNJ),
+    Facility("lincoln", "Lincoln Tunnel", "panynj", (
+        ("nj", _box(40.7655, -74.0180)),
+        ("manhattan", _box(40.7605, -74.0020)),
+    ), (("nj", "manhattan"),), _PANYNJ),
+    Facility("holland", "Holland Tunnel", "panynj", (
+        ("nj", _box(40.7285, -74.0340)),
+        ("manhattan", _box(40.7245, -74.0085)),
+    ), (("nj", "manhattan"),), _PANYNJ),
+    Facility("goethals", "Goethals Bridge", "panynj", (
+        ("nj", _box(40.6375, -74.1975)),
+        ("staten_island", _box(40.6330, -74.1880)),
+    ), (("nj", "staten_island"),), _PANYNJ),
+    Facility("bayonne", "Bayonne Bridge", "panynj", (
+        ("nj", _box(40.6460, -74.1420)),
+        ("staten_island", _box(40.6370, -74.1400)),
+    ), (("nj", "staten_island"),), _PANYNJ),
+    Facility("outerbridge", "Outerbridge Crossing", "panynj", (
+        ("nj", _box(40.5270, -74.2530)),
+        ("staten_island", _box(40.5260, -74.2420)),
+    ), (("nj", "staten_island"),), _PANYNJ),
+)
+
+# Zona de vlx_zones -> lado de los cruces (los aeropuertos de Queens son
+# Queens; EWR solo tiene regla para viajes dentro del aeropuerto)
+ZONE_SIDES = {
+    "jfk": "queens", "lga": "queens", "queens": "queens", "manhattan": "manhattan",
+    "bronx": "bronx", "brooklyn": "brooklyn", "staten_island": "staten_island",
+    "jersey_city_hoboken": "nj", "ewr": "ewr",
+}
+
+Crossing = Tuple[Tuple[str, ...], str, str]  # (cruces alternativos, lado de entrada, lado de salida)
+
+
+def _cross(facilities: Tuple[str, ...], entry: str, exit: str) -> Tuple[Crossing, ...]:
+    return ((facilities, entry, exit),)
+
+
+# (lado origen, lado destino) -> cruces en orden. Pares sin regla
+# (Manhattan <-> Queens/Brooklyn/Bronx, EWR <-> Manhattan por el NJ
+# Turnpike, Staten Island <-> Manhattan) quedan para el proveedor.
+_HUDSON = ("holland", "lincoln")
+_ARTHUR_KILL = ("bayonne", "goethals")
+_EAST_BRONX = ("whitestone", "throgs_neck", "rfk")
+ZONE_RULES: Dict[Tuple[str, str], Tuple[Crossing, ...]] = {
+    **{(side, side): () for side in ("manhattan", "bronx", "queens", "brooklyn", "staten_island", "nj", "ewr")},
+    ("brooklyn", "queens"): (),
+    ("queens", "brooklyn"): (),
+    ("nj", "manhattan"): _cross(_HUDSON, "nj", "manhattan"),
+    ("manhattan", "nj"): _cross(_HUDSON, "manhattan", "nj"),
+    ("brooklyn", "staten_island"): _cross(("verrazzano",), "brooklyn", "staten_island"),
+    ("staten_island", "brooklyn"): _cross(("verrazzano",), "staten_island", "brooklyn"),
+    # Queens (JFK, LGA) <-> Staten Island: Belt Parkway o BQE y el Verrazzano
+    ("queens", "staten_island"): _cross(("verrazzano",), "brooklyn", "staten_island"),
+    ("staten_island", "queens"): _cross(("verrazzano",), "staten_island", "brooklyn"),
+    ("nj", "staten_island"): _cross(_ARTHUR_KILL, "nj", "staten_island"),
+    ("staten_island", "nj"): _cross(_ARTHUR_KILL, "staten_island", "nj"),
+    ("bronx", "queens"): _cross(_EAST_BRONX, "bronx", "queens"),
+    ("queens", "bronx"): _cross(_EAST_BRONX, "queens", "bronx"),
+}
+
+# Zonas por las que una ruta solo cruza peajes de la tabla
+COVERED_ZONE_KEYS = (*NYC_ZONE_KEYS, "jersey_city_hoboken")
+
+# Rockaway y Broad Channel: según el punto exacto hay Cross Bay o Marine
+# Parkway de por medio, cosa que las zonas no distinguen. Siguen la costa
+# norte de la península para no incluir el sur de Brooklyn (Marine Park,
+# Mill Basin), que llega a Queens por el Belt Parkway sin peaje
+UNCERTAIN_AREAS: Tuple[Ring, ...] = (
+    (  # península de Rockaway
+        (40.540, -73.945), (40.540, -73.740), (40.607, -73.740), (40.600, -73.770),
+        (40.592, -73.820), (40.576, -73.880), (40.566, -73.945),
+    ),
+    ((40.588, -73.826), (40.588, -73.806), (40.632, -73.806), (40.632, -73.826)),  # Broad Channel
+)
+
+
+def is_peak(departure: datetime, operator: str) -> bool:
+    """Horario pico de Port Authority: hábiles 6-10 y 16-20, fin de semana 11-21"""
+    if operator != "panynj":
+        return False
+    local = departure.astimezone(_NY)
+    if local.weekday() >= 5:
+        return 11 <= local.hour < 21
+    return 6 <= local.hour < 10 or 16 <= local.hour < 20
+
+
+# ==============================================================================
+# MODELO
+# ==============================================================================
+
+def _densify(points: np.ndarray, step: float = _DENSIFY_DEG) -> np.ndarray:
+    """Intercala puntos para que ningún tramo supere `step` grados"""
+    if len(points) < 2:
+        return points
+    start, end = points[:-1], points[1:]
+    counts = np.maximum(1, np.ceil(np.abs(end - start).max(axis=1) / step).astype(np.int64))
+    segment = np.repeat(np.arange(len(start)), counts)
+    t = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)) / np.repeat(counts, counts)
+    dense = start[segment] + (end[segment] - start[segment]) * t[:, None]
+    return np.vstack([dense, points[-1:]])
+
+
+def _longest_run(mask: np.ndarray) -> int:
+    """Largo de la racha más larga de True"""
+    if not mask.any():
+        return 0
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.view(np.int8), [0]))))
+    return int((edges[1::2] - edges[::2]).max())
+
+
+class TollModel:
+    """
+    Tarifa peajes con FACILITIES sin llamar al proveedor. `estimate`
+    devuelve el resultado en el formato de /api/tolls, o None si la ruta no
+    se puede tarifar con confianza.
+    """
+
+    def __init__(
+        self,
+        facilities: Sequence[Facility] = FACILITIES,
+        zone_rules: Dict[Tuple[str, str], Tuple[Crossing, ...]] = ZONE_RULES,
+        zone_index: Optional[ZoneIndex] = None,
+        coverage_gap_m: float = TOLL_COVERAGE_GAP_M,
+    ):
+        self.facilities = {facility.key: facility for facility in facilities}
+        self.zone_rules = dict(zone_rules)
+        self.zone_index = zone_index or default_index()
+        self.coverage_gap_m = coverage_gap_m
+        unknown = {key for steps in self.zone_rules.values() for step in steps for key in step[0]} - set(self.facilities)
+        if unknown:
+            raise ValueError(f"Cruces desconocidos en las reglas: {', '.join(sorted(unknown))}")
+
+        zone_keys = [zone.key for zone in self.zone_index.zones]
+        self._zone_sides = [ZONE_SIDES.get(key) for key in zone_keys]
+        self._covered = np.array([key in COVERED_ZONE_KEYS for key in zone_keys] + [False])
+
+        # Caja envolvente por cruce (filtro previo de la polyline y cobertura del tramo sobre el agua)
+        self._bounds = {}
+        for facility in facilities:
+            vertices = np.array([vertex for _, ring in facility.approaches for vertex in ring])
+            self._bounds[facility.key] = (*vertices.min(axis=0), *vertices.max(axis=0))
+
+        # Métricas
+        self.zone_matches = 0
+        self.polyline_matches = 0
+        self.unmatched = 0
+
+    # ------------------------------------------------------------------
+    # Tarifa de una lista de cruces
+    # ------------------------------------------------------------------
+
+    def _price(self, crossings, vehicle_class: str, departure: datetime) -> Optional[Tuple[float, list]]:
+        """
+        `crossings`: [(alternativas, lado de entrada, lado de salida)].
+        (total, detalle) o None si falta tarifa o las alternativas difieren.
+        """
+        total, detail = 0.0, []
+        for alternatives, entry, exit in crossings:
+            tolls = set()
+            for key in alternatives:
+                facility = self.facilities[key]
+                toll = facility.toll(entry, exit, vehicle_class, is_peak(departure, facility.operator))
+                if toll is None:
+                    return None
+                tolls.add(toll)
+            if len(tolls) != 1:
+                return None
+            toll = tolls.pop()
+            total += toll
+            detail.append({"facilities": list(alternatives), "from": entry, "to": exit, "toll": toll})
+        return total, detail
+
+    # ------------------------------------------------------------------
+    # Coincidencia por zonas
+    # ------------------------------------------------------------------
+
+    def _side(self, lat: float, lng: float) -> Optional[str]:
+        if any(point_in_rings(lat, lng, (ring,)) for ring in UNCERTAIN_AREAS):
+            return None
+        index = self.zone_index.lookup_index(lat, lng)
+        return None if index == NO_ZONE else self._zone_sides[index]
+
+    def match_zones(self, origin: Tuple[float, float], destination: Tuple[float, float]):
+        """Cruces por las zonas de los extremos, o None si el par no tiene regla"""
+        start, end = self._side(*origin), self._side(*destination)
+        if start is None or end is None:
+            return None
+        steps = self.zone_rules.get((start, end))
+        return None if steps is None else list(steps)
+
+    # ------------------------------------------------------------------
+    # Coincidencia por polyline
+    # ------------------------------------------------------------------
+
+    def match_polyline(self, polyline: Sequence[Tuple[float, float]]):
+        """
+        Cruces en el orden en que la ruta pasa por las geocercas, o None si
+        la ruta sale de la zona cubierta por la tabla.
+        """
+        points = np.asarray(polyline, dtype=np.float64).reshape(-1, 2)
+        if len(points) < 2 or not np.isfinite(points).all():
+            return None
+        dense = _densify(points)
+        lat, lng = dense[:, 0], dense[:, 1]
+
+        zones = self.zone_index.lookup_many(lat, lng)
+        covered = self._covered[zones]  # NO_ZONE (-1) cae en el último elemento, False
+        found = []
+        for key, (lat_min, lng_min, lat_max, lng_max) in self._bounds.items():
+            near = (lat >= lat_min) & (lat <= lat_max) & (lng >= lng_min) & (lng <= lng_max)
+            if not near.any():
+                continue
+            covered |= near
+            indexes = np.flatnonzero(near)
+            sides = np.full(len(indexes), -1, dtype=np.int64)
+            facility = self.facilities[key]
+            for s, (_, ring) in enumerate(facility.approaches):
+                inside = points_in_rings(lat[indexes], lng[indexes], (ring,))
+                sides[inside & (sides < 0)] = s
+            order, sequence = indexes[sides >= 0], sides[sides >= 0]
+            # Cada cambio de lado en la secuencia es un cruce
+            for position in np.flatnonzero(sequence[1:] != sequence[:-1]) + 1:
+                entry = facility.approaches[sequence[position - 1]][0]
+                exit = facility.approaches[sequence[position]][0]
+                found.append((int(order[position]), (key,), entry, exit))
+
+        gap_points = self.coverage_gap_m / (_DENSIFY_DEG * _METERS_PER_DEG)
+        if _longest_run(~covered) > gap_points:
+            return None
+        found.sort(key=lambda item: item[0])
+        return [crossing[1:] for crossing in found]
+
+    # ------------------------------------------------------------------
+    # Request completo
+    # ------------------------------------------------------------------
+
+    def estimate(self, request: TollRequest) -> Optional[dict]:
+        vehicle_class = VEHICLE_CLASSES.get(request.vehicle_type)
+        crossings, match = None, None
+        if vehicle_class is not None:
+            if request.polyline:
+                crossings, match = self.match_polyline(request.polyline), "polyline"
+            elif not request.waypoints:
+                origin = parse_coordinates(request.origin)
+                destination = parse_coordinates(request.destination)
+                if origin is not None and destination is not None:
+                    crossings, match = self.match_zones(origin, destination), "zones"
+        priced = self._price(crossings, vehicle_class, request.departure) if crossings is not None else None
+        if priced is None:
+            self.unmatched += 1
+            return None
+
+        if match == "polyline":
+            self.polyline_matches += 1
+        else:
+            self.zone_matches += 1
+        total, detail = priced
+        return {
+            "has_tolls": total > 0,
+            "toll_cost": round(total, 2),
+            "toll_unavailable": False,
+            "toll_count": sum(1 for item in detail if item["toll"] > 0),
+            "currency": "USD",
+            "service_provider": "vlx_table",
+            "toll_table_version": TOLL_TABLE_VERSION,
+            "match": match,
+            "crossings": detail,
+        }
+
+    def stats(self) -> dict:
+        total = self.zone_matches + self.polyline_matches + self.unmatched
+        return {
+            "version": TOLL_TABLE_VERSION,
+            "facilities": len(self.facilities),
+            "zone_matches": self.zone_matches,
+            "polyline_matches": self.polyline_matches,
+            "unmatched": self.unmatched,
+            "match_ratio": ((total - self.unmatched) / total) if total else 0.0,
+        }
@@ -0,0 +1,536 @@
+"""
+SERVICIO DE PEAJES CON CACHE, SINGLE-FLIGHT Y STALE-WHILE-REVALIDATE
+====================================================================
+
+netlify/functions/tolls.js llama a TollGuru en cada cotización, sin cache:
+diez cotizaciones simultáneas de JFK -> Midtown son diez llamadas pagadas.
+Este módulo es la versión Python para el backend FastAPI (mismo contrato:
+`POST /api/tolls` con el body que arma maps_proxy.js):
+
+- Cada lugar conserva su tipo (address, placeId o lat/lng) y se reenvía a
+  TollGuru con ese mismo campo, como hace tolls.js con from/to.
+- Clave: ruta (origen, destino y waypoints con su tipo: geohash, dirección
+  normalizada, ver vlx_distance_cache.place_key, o el placeId tal cual) +
+  proveedor de TollGuru +
+  tipo de vehículo + bucket de la hora de salida (tipo de día y bloque de
+  VLX_TOLL_TIME_BUCKET_MIN minutos, hora de NY aproximada en UTC-5): los
+  cruces con tarifa pico cambian por hora.
+- Fresco durante VLX_TOLL_CACHE_TTL; después, "stale" hasta
+  VLX_TOLL_STALE_TTL.
+- Single-flight: los requests con la misma clave esperan la misma llamada
+  al proveedor.
+- Stale-while-revalidate: con una entrada vencida se lanza (o se reutiliza)
+  la revalidación y se espera a lo sumo VLX_TOLL_STALE_WAIT_MS; si el
+  proveedor tarda más, o falla, se responde el valor anterior marcado
+  `stale: true` y la revalidación sigue en segundo plano.
+- `polyline` opcional (la ruta elegida, codificada como en Google o como
+  lista de puntos): entra en la clave, porque dos rutas entre los mismos
+  puntos pueden cruzar peajes distintos, y la usa vlx_toll_table.
+- Contadores en `stats()`: llamadas al proveedor, las evitadas (por
+  acierto o por unirse a una llamada en curso) y las respuestas stale.
+
+`TollGuruProvider` replica la llamada y el parseo de tolls.js;
+`FakeTollProvider` responde sin red, con latencia y fallas configurables.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from vlx_distance_cache import place_key
+
+# ==============================================================================
+# CONFIGURACIÓN
+# ==============================================================================
+
+TOLL_CACHE_TTL = float(os.getenv("VLX_TOLL_CACHE_TTL", str(6 * 3600)))  # segundos fresco
+TOLL_STALE_TTL = float(os.getenv("VLX_TOLL_STALE_TTL", str(7 * 24 * 3600)))  # segundos servible como stale
+TOLL_STALE_WAIT_MS = float(os.getenv("VLX_TOLL_STALE_WAIT_MS", "300"))
+TOLL_TIME_BUCKET_MIN = int(os.getenv("VLX_TOLL_TIME_BUCKET_MIN", "60"))
+TOLL_CACHE_SIZE = int(os.getenv("VLX_TOLL_CACHE_SIZE", "20000"))
+TOLLGURU_URL = "https://apis.tollguru.com/toll/v2/origin-destination-waypoints"
+
+SERVICE_PROVIDERS = ("here", "gmaps", "tollguru")
+DEFAULT_VEHICLE_TYPE = "2AxlesAuto"
+# Los buckets siguen el día de NY; un offset fijo alcanza para agrupar
+# (en horario de verano el bloque se corre una hora, igual para todos)
+_NY_OFFSET = timezone(timedelta(hours=-5))
+
+
+class TollProviderError(Exception):
+    """Falla del proveedor; `status_code` es el HTTP que se reenvía al cliente"""
+
+    def __init__(self, message: str, status_code: int = 502, error_code: Optional[str] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.error_code = error_code
+
+
+# ==============================================================================
+# REQUEST NORMALIZADO (mismas reglas que tolls.js)
+# ==============================================================================
+
+PLACE_KINDS = ("address", "placeId", "latlng")
+
+
+def _place(place) -> Optional[Tuple[str, str]]:
+    """
+    Lugar de TollGuru ({address} / {placeId} / {lat, lng}) como (tipo, texto).
+    Un texto suelto es "latlng" si son coordenadas y "address" si no. Como
+    tolls.js (Number.isFinite), lat/lng no finitos o fuera de rango no son
+    un lugar: json.dumps mandaría NaN / Infinity, que no es JSON válido.
+    """
+    if isinstance(place, str):
+        text = place.strip()
+        if not text:
+            return None
+        return ("latlng" if place_key(text).startswith("g:") else "address"), text
+    if not isinstance(place, dict):
+        return None
+    for field in ("address", "placeId"):
+        value = place.get(field)
+        if isinstance(value, str) and value.strip():
+            return field, value.strip()
+    try:
+        lat, lng = float(place.get("lat")), float(place.get("lng"))
+    except (TypeError, ValueError):
+        return None
+    # La comparación encadenada también rechaza NaN
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        return None
+    return "latlng", f"{lat},{lng}"
+
+
+def decode_polyline(encoded: str) -> List[Tuple[float, float]]:
+    """Polyline codificada de Google (precisión 1e-5) -> [(lat, lng), ...]"""
+    points, index, lat, lng = [], 0, 0, 0
+    try:
+        while index < len(encoded):
+            deltas = []
+            for _ in range(2):
+                shift = result = 0
+                while True:
+                    byte = ord(encoded[index]) - 63
+                    index += 1
+                    result |= (byte & 0x1F) << shift
+                    shift += 5
+                    if byte < 0x20:
+                        break
+                deltas.append(~(result >> 1) if result & 1 else result >> 1)
+            lat += deltas[0]
+            lng += deltas[1]
+            points.append((lat / 1e5, lng / 1e5))
+    except IndexError:
+        raise ValueError("invalid polyline") from None
+    return points
+
+
+def _polyline_points(value) -> Tuple[Tuple[float, float], ...]:
+    """Polyline del body: texto codificado, [[lat, lng], ...] o [{lat, lng}, ...]"""
+    if not value:
+        return ()
+    if isinstance(value, str):
+        return tuple(decode_polyline(value.strip()))
+    if not isinstance(value, list):
+        raise ValueError("invalid polyline")
+    points = []
+    for item in value:
+        try:
+            if isinstance(item, dict):
+                points.append((float(item["lat"]), float(item["lng"])))
+            else:
+                lat, lng = item
+                points.append((float(lat), float(lng)))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("invalid polyline") from None
+    return tuple(points)
+
+
+def _place_payload(kind: str, text: str) -> dict:
+    """El lugar como lo recibe TollGuru, con el mismo campo con que llegó"""
+    if kind == "latlng":
+        lat, lng = (float(value) for value in text.split(","))
+        return {"lat": lat, "lng": lng}
+    return {kind: text}
+
+
+def _place_cache_key(kind: str, text: str) -> str:
+    # Un placeId no es una dirección: no se normaliza ni se geocodifica
+    return f"{kind}:{text if kind == 'placeId' else place_key(text)}"
+
+
+@dataclass(frozen=True)
+class TollRequest:
+    origin: str
+    destination: str
+    waypoints: Tuple[str, ...]
+    vehicle_type: str
+    service_provider: str
+    departure: datetime
+    polyline: Tuple[Tuple[float, float], ...] = ()
+    # Tipo de cada lugar (PLACE_KINDS): se reenvía a TollGuru con el mismo campo
+    origin_kind: str = "address"
+    destination_kind: str = "address"
+    waypoint_kinds: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_payload(cls, body: dict, now: Optional[datetime] = None) -> "TollRequest":
+        """
+        Body de POST /api/tolls (el de maps_proxy.js); ValueError si falta
+        origen o destino o si la polyline no se puede leer.
+        """
+        origin = _place(body.get("from")) or _place(body.get("origin"))
+        destination = _place(body.get("to")) or _place(body.get("destination"))
+        if not origin or not destination:
+            raise ValueError("origin and destination are required")
+
+        provider = str(body.get("serviceProvider") or "here").strip().lower()
+        vehicle = body.get("vehicle") if isinstance(body.get("vehicle"), dict) else {}
+        vehicle_type = str(vehicle.get("type") or body.get("vehicleType") or DEFAULT_VEHICLE_TYPE).strip()
+
+        # Como Array.isArray en tolls.js: un waypoints que no es lista se ignora
+        items = body.get("waypoints")
+        waypoints = tuple(
+            place for place in (_place(item) for item in (items if isinstance(items, list) else ()) if item)
+            if place
+        )
+
+        now = now or datetime.now(timezone.utc)
+        departure = now
+        raw_departure = body.get("departureTime") or body.get("departure_time")
+        if raw_departure:
+            try:
+                departure = datetime.fromisoformat(str(raw_departure).replace("Z", "+00:00"))
+                if departure.tzinfo is None:
+                    departure = departure.replace(tzinfo=timezone.utc)
+            except ValueError:
+                departure = now
+
+        return cls(
+            origin=origin[1],
+            destination=destination[1],
+            waypoints=tuple(text for _, text in waypoints),
+            vehicle_type=vehicle_type or DEFAULT_VEHICLE_TYPE,
+            service_provider=provider if provider in SERVICE_PROVIDERS else "here",
+            departure=departure,
+            polyline=_polyline_points(body.get("polyline")),
+            origin_kind=origin[0],
+            destination_kind=destination[0],
+            waypoint_kinds=tuple(kind for kind, _ in waypoints),
+        )
+
+    def time_bucket(self, minutes: int = TOLL_TIME_BUCKET_MIN) -> str:
+        local = self.departure.astimezone(_NY_OFFSET)
+        day = "we" if local.weekday() >= 5 else "wd"
+        minute = local.hour * 60 + local.minute
+        return f"{day}{minute - minute % max(1, minutes):04d}"
+
+    def cache_key(self, bucket_minutes: int = TOLL_TIME_BUCKET_MIN) -> str:
+        route = ">".join(_place_cache_key(kind, text) for kind, text in self._places())
+        key = f"{route}|{self.service_provider}|{self.vehicle_type}|{self.time_bucket(bucket_minutes)}"
+        if self.polyline:
+            key += f"|p{zlib.crc32(repr(self.polyline).encode('ascii')):08x}"
+        return key
+
+    def _places(self):
+        """(tipo, texto) de origen, waypoints y destino, en orden"""
+        waypoint_kinds = self.waypoint_kinds or ("address",) * len(self.waypoints)
+        return [
+            (self.origin_kind, self.origin),
+            *zip(waypoint_kinds, self.waypoints),
+            (self.destination_kind, self.destination),
+        ]
+
+    def tollguru_payload(self) -> dict:
+        """Body para TollGuru: cada lugar con el campo original (address, placeId o lat/lng)"""
+        places = [_place_payload(kind, text) for kind, text in self._places()]
+        payload = {
+            "from": places[0],
+            "to": places[-1],
+            "serviceProvider": self.service_provider,
+            "vehicle": {"type": self.vehicle_type},
+            "departureTime": self.departure.astimezone(timezone.utc).isoformat().replace("+00:00", "Z"),
+        }
+        if self.waypoints:
+            payload["waypoints"] = places[1:-1]
+        return payload
+
+
+def unavailable(error: str, **extra) -> dict:
+    """Respuesta de peaje no disponible, como la de tolls.js"""
+    return {"has_tolls": False, "toll_cost": 0.0, "toll_unavailable": True, "error": error, **extra}
+
+
+# ==============================================================================
+# PROVEEDORES
+# ==============================================================================
+
+class TollProvider:
+    """Interfaz: `tolls(request)` devuelve el resultado de peajes o lanza TollProviderError"""
+
+    name = "provider"
+
+    async def tolls(self, request: TollRequest) -> dict:
+        raise NotImplementedError
+
+
+_COST_FIELDS = (
+    "licensePlate", "tag", "cash", "prepaidCard", "tagAndCash", "minimumTollCost", "maximumTollCost",
+)
+
+
+def parse_tollguru(data: dict, service_provider: str) -> dict:
+    """Resultado de TollGuru -> respuesta de /api/tolls (mismo orden de costos que tolls.js)"""
+    route = (data.get("routes") or [{}])[0] or {}
+    costs = route.get("costs") or {}
+    tolls = route.get("tolls") if isinstance(route.get("tolls"), list) else []
+
+    toll_cost = 0.0
+    for field in _COST_FIELDS:
+        try:
+            value = float(costs.get(field) or 0)
+        except (TypeError, ValueError):
+            value = 0.0
+        if value > 0:
+            toll_cost = value
+            break
+
+    summary = data.get("summary") or {}
+    return {
+        "has_tolls": bool((route.get("summary") or {}).get("hasTolls")) or toll_cost > 0 or bool(tolls),
+        "toll_cost": toll_cost,
+        "toll_unavailable": False,
+        "toll_count": len(tolls),
+        "currency": str(summary.get("currency") or "").strip() or None,
+        "service_provider": str(summary.get("source") or service_provider).strip() or service_provider,
+    }
+
+
+class TollGuruProvider(TollProvider):
+    """API origin-destination-waypoints de TollGuru (urllib en un hilo)"""
+
+    name = "tollguru"
+
+    def __init__(self, api_key: str, timeout: float = 10.0, url: str = TOLLGURU_URL):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.url = url
+
+    def _post(self, request: TollRequest) -> dict:
+        http_request = urllib.request.Request(
+            self.url,
+            data=json.dumps(request.tollguru_payload()).encode("utf-8"),
+            headers={"Content-Type": "application/json", "x-api-key": self.api_key},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(http_request, timeout=self.timeout) as response:
+                raw = response.read()
+        except urllib.error.HTTPError as e:
+            try:
+                data = json.loads(e.read() or b"{}")
+            except ValueError:
+                data = {}
+            if not isinstance(data, dict):
+                data = {}
+            message = str(data.get("value") or data.get("error") or "").strip()
+            if e.code == 403 and not message:
+                message = "Request denied by TollGuru (403). Verify active subscription/trial and API key permissions."
+            raise TollProviderError(
+                message or f"TollGuru request failed (HTTP {e.code})",
+                status_code=e.code,
+                error_code=str(data.get("code") or "").strip() or None,
+            ) from e
+        except OSError as e:
+            raise TollProviderError(f"TollGuru request failed: {e}") from e
+
+        try:
+            data = json.loads(raw) if raw else {}
+        except ValueError:
+            data = {}
+        if not isinstance(data, dict):
+            # Una lista o un escalar no es una respuesta de TollGuru: 502, no 500
+            raise TollProviderError("Unexpected TollGuru response")
+        status = str(data.get("status") or "").strip().upper()
+        if status and status != "OK":
+            raise TollProviderError(
+                str(data.get("value") or data.get("error") or "Unexpected TollGuru status"),
+                error_code=str(data.get("code") or "").strip() or None,
+            )
+        return parse_tollguru(data, request.service_provider)
+
+    async def tolls(self, request: TollRequest) -> dict:
+        return await asyncio.to_thread(self._post, request)
+
+
+class FakeTollProvider(TollProvider):
+    """
+    Proveedor local para pruebas y benchmarks: peaje determinista por ruta
+    (0, 6.94 o 17.63 USD), `latency` en segundos y `fail=True` para simular
+    caídas. Cuenta las llamadas.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.0, fail: bool = False):
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    async def tolls(self, request: TollRequest) -> dict:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail:
+            raise TollProviderError("Fake provider down", status_code=503)
+        route = "|".join((request.origin, *request.waypoints, request.destination))
+        toll_cost = (0.0, 6.94, 17.63)[zlib.crc32(route.encode("utf-8")) % 3]
+        return {
+            "has_tolls": toll_cost > 0,
+            "toll_cost": toll_cost,
+            "toll_unavailable": False,
+            "toll_count": 1 if toll_cost else 0,
+            "currency": "USD",
+            "service_provider": request.service_provider,
+        }
+
+
+# ==============================================================================
+# SERVICIO
+# ==============================================================================
+
+class TollService:
+    """Cache LRU de peajes con single-flight y stale-while-revalidate"""
+
+    def __init__(
+        self,
+        provider: Optional[TollProvider],
+        ttl: float = TOLL_CACHE_TTL,
+        stale_ttl: float = TOLL_STALE_TTL,
+        stale_wait_ms: float = TOLL_STALE_WAIT_MS,
+        bucket_minutes: int = TOLL_TIME_BUCKET_MIN,
+        maxsize: int = TOLL_CACHE_SIZE,
+        clock=time.monotonic,
+    ):
+        self.provider = provider
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.stale_wait = stale_wait_ms / 1000
+        self.bucket_minutes = bucket_minutes
+        self.maxsize = maxsize
+        self._clock = clock
+        # clave -> (fresco_hasta, servible_hasta, resultado)
+        self._entries: "OrderedDict[str, Tuple[float, float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        # Métricas
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+        self.fresh_hits = 0
+        self.stale_served = 0
+        self.coalesced = 0
+        self.revalidations = 0
+
+    def _lookup(self, key: str) -> Optional[Tuple[float, float, dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key: str, result: dict) -> None:
+        now = self._clock()
+        with self._lock:
+            self._entries[key] = (now + self.ttl, now + self.ttl + self.stale_ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    async def _call_provider(self, key: str, request: TollRequest) -> dict:
+        self.upstream_calls += 1
+        try:
+            result = await self.provider.tolls(request)
+        except Exception:
+            self.upstream_errors += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        self._store(key, result)
+        return result
+
+    def _flight(self, key: str, request: TollRequest) -> Tuple[asyncio.Task, bool]:
+        """(tarea de la llamada en curso para `key`, True si ya existía)"""
+        task = self._inflight.get(key)
+        if task is not None:
+            return task, True
+        task = asyncio.get_running_loop().create_task(self._call_provider(key, request))
+        # Si termina con error y nadie la espera (revalidación en segundo plano)
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._inflight[key] = task
+        return task, False
+
+    async def get(self, request: TollRequest) -> Tuple[dict, str]:
+        """
+        (resultado, estado) con estado "fresh", "stale", "revalidated",
+        "coalesced" o "miss". Lanza TollProviderError solo si no hay valor
+        anterior para servir.
+        """
+        if self.provider is None:
+            raise TollProviderError("Toll provider not configured", status_code=503)
+        key = request.cache_key(self.bucket_minutes)
+        entry = self._lookup(key)
+
+        if entry is not None and entry[0] > self._clock():
+            self.fresh_hits += 1
+            return entry[2], "fresh"
+
+        task, joined = self._flight(key, request)
+        if joined:
+            self.coalesced += 1
+        if entry is None:
+            # shield: si este request se cancela, la llamada sigue para los demás
+            return await asyncio.shield(task), "coalesced" if joined else "miss"
+
+        # Stale-while-revalidate: se da un margen corto al proveedor
+        if not joined:
+            self.revalidations += 1
+        done, _ = await asyncio.wait({task}, timeout=self.stale_wait)
+        if done and not task.cancelled() and task.exception() is None:
+            return task.result(), "coalesced" if joined else "revalidated"
+        self.stale_served += 1
+        return {**entry[2], "stale": True}, "stale"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        # Un valor stale ahorra la espera, no la llamada (la revalidación sale igual)
+        avoided = self.fresh_hits + self.coalesced
+        total = avoided + self.upstream_calls
+        return {
+            "provider": self.provider.name if self.provider else None,
+            "size": len(self._entries),
+            "upstream_calls": self.upstream_calls,
+            "upstream_errors": self.upstream_errors,
+            "upstream_calls_avoided": avoided,
+            "fresh_hits": self.fresh_hits,
+            "stale_served": self.stale_served,
+            "coalesced": self.coalesced,
+            "revalidations": self.revalidations,
+            "avoided_ratio": (avoided / total) if total else 0.0,
+        }
@@ -0,0 +1,208 @@
+"""
+CACHE EN MEMORIA DE USUARIOS
+============================
+
+Cada login leía la fila de `users` y parseaba con `json.loads` los campos
+`roles` y `allowed_apps`. `UserCache` guarda el usuario ya parseado
+(`CachedUser`: roles y apps como tuplas, un frozenset de apps para verificar
+acceso en O(1), y el estado) indexado por id, email y username, así un login
+repetido o una verificación de permisos de admin no toca la tabla ni vuelve
+a parsear JSON.
+
+Invalidación:
+- `invalidate(user_id=..., email=..., username=...)` saca al usuario de los
+  tres índices. Cualquier endpoint que modifique un usuario (perfil, cambio
+  de contraseña, roles) debe llamarlo después del COMMIT.
+- Los scripts de administración (crear_usuario_*.py, etc.) escriben directo
+  en la base desde otro proceso; después del COMMIT llaman a
+  `notify_user_changed`, que pega al endpoint
+  `POST /api/vlx/admin/users/cache/invalidate` del router (VLX_BACKEND_URL,
+  con el token de admin en VLX_ADMIN_TOKEN).
+- TTL corto (VLX_USER_CACHE_TTL, 60 s por defecto) como red de seguridad
+  para cambios que nadie notificó.
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import FrozenSet, Optional, Tuple
+
+# ==============================================================================
+# CONFIGURACIÓN
+# ==============================================================================
+
+USER_CACHE_TTL = float(os.getenv("VLX_USER_CACHE_TTL", "60"))  # segundos
+USER_CACHE_SIZE = int(os.getenv("VLX_USER_CACHE_SIZE", "10000"))
+BACKEND_URL = os.getenv("VLX_BACKEND_URL", "http://192.168.1.43:3000")
+ADMIN_TOKEN = os.getenv("VLX_ADMIN_TOKEN", "")
+
+
+def _parse_json_list(value) -> list:
+    if not value:
+        return []
+    try:
+        parsed = json.loads(value)
+    except (TypeError, ValueError):
+        return []
+    return parsed if isinstance(parsed, list) else []
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """Usuario con roles y apps ya parseados (inmutable, se comparte entre requests)"""
+    id: int
+    username: str
+    email: str
+    password_hash: str
+    roles: Tuple[str, ...]
+    allowed_apps: Tuple[str, ...]      # orden original, para la respuesta del login
+    allowed_app_set: FrozenSet[str]    # para `app in user.allowed_app_set`
+    status: str
+
+    @classmethod
+    def from_row(cls, row: dict) -> "CachedUser":
+        allowed_apps = tuple(_parse_json_list(row["allowed_apps"]))
+        return cls(
+            id=row["id"],
+            username=row["username"],
+            email=row["email"],
+            password_hash=row["password_hash"],
+            roles=tuple(_parse_json_list(row["roles"])),
+            allowed_apps=allowed_apps,
+            allowed_app_set=frozenset(allowed_apps),
+            status=row["status"],
+        )
+
+    @property
+    def is_active(self) -> bool:
+        return self.status == "active"
+
+    def has_any_role(self, roles) -> bool:
+        return any(role in self.roles for role in roles)
+
+
+class UserCache:
+    """Cache LRU + TTL de usuarios indexado por id, email y username"""
+
+    def __init__(self, ttl: float = USER_CACHE_TTL, maxsize: int = USER_CACHE_SIZE, clock=time.monotonic):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        # id -> (expira, usuario); email/username -> id
+        self._by_id: "OrderedDict[int, Tuple[float, CachedUser]]" = OrderedDict()
+        self._by_login: dict = {}
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _get_locked(self, user_id: Optional[int]) -> Optional[CachedUser]:
+        entry = self._by_id.get(user_id) if user_id is not None else None
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at <= self._clock():
+            self._remove_locked(user)
+            return None
+        self._by_id.move_to_end(user_id)
+        return user
+
+    def _remove_locked(self, user: CachedUser) -> None:
+        self._by_id.pop(user.id, None)
+        for login in (user.email, user.username):
+            if self._by_login.get(login) == user.id:
+                del self._by_login[login]
+
+    def _count(self, user: Optional[CachedUser]) -> Optional[CachedUser]:
+        if user is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return user
+
+    def get_by_id(self, user_id: int) -> Optional[CachedUser]:
+        with self._lock:
+            return self._count(self._get_locked(user_id))
+
+    def get_by_login(self, login: str) -> Optional[CachedUser]:
+        """Busca por email o username (lo que el usuario escribió en el login)"""
+        with self._lock:
+            return self._count(self._get_locked(self._by_login.get(login)))
+
+    def put(self, user: CachedUser) -> None:
+        with self._lock:
+            previous = self._by_id.get(user.id)
+            if previous is not None:
+                self._remove_locked(previous[1])
+            self._by_id[user.id] = (self._clock() + self.ttl, user)
+            for login in (user.email, user.username):
+                if login:
+                    self._by_login[login] = user.id
+            while len(self._by_id) > self.maxsize:
+                _, (_, oldest) = self._by_id.popitem(last=False)
+                self._remove_locked(oldest)
+
+    def invalidate(self, user_id: Optional[int] = None, email: Optional[str] = None, username: Optional[str] = None) -> bool:
+        """Saca a un usuario del cache por cualquiera de sus claves; True si estaba"""
+        with self._lock:
+            if user_id is None:
+                user_id = self._by_login.get(email) if email else None
+            if user_id is None and username:
+                user_id = self._by_login.get(username)
+            entry = self._by_id.get(user_id) if user_id is not None else None
+            if entry is None:
+                return False
+            self._remove_locked(entry[1])
+            self.invalidations += 1
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_id.clear()
+            self._by_login.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._by_id),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+def notify_user_changed(
+    user_id: Optional[int] = None,
+    email: Optional[str] = None,
+    username: Optional[str] = None,
+    backend_url: str = BACKEND_URL,
+    token: str = ADMIN_TOKEN,
+    timeout: float = 5.0,
+) -> bool:
+    """
+    Pide al backend que saque a un usuario de su UserCache (para scripts que
+    escriben la tabla `users` por fuera del router). Sin token o con el
+    backend apagado devuelve False: el TTL del cache termina de cubrirlo.
+    """
+    if not token:
+        return False
+    body = {key: value for key, value in (("user_id", user_id), ("email", email), ("username", username)) if value}
+    request = urllib.request.Request(
+        f"{backend_url.rstrip('/')}/api/vlx/admin/users/cache/invalidate",
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return 200 <= response.status < 300
+    except (OSError, ValueError):
+        return False
@@ -0,0 +1,362 @@
+"""
+ÍNDICE DE ZONAS (POLÍGONOS SOBRE UNA GRILLA PRECALCULADA)
+=========================================================
+
+PricingService clasifica rutas con dos cajas (Manhattan, NYC) y un radio de
+3 millas por aeropuerto. Este módulo usa zonas con polígonos: los cinco
+boroughs, el área de cada aeropuerto, Westchester y los hubs de NJ.
+
+Cómo responde sin recorrer polígonos:
+
+- Al construir el índice se cubre la región con una grilla uniforme de
+  celdas de `cell_deg` grados (0.005° ≈ 0.35 mi de lado). Cada celda queda
+  resuelta a una zona (o a ninguna), salvo las celdas por las que pasa un
+  borde de algún polígono.
+- Buscar un punto es calcular su celda e indexar un arreglo: O(1). Solo los
+  puntos en celdas de borde hacen el test exacto (ray casting), y solo
+  contra los polígonos que tocan esa celda.
+- `lookup` resuelve un punto en Python puro (microsegundos, sin el costo
+  fijo de NumPy); `lookup_many` hace lo mismo para arreglos de puntos,
+  agrupando los puntos de borde por zona candidata.
+
+Las zonas se solapan a propósito (JFK está dentro de Queens): gana la de
+mayor prioridad, que es el orden de ZONES (aeropuertos primero).
+
+Los polígonos son aproximados (decenas de vértices): sirven para tarifas y
+analítica, no para límites legales.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from vlx_pricing import ROUTE_EWR, ROUTE_JFK, ROUTE_LGA, ROUTE_LOCAL, ROUTE_OUTSIDE
+
+NO_ZONE = -1
+_EDGE = -2
+DEFAULT_CELL_DEG = 0.005
+
+Ring = Sequence[Tuple[float, float]]  # vértices (lat, lng), sin repetir el primero
+
+
+@dataclass(frozen=True)
+class Zone:
+    key: str
+    name: str
+    kind: str  # airport, borough, county, nj_hub
+    rings: Tuple[Ring, ...]  # regla par-impar entre anillos: permite huecos
+
+
+# ==============================================================================
+# ZONAS (en orden de prioridad)
+# ==============================================================================
+
+ZONES: Tuple[Zone, ...] = (
+    Zone("jfk", "JFK Airport", "airport", ((
+        (40.6650, -73.8150), (40.6620, -73.7600), (40.6450, -73.7420),
+        (40.6200, -73.7550), (40.6230, -73.7900), (40.6400, -73.8200),
+    ),)),
+    Zone("lga", "LaGuardia Airport", "airport", ((
+        (40.7850, -73.8900), (40.7860, -73.8550), (40.7720, -73.8550),
+        (40.7660, -73.8720), (40.7700, -73.8900),
+    ),)),
+    Zone("ewr", "Newark Airport", "airport", ((
+        (40.7100, -74.1850), (40.7080, -74.1600), (40.6700, -74.1550),
+        (40.6650, -74.1800), (40.6850, -74.1900),
+    ),)),
+    Zone("manhattan", "Manhattan", "borough", ((
+        (40.7009, -74.0190), (40.7110, -73.9770), (40.7295, -73.9710),
+        (40.7440, -73.9715), (40.7590, -73.9590), (40.7755, -73.9425),
+        (40.7960, -73.9290), (40.8090, -73.9330), (40.8350, -73.9340),
+        (40.8560, -73.9200), (40.8790, -73.9240), (40.8680, -73.9330),
+        (40.8500, -73.9470), (40.8240, -73.9590), (40.8000, -73.9720),
+        (40.7720, -73.9940), (40.7550, -74.0090), (40.7300, -74.0130),
+    ),)),
+    Zone("bronx", "The Bronx", "borough", ((
+        (40.8090, -73.9330), (40.8350, -73.9340), (40.8560, -73.9200),
+        (40.8790, -73.9240), (40.9130, -73.9180), (40.9170, -73.8600),
+        (40.8990, -73.8370), (40.8900, -73.7850), (40.8460, -73.7820),
+        (40.8120, -73.7900), (40.8000, -73.8600), (40.7960, -73.9100),
+    ),)),
+    Zone("queens", "Queens", "borough", ((
+        (40.7390, -73.9620), (40.7560, -73.9550), (40.7760, -73.9380),
+        (40.7870, -73.9100), (40.7800, -73.8700), (40.7940, -73.8300),
+        (40.7960, -73.7800), (40.7700, -73.7550), (40.7500, -73.7010),
+        (40.7000, -73.7250), (40.6500, -73.7250), (40.6000, -73.7380),
+        (40.5780, -73.8000), (40.5500, -73.9380), (40.5650, -73.9400),
+        (40.6200, -73.8900), (40.6800, -73.8650), (40.6950, -73.8900),
+        (40.7050, -73.9030), (40.7250, -73.9250),
+    ),)),
+    Zone("brooklyn", "Brooklyn", "borough", ((
+        (40.7390, -73.9620), (40.7250, -73.9250), (40.7050, -73.9030),
+        (40.6950, -73.8900), (40.6800, -73.8650), (40.6200, -73.8900),
+        (40.5650, -73.9400), (40.5720, -74.0100), (40.6100, -74.0400),
+        (40.6400, -74.0300), (40.6800, -74.0200), (40.7000, -73.9950),
+        (40.7100, -73.9700), (40.7300, -73.9620),
+    ),)),
+    Zone("staten_island", "Staten Island", "borough", ((
+        (40.6480, -74.0800), (40.6450, -74.1850), (40.6000, -74.2050),
+        (40.5500, -74.2500), (40.5000, -74.2550), (40.4960, -74.2400),
+        (40.5250, -74.1500), (40.5700, -74.0550), (40.6100, -74.0600),
+    ),)),
+    Zone("jersey_city_hoboken", "Jersey City / Hoboken", "nj_hub", ((
+        (40.7600, -74.0250), (40.7550, -74.0500), (40.7000, -74.0850),
+        (40.6700, -74.0900), (40.6900, -74.0500), (40.7150, -74.0300),
+        (40.7400, -74.0250),
+    ),)),
+    Zone("newark", "Downtown Newark", "nj_hub", ((
+        (40.7550, -74.1800), (40.7500, -74.1550), (40.7250, -74.1500),
+        (40.7200, -74.1850),
+    ),)),
+    Zone("westchester", "Westchester", "county", ((
+        (40.9130, -73.9180), (41.0000, -73.9100), (41.2000, -73.9600),
+        (41.3650, -73.9800), (41.3650, -73.5200), (41.1000, -73.6500),
+        (41.0000, -73.6550), (40.9600, -73.6600), (40.8900, -73.7850),
+        (40.8990, -73.8370), (40.9170, -73.8600),
+    ),)),
+)
+
+# Zonas que cuentan como NYC para la tarifa local (aeropuertos de Queens incluidos)
+NYC_ZONE_KEYS = ("jfk", "lga", "manhattan", "bronx", "queens", "brooklyn", "staten_island")
+AIRPORT_ROUTES = {"jfk": ROUTE_JFK, "lga": ROUTE_LGA, "ewr": ROUTE_EWR}
+
+
+# ==============================================================================
+# GEOMETRÍA
+# ==============================================================================
+
+def points_in_rings(lat: np.ndarray, lng: np.ndarray, rings: Sequence[Ring]) -> np.ndarray:
+    """
+    Test exacto par-impar (ray casting hacia +lng) de muchos puntos contra
+    los anillos de una zona: un loop por arista, vectorizado sobre puntos.
+    """
+    inside = np.zeros(lat.shape, dtype=bool)
+    for ring in rings:
+        vertices = np.asarray(ring, dtype=np.float64)
+        lat_a, lng_a = vertices[:, 0], vertices[:, 1]
+        lat_b, lng_b = np.roll(lat_a, -1), np.roll(lng_a, -1)
+        for y1, x1, y2, x2 in zip(lat_a, lng_a, lat_b, lng_b):
+            crosses = (y1 > lat) != (y2 > lat)
+            if not crosses.any():
+                continue
+            with np.errstate(divide="ignore", invalid="ignore"):
+                x_cross = x1 + (lat - y1) * (x2 - x1) / (y2 - y1)
+            inside ^= crosses & (lng < x_cross)
+    return inside
+
+
+def point_in_rings(lat: float, lng: float, rings: Sequence[Ring]) -> bool:
+    """points_in_rings para un solo punto, sin NumPy"""
+    inside = False
+    for ring in rings:
+        y2, x2 = ring[-1]
+        for y1, x1 in ring:
+            if (y1 > lat) != (y2 > lat) and lng < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+            y2, x2 = y1, x1
+    return inside
+
+
+def _edge_cells(ring: Ring, origin: Tuple[float, float], cell_deg: float, shape: Tuple[int, int]) -> np.ndarray:
+    """
+    Celdas (fila, columna) que puede tocar el borde del anillo. Se muestrea
+    cada arista a paso < 1 celda y se marca la vecindad 3x3 de cada muestra:
+    todo punto de la arista cae en la celda de una muestra o en una vecina,
+    así que ninguna celda de borde queda sin marcar (sobran algunas, que
+    solo cuestan un test exacto).
+    """
+    vertices = np.asarray(ring, dtype=np.float64)
+    start, end = vertices, np.roll(vertices, -1, axis=0)
+    samples = []
+    for a, b in zip(start, end):
+        steps = int(np.ceil(np.abs(b - a).max() / (cell_deg * 0.5))) + 1
+        t = np.linspace(0.0, 1.0, steps + 1)[:, None]
+        samples.append(a + (b - a) * t)
+    samples = np.concatenate(samples)
+    rows = np.floor((samples[:, 0] - origin[0]) / cell_deg).astype(np.int64)
+    cols = np.floor((samples[:, 1] - origin[1]) / cell_deg).astype(np.int64)
+    cells = set()
+    for d_row in (-1, 0, 1):
+        for d_col in (-1, 0, 1):
+            r, c = rows + d_row, cols + d_col
+            ok = (r >= 0) & (r < shape[0]) & (c >= 0) & (c < shape[1])
+            cells.update(zip(r[ok].tolist(), c[ok].tolist()))
+    return np.array(sorted(cells), dtype=np.int64).reshape(-1, 2)
+
+
+# ==============================================================================
+# ÍNDICE
+# ==============================================================================
+
+class ZoneIndex:
+    """
+    Grilla uniforme sobre el rectángulo que cubre todas las zonas.
+
+    `cells[fila, columna]` es el índice de la zona ganadora, NO_ZONE, o
+    _EDGE para celdas de borde. En esas, `candidates` tiene un bit por zona a
+    probar (en orden de prioridad) y `fallback` la zona que queda si ninguna
+    contiene el punto (una zona de menor prioridad que cubre toda la celda).
+    """
+
+    def __init__(self, zones: Sequence[Zone] = ZONES, cell_deg: float = DEFAULT_CELL_DEG):
+        self.zones = tuple(zones)
+        if len(self.zones) > 32:
+            raise ValueError("Máximo 32 zonas por índice (una máscara de bits por celda)")
+        self.cell_deg = cell_deg
+        self._key_index = {zone.key: i for i, zone in enumerate(self.zones)}
+
+        every_vertex = np.array([vertex for zone in self.zones for ring in zone.rings for vertex in ring])
+        self.origin = (every_vertex[:, 0].min() - cell_deg, every_vertex[:, 1].min() - cell_deg)
+        top = (every_vertex[:, 0].max() + cell_deg, every_vertex[:, 1].max() + cell_deg)
+        self.shape = (
+            int(np.ceil((top[0] - self.origin[0]) / cell_deg)),
+            int(np.ceil((top[1] - self.origin[1]) / cell_deg)),
+        )
+
+        # Estado de cada zona en cada celda: 0 afuera, 1 adentro, 2 borde
+        rows, cols = np.indices(self.shape)
+        center_lat = self.origin[0] + (rows + 0.5) * cell_deg
+        center_lng = self.origin[1] + (cols + 0.5) * cell_deg
+        states = []
+        for zone in self.zones:
+            state = points_in_rings(center_lat, center_lng, zone.rings).astype(np.int8)
+            for ring in zone.rings:
+                edges = _edge_cells(ring, self.origin, cell_deg, self.shape)
+                state[edges[:, 0], edges[:, 1]] = 2
+            states.append(state)
+
+        # Resolución por prioridad: la primera zona que cubre la celda entera
+        # gana; las de borde anteriores quedan como candidatas
+        self.cells = np.full(self.shape, NO_ZONE, dtype=np.int16)
+        self.candidates = np.zeros(self.shape, dtype=np.uint32)
+        resolved = np.zeros(self.shape, dtype=bool)
+        for i, state in enumerate(states):
+            edge = ~resolved & (state == 2)
+            self.candidates[edge] |= np.uint32(1 << i)
+            wins = ~resolved & (state == 1)
+            self.cells[wins] = i
+            resolved |= wins
+
+        edge_cells = self.candidates != 0
+        self.fallback = np.where(edge_cells, self.cells, NO_ZONE).astype(np.int16)
+        self.cells[edge_cells] = _EDGE
+        # Copias en listas para lookup_index: indexar listas de Python es
+        # varias veces más rápido que indexar un arreglo NumPy de a un elemento
+        self._cells_list = self.cells.tolist()
+        self._candidates_list = self.candidates.tolist()
+        self._fallback_list = self.fallback.tolist()
+
+    # ------------------------------------------------------------------
+    # Búsqueda
+    # ------------------------------------------------------------------
+
+    def _cell_of(self, lat, lng):
+        rows = np.floor((np.asarray(lat, dtype=np.float64) - self.origin[0]) / self.cell_deg)
+        cols = np.floor((np.asarray(lng, dtype=np.float64) - self.origin[1]) / self.cell_deg)
+        inside = (rows >= 0) & (rows < self.shape[0]) & (cols >= 0) & (cols < self.shape[1])
+        return rows.astype(np.int64), cols.astype(np.int64), inside
+
+    def lookup_index(self, lat: float, lng: float) -> int:
+        """Índice de zona (o NO_ZONE) de un punto, en Python puro"""
+        row = math.floor((lat - self.origin[0]) / self.cell_deg)
+        col = math.floor((lng - self.origin[1]) / self.cell_deg)
+        if not (0 <= row < self.shape[0] and 0 <= col < self.shape[1]):
+            return NO_ZONE
+        index = self._cells_list[row][col]
+        if index != _EDGE:
+            return index
+        candidates = self._candidates_list[row][col]
+        for i, zone in enumerate(self.zones):
+            if candidates >> i & 1 and point_in_rings(lat, lng, zone.rings):
+                return i
+        return self._fallback_list[row][col]
+
+    def lookup(self, lat: float, lng: float) -> Optional[Zone]:
+        """Zona que contiene el punto, o None"""
+        index = self.lookup_index(lat, lng)
+        return None if index == NO_ZONE else self.zones[index]
+
+    def lookup_many(self, lat, lng) -> np.ndarray:
+        """Índice de zona (o NO_ZONE) por punto, para arreglos de cualquier forma"""
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        rows, cols, in_grid = self._cell_of(lat, lng)
+        result = np.full(lat.shape, NO_ZONE, dtype=np.int16)
+        result[in_grid] = self.cells[rows[in_grid], cols[in_grid]]
+
+        flat = result.reshape(-1)
+        edge = np.flatnonzero(flat == _EDGE)
+        if len(edge):
+            flat_lat, flat_lng = lat.reshape(-1)[edge], lng.reshape(-1)[edge]
+            edge_rows, edge_cols = rows.reshape(-1)[edge], cols.reshape(-1)[edge]
+            candidates = self.candidates[edge_rows, edge_cols]
+            answers = self.fallback[edge_rows, edge_cols]
+            pending = np.ones(len(edge), dtype=bool)
+            # Por zona, en orden de prioridad: un test vectorizado sobre los
+            # puntos de borde que todavía no se resolvieron y la tienen como candidata
+            for i, zone in enumerate(self.zones):
+                mask = pending & ((candidates >> np.uint32(i)) & np.uint32(1)).astype(bool)
+                if not mask.any():
+                    continue
+                hits = np.flatnonzero(mask)[points_in_rings(flat_lat[mask], flat_lng[mask], zone.rings)]
+                answers[hits] = i
+                pending[hits] = False
+            flat[edge] = answers
+        return result
+
+    def keys(self, indexes) -> List[Optional[str]]:
+        """Claves de zona para índices devueltos por lookup_many"""
+        return [None if i == NO_ZONE else self.zones[i].key for i in np.asarray(indexes).ravel().tolist()]
+
+    # ------------------------------------------------------------------
+    # Tipo de ruta por zona
+    # ------------------------------------------------------------------
+
+    def classify_routes(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng) -> np.ndarray:
+        """
+        Tipo de ruta (índices de vlx_pricing.ROUTE_TYPES) con zonas en vez de
+        cajas y radios: Manhattan <-> área de aeropuerto es tarifa plana, dos
+        zonas de NYC es local, el resto es fuera de la ciudad.
+        """
+        pickup = self.lookup_many(pickup_lat, pickup_lng)
+        dropoff = self.lookup_many(dropoff_lat, dropoff_lng)
+        manhattan = self._key_index["manhattan"]
+        nyc = np.array([self._key_index[key] for key in NYC_ZONE_KEYS])
+
+        conditions, choices = [], []
+        for key, route in AIRPORT_ROUTES.items():
+            airport = self._key_index[key]
+            conditions.append(((pickup == manhattan) & (dropoff == airport)) | ((pickup == airport) & (dropoff == manhattan)))
+            choices.append(route)
+        conditions.append(np.isin(pickup, nyc) & np.isin(dropoff, nyc))
+        choices.append(ROUTE_LOCAL)
+        return np.select(conditions, choices, default=ROUTE_OUTSIDE)
+
+    def stats(self) -> dict:
+        edge_cells = int((self.cells == _EDGE).sum())
+        return {
+            "zones": len(self.zones),
+            "cell_deg": self.cell_deg,
+            "cells": self.shape[0] * self.shape[1],
+            "edge_cells": edge_cells,
+            "edge_cell_ratio": edge_cells / (self.shape[0] * self.shape[1]),
+        }
+
+
+_default_index: Optional[ZoneIndex] = None
+
+
+def default_index() -> ZoneIndex:
+    """Índice de ZONES, construido en el primer uso (~0.1 s)"""
+    global _default_index
+    if _default_index is None:
+        _default_index = ZoneIndex()
+    return _default_index
+
+
+def zone_keys(lat, lng) -> List[Optional[str]]:
+    """Clave de zona (o None) por punto, con el índice por defecto"""
+    index = default_index()
+    return index.keys(index.lookup_many(lat, lng))
@@ -288,21 +288,28 @@
           })
         : [];
 
+      var payload = {
+        origin: origin,
+        destination: destination,
+        serviceProvider: serviceProvider,
+        vehicle: {
+          type: vehicleType,
+        },
+        departureTime: departureTime,
+        waypoints: waypoints,
+      };
+      // Polyline de Directions (overview_polyline.points): con ella el backend
+      // tarifa los cruces de NYC sin llamar a TollGuru
+      if (typeof normalizedOptions.polyline === 'string' && normalizedOptions.polyline.length > 0) {
+        payload.polyline = normalizedOptions.polyline;
+      }
+
       return fetch('/api/tolls', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({
-          origin: origin,
-          destination: destination,
-          serviceProvider: serviceProvider,
-          vehicle: {
-            type: vehicleType,
-          },
-          departureTime: departureTime,
-          waypoints: waypoints,
-        }),
+        body: JSON.stringify(payload),
       })
       .then(function (response) {
         return response.json().then(function (data) {